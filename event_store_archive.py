@@ -0,0 +1,177 @@
+import collections
+import gzip
+import itertools
+import json
+import os
+import urllib.parse
+
+EVENT_SEGMENT_NAME = '{}_{}.jsonl.gz'
+
+
+def parse_id(_entry_id):
+    """
+    Parse an entry ID into a tuple which sorts like the entry IDs of a stream.
+
+    :param _entry_id: The entry ID.
+    :return: A tuple with the two parts of the entry ID.
+    """
+    ms, _, seq = _entry_id.partition('-')
+
+    return int(ms), int(seq or 0)
+
+
+def parse_bound(_entry_id, _default):
+    """
+    Parse a range bound into a key of the ID index.
+
+    :param _entry_id: The entry ID, '-' or '+', prefix with '(' to exclude it.
+    :param _default: The sequence number of an entry ID without one, 0 for start and infinity for end bounds.
+    :return: A tuple with the key and a boolean if the bound is exclusive.
+    """
+    if _entry_id == '-':
+        return (-1, -1), False
+    if _entry_id == '+':
+        return (float('inf'), float('inf')), False
+
+    entry_id = _entry_id.lstrip('(')
+    ms, sep, seq = entry_id.partition('-')
+
+    return (int(ms), int(seq) if sep else _default), _entry_id.startswith('(')
+
+
+def parse_policies(_spec):
+    """
+    Parse retention policies, e.g. 'order:100000:86400,*:1000000:0' with topic, max length and max age in s.
+
+    :param _spec: The retention policy specification, '*' applies to all other topics.
+    :return: A dict mapping event topics to tuples with max length and max age, 0 disables a limit.
+    """
+    policies = {}
+    for policy in filter(None, _spec.split(',')):
+        topic, max_len, max_age = policy.strip().rsplit(':', 2)
+        policies[topic] = (int(max_len), int(max_age))
+
+    return policies
+
+
+class Archive(object):
+    """
+    Archive class, stores trimmed stream entries in compressed, append-only segment files.
+    """
+
+    def __init__(self, _path):
+        """
+        :param _path: The directory to store the segment files in.
+        """
+        self.path = _path
+
+    def segments(self, _topic):
+        """
+        Get the segments of a topic.
+
+        :param _topic: The event topic.
+        :return: A list of tuples with first entry ID, last entry ID and file name, ordered by entry IDs.
+        """
+        path = os.path.join(self.path, urllib.parse.quote(_topic, safe=''))
+        if not os.path.isdir(path):
+            return []
+
+        segments = []
+        for name in os.listdir(path):
+            if not name.endswith('.jsonl.gz'):
+                continue
+            first_id, last_id = name[:-len('.jsonl.gz')].split('_')
+            segments.append((first_id, last_id, os.path.join(path, name)))
+
+        return sorted(segments, key=lambda segment: parse_id(segment[0]))
+
+    def last_id(self, _topic):
+        """
+        Get the last archived entry ID of a topic.
+
+        :param _topic: The event topic.
+        :return: The entry ID or None if nothing is archived.
+        """
+        segments = self.segments(_topic)
+
+        return segments[-1][1] if segments else None
+
+    def write(self, _topic, _pages):
+        """
+        Write entries into a new segment, the segment only becomes visible once it is complete.
+
+        :param _topic: The event topic.
+        :param _pages: An iterable of lists of event entries, ordered by entry IDs.
+        :return: The number of archived entries.
+        """
+        path = os.path.join(self.path, urllib.parse.quote(_topic, safe=''))
+        os.makedirs(path, exist_ok=True)
+
+        temp = os.path.join(path, '.segment.{}.tmp'.format(os.getpid()))
+        first_id, last_id, count = None, None, 0
+        with gzip.open(temp, 'wt') as f:
+            for entries in _pages:
+                for entry_id, entry in entries:
+                    f.write(json.dumps([entry_id, entry]))
+                    f.write('\n')
+                first_id = first_id or entries[0][0]
+                last_id = entries[-1][0]
+                count += len(entries)
+
+        if count:
+            os.rename(temp, os.path.join(path, EVENT_SEGMENT_NAME.format(first_id, last_id)))
+        else:
+            os.remove(temp)
+
+        return count
+
+    def get_pages(self, _topic, _start='-', _count=1000):
+        """
+        Walk the archived entries of a topic page by page.
+
+        :param _topic: The event topic.
+        :param _start: The first entry ID, prefix with '(' to exclude it, defaults to the beginning.
+        :param _count: The maximum number of entries per page.
+        :return: A generator of lists of event entries.
+        """
+        exclusive = _start.startswith('(')
+        start = (-1, -1) if _start == '-' else parse_id(_start.lstrip('('))
+
+        page = []
+        for first_id, last_id, name in self.segments(_topic):
+            if parse_id(last_id) < start:
+                continue
+            with gzip.open(name, 'rt') as f:
+                for line in f:
+                    entry_id, entry = json.loads(line)
+                    key = parse_id(entry_id)
+                    if key < start or exclusive and key == start:
+                        continue
+                    page.append((entry_id, entry))
+                    if len(page) == _count:
+                        yield page
+                        page = []
+
+        if page:
+            yield page
+
+    def get_range(self, _topic, _start='-', _end='+', _count=None, _reverse=False):
+        """
+        Get a range of archived entries of a topic.
+
+        :param _topic: The event topic.
+        :param _start: The first entry ID, prefix with '(' to exclude it, defaults to the beginning.
+        :param _end: The last entry ID, prefix with '(' to exclude it, defaults to the end.
+        :param _count: Optional maximum number of entries.
+        :param _reverse: Boolean if the entries are returned newest first, the count then applies from the end.
+        :return: A list of event entries.
+        """
+        end, exclusive = parse_bound(_end, float('inf'))
+        entries = itertools.takewhile(
+            lambda entry: parse_id(entry[0]) < end or not exclusive and parse_id(entry[0]) == end,
+            (entry for entries in self.get_pages(_topic, _start) for entry in entries)
+        )
+        if _reverse:
+            return list(collections.deque(entries, maxlen=_count))[::-1]
+
+        return list(itertools.islice(entries, _count))
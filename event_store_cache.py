@@ -0,0 +1,105 @@
+import threading
+from collections import OrderedDict
+
+EVENT_CACHE_BUDGET = 64 * 1024 * 1024
+
+
+class CachedTopic(object):
+    """
+    Cached Topic class, the notifications of a topic up to its last seen entry ID.
+    """
+
+    def __init__(self, _last_id, _notifications, _size):
+        """
+        :param _last_id: The ID of the last cached entry.
+        :param _notifications: A list with the notifications of all cached entries.
+        :param _size: The size of the notifications in bytes.
+        """
+        self.last_id = _last_id
+        self.notifications = _notifications
+        self.size = _size
+
+
+class HistoryCache(object):
+    """
+    History Cache class, keeps the notifications of recently read topics, so a read only has to fetch
+    the entries added since. Whole topics are evicted, least recently read first, to stay within the budget.
+    The cache does not fetch itself, so it serves the sync and async servers alike:
+
+        last_id, notifications = cache.lookup(topic)
+        entries = core.get(topic) if last_id is None else core.get_range(topic, '(' + last_id)
+        notifications = cache.extend(topic, last_id, notifications, [create_notification(...) for ... in entries])
+    """
+
+    def __init__(self, _budget=EVENT_CACHE_BUDGET):
+        """
+        :param _budget: The maximum size of all cached notifications in bytes.
+        """
+        self.budget = _budget
+        self.size = 0
+        self.topics = OrderedDict()
+        self.lock = threading.Lock()
+
+    def lookup(self, _topic):
+        """
+        Look up a topic and mark it as recently read.
+
+        :param _topic: The event topic.
+        :return: A tuple with the ID of the last cached entry and the notifications, (None, []) if not cached.
+        """
+        with self.lock:
+            cached = self.topics.get(_topic)
+            if cached is None:
+                return None, []
+            self.topics.move_to_end(_topic)
+
+            return cached.last_id, cached.notifications
+
+    def extend(self, _topic, _last_id, _cached, _notifications):
+        """
+        Append the notifications of the entries read after a lookup.
+
+        :param _topic: The event topic.
+        :param _last_id: The entry ID returned by the lookup.
+        :param _cached: The notifications returned by the lookup.
+        :param _notifications: A list with the notifications of the entries after the lookup.
+        :return: A list with all notifications of the topic.
+        """
+        if not _notifications:
+            return _cached
+
+        notifications = _cached + _notifications
+        with self.lock:
+            cached = self.topics.get(_topic)
+            # extended, evicted or invalidated meanwhile, answer from the lookup but leave the cache alone
+            if (cached.last_id if cached else None) != _last_id:
+                return notifications
+
+            size = sum(notification.ByteSize() for notification in _notifications)
+            self.topics[_topic] = CachedTopic(
+                notifications[-1].entry_id, notifications, (cached.size if cached else 0) + size
+            )
+            self.topics.move_to_end(_topic)
+            self.size += size
+            self.evict()
+
+        return notifications
+
+    def invalidate(self, _topic):
+        """
+        Drop a topic, e.g. after its stream was trimmed.
+
+        :param _topic: The event topic.
+        """
+        with self.lock:
+            cached = self.topics.pop(_topic, None)
+            if cached:
+                self.size -= cached.size
+
+    def evict(self):
+        """
+        Evict the least recently read topics until the cache fits into its budget.
+        """
+        while self.size > self.budget and self.topics:
+            _, cached = self.topics.popitem(last=False)
+            self.size -= cached.size
@@ -1,16 +1,26 @@
 import json
 import logging
 import os
+import queue
 import threading
+import time
 import uuid
+from concurrent.futures import Future
 
 import grpc
 
-from event_store_pb2 import PublishRequest, SubscribeRequest, UnsubscribeRequest, GetRequest
+from event_store_codec import decompress
+
+from event_store_pb2 import Event, PublishRequest, PublishBatchRequest, PublishMultiRequest, SubscribeRequest, Filter, \
+    UnsubscribeRequest, GetRequest, QueryRequest, AckRequest
 from event_store_pb2_grpc import EventStoreStub
 
 EVENT_STORE_HOSTNAME = os.getenv('EVENT_STORE_HOSTNAME', 'localhost')
 EVENT_STORE_PORTNR = os.getenv('EVENT_STORE_PORTNR', '50051')
+EVENT_STORE_BATCH_INTERVAL = int(os.getenv('EVENT_STORE_BATCH_INTERVAL', '10'))
+EVENT_STORE_WORKERS = int(os.getenv('EVENT_STORE_WORKERS', '8'))
+EVENT_STORE_QUEUE_SIZE = int(os.getenv('EVENT_STORE_QUEUE_SIZE', '100'))
+EVENT_STORE_RECONNECT_INTERVAL = int(os.getenv('EVENT_STORE_RECONNECT_INTERVAL', '1'))
 
 
 def create_event(_action, _data):
@@ -28,50 +38,237 @@ def create_event(_action, _data):
     }
 
 
+def entity_key(_notification):
+    """
+    Get the partition key of a notification, i.e. the entity ID inside the event data.
+
+    :param _notification: The notification.
+    :return: The entity ID, or the event ID if there is none.
+    """
+    try:
+        return json.loads(_notification.event.event_data).get('entity_id') or _notification.event.event_id
+    except (ValueError, AttributeError):
+        return _notification.event.event_id
+
+
+def decode_notification(_notification):
+    """
+    Decompress the payload of a notification in place.
+
+    :param _notification: The notification.
+    :return: The notification.
+    """
+    event = _notification.event
+    if event.event_codec:
+        event.event_data = decompress(event.event_data, event.event_codec)
+        event.event_codec = ''
+
+    return _notification
+
+
+def create_subscription(_topics, _group=None, _ack=False, _start=None, _last_ids=None, _filter=None,
+                        _subscription_id=None):
+    """
+    Create a subscribe request.
+
+    :param _topics: A list of event topics.
+    :param _group: Optional group name.
+    :param _ack: Boolean if group events are acknowledged.
+    :param _start: Optional start position, either an entry ID to start after, a timestamp in s or '-' for the
+        beginning, defaults to new events only.
+    :param _last_ids: Optional dict mapping event topics to the last entry IDs seen, to resume after.
+    :param _filter: Optional dict with a list of 'event_actions' and a dict 'data_equals' of event data values.
+    :param _subscription_id: Optional subscription ID to unsubscribe with, generated by the server if missing.
+    :return: The subscribe request.
+    """
+    start_ids = dict(_last_ids or {})
+    if isinstance(_start, str) and _start != '-':
+        start_ids = dict({topic: _start for topic in _topics}, **start_ids)
+
+    return SubscribeRequest(
+        event_topics=_topics,
+        group_name=_group,
+        ack=_ack,
+        start_ids={topic: entry_id for topic, entry_id in start_ids.items() if topic in _topics},
+        start_ts=_start if isinstance(_start, (int, float)) else None,
+        from_beginning=_start == '-',
+        filter=Filter(**_filter) if _filter else None,
+        subscription_id=_subscription_id,
+        typed=True
+    )
+
+
+def create_query(_topic, _start=None, _end=None, _count=None, _reverse=False):
+    """
+    Create a query request.
+
+    :param _topic: The event topic.
+    :param _start: Optional first entry ID, prefix with '(' to exclude it, or a timestamp in s.
+    :param _end: Optional last entry ID, prefix with '(' to exclude it, or a timestamp in s.
+    :param _count: Optional maximum number of events.
+    :param _reverse: Boolean if the events are returned newest first.
+    :return: The query request.
+    """
+    return QueryRequest(
+        event_topic=_topic,
+        start_id=_start if isinstance(_start, str) else None,
+        end_id=_end if isinstance(_end, str) else None,
+        start_ts=_start if isinstance(_start, (int, float)) else None,
+        end_ts=_end if isinstance(_end, (int, float)) else None,
+        count=_count,
+        reverse=_reverse
+    )
+
+
+def create_message(_info):
+    """
+    Create a typed event message.
+
+    :param _info: A dict with the event information.
+    :return: The event message.
+    """
+    return Event(
+        event_id=_info['event_id'],
+        event_action=_info['event_action'],
+        event_data=_info['event_data'].encode()
+    )
+
+
 class EventStoreClient(object):
     """
     Event Store Client class.
     """
 
-    def __init__(self):
+    def __init__(self, _batch_size=0, _batch_interval=EVENT_STORE_BATCH_INTERVAL):
+        """
+        :param _batch_size: Optional number of events to buffer before publishing them as a batch, this opts in to
+            auto-batching, publish then returns futures. Defaults to 0, i.e. no auto-batching.
+        :param _batch_interval: The time in ms after which a non-full batch is published.
+        """
         host, port = EVENT_STORE_HOSTNAME, EVENT_STORE_PORTNR
         self.channel = grpc.insecure_channel('{}:{}'.format(host, port))
         self.stub = EventStoreStub(self.channel)
         self.subscribers = {}
+        self.publisher = None
+
+        if _batch_size:
+            self.publisher = Publisher(self.stub, _batch_size, _batch_interval)
+            self.publisher.start()
 
     def __del__(self):
+        if self.publisher:
+            self.publisher.stop()
         self.channel.close()
 
-    def publish(self, _topic, _info):
+    def publish(self, _topic, _info, _expected_id=None):
         """
         Publish an event.
 
         :param _topic: The event topic.
         :param _info: A dict with the event information.
-        :return: The entry ID.
+        :param _expected_id: Optional entry ID the stream is expected to end at, '0-0' for an empty stream.
+            Otherwise the event is not added and a grpc.RpcError with status ABORTED is raised.
+        :return: The entry ID, or a future of the entry ID if auto-batching is enabled and no entry ID is expected.
         """
+        if self.publisher and not _expected_id:
+            return self.publisher.put(_topic, _info)
+
         response = self.stub.publish(PublishRequest(
             event_topic=_topic,
-            event_info=json.dumps(_info)
+            event=create_message(_info),
+            expected_id=_expected_id
         ))
 
         return response.entry_id
 
-    def subscribe(self, _topic, _handler, _group=None):
+    def publish_many(self, _topic, _infos, _expected_id=None):
+        """
+        Publish several events at once.
+
+        :param _topic: The event topic.
+        :param _infos: A list of dicts with the event information.
+        :param _expected_id: Optional entry ID the stream is expected to end at, '0-0' for an empty stream.
+            Otherwise none of the events are added and a grpc.RpcError with status ABORTED is raised.
+        :return: A list with the entry IDs, in the same order as the events.
+        """
+        response = self.stub.publish_batch(PublishBatchRequest(
+            event_topic=_topic,
+            events=[create_message(info) for info in _infos],
+            expected_id=_expected_id
+        ))
+
+        return list(response.entry_ids)
+
+    def publish_multi(self, _infos, _expected_ids=None):
+        """
+        Publish events of several topics atomically, either all of them are added or none.
+
+        :param _infos: A dict mapping event topics to lists of dicts with the event information.
+        :param _expected_ids: Optional dict mapping event topics to the entry IDs their streams are expected to end at.
+            Otherwise none of the events are added and a grpc.RpcError with status ABORTED is raised.
+        :return: A dict mapping event topics to lists with the entry IDs, in the same order as the events.
+        """
+        expected_ids = _expected_ids or {}
+        response = self.stub.publish_multi(PublishMultiRequest(batches=[
+            PublishBatchRequest(
+                event_topic=topic,
+                events=[create_message(info) for info in infos],
+                expected_id=expected_ids.get(topic)
+            ) for topic, infos in _infos.items()
+        ]))
+
+        return {topic: list(batch.entry_ids) for topic, batch in zip(_infos, response.batches)}
+
+    def flush(self):
+        """
+        Publish all events buffered by auto-batching.
+        """
+        if self.publisher:
+            self.publisher.flush()
+
+    def subscribe(self, _topic, _handler, _group=None, _ack=False, _dispatcher=None, _start=None, _filter=None):
         """
         Subscribe to an event topic.
 
         :param _topic: The event topic.
         :param _handler: The event handler.
         :param _group: Optional group name.
+        :param _ack: Boolean if group events are acknowledged after being handled, i.e. at-least-once delivery.
+        :param _dispatcher: Optional dispatcher to run the handlers in parallel, instead of on the stream thread.
+        :param _start: Optional start position to replay from, either an entry ID to start after, a timestamp in s
+            or '-' for the beginning, defaults to new events only. Not applicable to groups.
+        :param _filter: Optional dict with a list of 'event_actions' and a dict 'data_equals' of event data values,
+            only matching events are sent.
+        :return: Success.
+        """
+        return self.subscribe_many({_topic: _handler}, _group, _ack, _dispatcher, _start, _filter)
+
+    def subscribe_many(self, _handlers, _group=None, _ack=False, _dispatcher=None, _start=None, _filter=None):
+        """
+        Subscribe to several event topics over a single stream, dispatched by one thread.
+
+        :param _handlers: A dict mapping each event topic to its event handler.
+        :param _group: Optional group name.
+        :param _ack: Boolean if group events are acknowledged after being handled, i.e. at-least-once delivery.
+        :param _dispatcher: Optional dispatcher to run the handlers in parallel, instead of on the stream thread.
+        :param _start: Optional start position to replay from, either an entry ID to start after, a timestamp in s
+            or '-' for the beginning, defaults to new events only. Not applicable to groups.
+        :param _filter: Optional dict with a list of 'event_actions' and a dict 'data_equals' of event data values,
+            only matching events are sent. Handlers added to topics already subscribed to share their filter.
         :return: Success.
         """
-        if _topic in self.subscribers:
-            self.subscribers[_topic].add_handler(_handler)
-        else:
-            subscriber = Subscriber(_topic, _handler, self.stub, _group)
+        handlers = {}
+        for topic, handler in _handlers.items():
+            if topic in self.subscribers:
+                self.subscribers[topic].add_handler(topic, handler)
+            else:
+                handlers[topic] = handler
+
+        if handlers:
+            subscriber = Subscriber(handlers, self.stub, _group, _ack, _dispatcher, _start, _filter)
             subscriber.start()
-            self.subscribers[_topic] = subscriber
+            for topic in handlers:
+                self.subscribers[topic] = subscriber
 
         return True
 
@@ -87,11 +284,16 @@ class EventStoreClient(object):
         if not subscriber:
             return False
 
-        response = self.stub.unsubscribe(UnsubscribeRequest(event_topic=_topic))
+        subscriber.rem_handler(_topic, _handler)
+        if subscriber.handlers[_topic]:
+            return True
 
-        subscriber.rem_handler(_handler)
-        if not subscriber:
-            del self.subscribers[_topic]
+        response = self.stub.unsubscribe(
+            UnsubscribeRequest(event_topic=_topic, subscription_id=subscriber.subscription_id)
+        )
+
+        del subscriber.handlers[_topic]
+        del self.subscribers[_topic]
 
         return response.success
 
@@ -102,9 +304,54 @@ class EventStoreClient(object):
         :param _topic: The event topic, i.e name of event stream.
         :return: A list with entities.
         """
-        response = self.stub.get(GetRequest(event_topic=_topic))
+        response = self.stub.get(GetRequest(event_topic=_topic, typed=True))
+
+        return [
+            [notification.entry_id, {
+                'event_id': notification.event.event_id,
+                'event_action': notification.event.event_action,
+                'event_data': decompress(notification.event.event_data, notification.event.event_codec).decode()
+            }] for notification in response.notifications
+        ] or None
+
+    def get_state(self, _topic):
+        """
+        Get the current state of the entities of a topic, folded on the server.
+
+        :param _topic: The event topic, i.e name of event stream.
+        :return: A dict mapping entity IDs to entity properties.
+        """
+        response = self.stub.get_state(GetRequest(event_topic=_topic))
+
+        return {entity.entity_id: json.loads(entity.entity_data) for entity in response.entities}
+
+    def query(self, _topic, _start=None, _end=None, _count=None, _reverse=False):
+        """
+        Get a range of events for a topic, e.g. the last 50 with _count=50 and _reverse=True,
+        or those of the last hour with _start=time.time() - 3600.
 
-        return json.loads(response.events) if response.events else None
+        :param _topic: The event topic, i.e name of event stream.
+        :param _start: Optional first entry ID, prefix with '(' to exclude it, or a timestamp in s.
+        :param _end: Optional last entry ID, prefix with '(' to exclude it, or a timestamp in s.
+        :param _count: Optional maximum number of events.
+        :param _reverse: Boolean if the events are returned newest first.
+        :return: A list of notifications.
+        """
+        response = self.stub.query(create_query(_topic, _start, _end, _count, _reverse))
+
+        return [decode_notification(notification) for notification in response.notifications]
+
+    def get_iter(self, _topic, _page_size=None):
+        """
+        Lazily get events for a topic, the server streams them in pages.
+
+        :param _topic: The event topic, i.e name of event stream.
+        :param _page_size: Optional number of events per page.
+        :return: A generator of notifications.
+        """
+        for page in self.stub.get_pages(GetRequest(event_topic=_topic, page_size=_page_size)):
+            for notification in page.notifications:
+                yield decode_notification(notification)
 
 
 class Subscriber(threading.Thread):
@@ -112,56 +359,262 @@ class Subscriber(threading.Thread):
     Subscriber Thread class.
     """
 
-    def __init__(self, _topic, _handler, _stub, _group=None):
+    def __init__(self, _handlers, _stub, _group=None, _ack=False, _dispatcher=None, _start=None, _filter=None):
         """
-        :param _topic: The topic to subscirbe to.
-        :param _handler: A handler function.
+        :param _handlers: A dict mapping each topic to subscribe to to a handler function.
+        :param _stub: The stub to subscribe with.
         :param _group: The name of the subscriber.
+        :param _ack: Boolean if events are acknowledged once all handlers succeeded.
+        :param _dispatcher: Optional dispatcher to call the handlers with.
+        :param _start: Optional start position to replay from.
+        :param _filter: Optional filter of the events to receive.
         """
         super(Subscriber, self).__init__()
         self._running = False
-        self.handlers = [_handler]
-        self.topic = _topic
+        self.handlers = {topic: [handler] for topic, handler in _handlers.items()}
         self.stub = _stub
         self.group = _group
+        self.ack = _ack
+        self.acks = queue.Queue()
+        self.dispatcher = _dispatcher
+        self.start_position = _start
+        self.filter = _filter
+        self.last_ids = {}
+        self.subscribed = None
+        self.subscription_id = None
 
     def __len__(self):
-        return len(self.handlers)
+        return sum(len(handlers) for handlers in self.handlers.values())
 
     def run(self):
         """
-        Poll the event stream and call each handler with each entry returned.
+        Poll the event streams and call each handler of a topic with each entry returned.
+        If the stream breaks, resubscribe after the last entries seen, or from the time of subscribing for topics
+        without any.
         """
         if self._running:
             return
 
         self._running = True
-        for item in self.stub.subscribe(
-                SubscribeRequest(event_topic=self.topic, group_name=self.group)):
-            for handler in self.handlers:
-                try:
-                    handler(item)
-                except Exception as e:
-                    logging.error(
-                        'error calling handler function ({}) for {}.{}: {}'.format(
-                            e.__class__.__name__, self.topic, handler.__name__, str(e)
-                        )
+        while self._running:
+            try:
+                self.consume()
+                self._running = False
+            except grpc.RpcError as e:
+                logging.error('error subscribing ({}) to {}: {}'.format(
+                    e.__class__.__name__, ', '.join(self.handlers), str(e))
+                )
+                time.sleep(EVENT_STORE_RECONNECT_INTERVAL)
+                self._running = bool(self)
+
+    def consume(self):
+        """
+        Consume one subscription stream until it ends.
+        """
+        if self.ack:
+            acked = self.stub.ack.future(iter(self.acks.get, None))
+
+        # on a resubscribe, topics without entries seen yet resume from the time of the first subscription
+        start = self.start_position
+        if start is None and self.subscribed:
+            start = self.subscribed
+        self.subscribed = self.subscribed or time.time()
+
+        try:
+            # a new ID per stream, the server may not have released the ID of a broken one yet
+            self.subscription_id = str(uuid.uuid4())
+            topics = list(self.handlers)
+            for item in self.stub.subscribe(create_subscription(
+                    topics, self.group, self.ack, start, self.last_ids, self.filter, self.subscription_id)):
+                decode_notification(item)
+                if not self.group:
+                    self.last_ids[item.event_topic] = item.entry_id
+                if self.dispatcher:
+                    self.dispatcher.dispatch(item, self.handle)
+                else:
+                    self.handle(item)
+        finally:
+            if self.ack:
+                self.acks.put(None)
+                acked.exception()
+
+    def handle(self, _item):
+        """
+        Call each handler of the topic with an entry, acknowledge it if all of them succeeded.
+
+        :param _item: The notification.
+        """
+        success = True
+        for handler in self.handlers.get(_item.event_topic, []):
+            try:
+                handler(_item)
+            except Exception as e:
+                success = False
+                logging.error(
+                    'error calling handler function ({}) for {}.{}: {}'.format(
+                        e.__class__.__name__, _item.event_topic, handler.__name__, str(e)
                     )
+                )
 
-        self._running = False
+        if self.ack and success:
+            self.acks.put(AckRequest(
+                event_topic=_item.event_topic, group_name=self.group, entry_ids=[_item.entry_id]
+            ))
 
-    def add_handler(self, _handler):
+    def add_handler(self, _topic, _handler):
         """
         Add an event handler.
 
+        :param _topic: The topic of the handler.
         :param _handler: The event handler function.
         """
-        self.handlers.append(_handler)
+        self.handlers[_topic].append(_handler)
 
-    def rem_handler(self, _handler):
+    def rem_handler(self, _topic, _handler):
         """
         Remove an event handler.
 
+        :param _topic: The topic of the handler.
         :param _handler: The event handler function.
         """
-        self.handlers.remove(_handler)
+        self.handlers[_topic].remove(_handler)
+
+
+class Dispatcher(object):
+    """
+    Dispatcher class, calls handlers on a bounded pool of worker threads. Notifications with the same
+    partition key always go to the same worker, so they are handled in order.
+    """
+
+    def __init__(self, _workers=EVENT_STORE_WORKERS, _size=EVENT_STORE_QUEUE_SIZE, _key=entity_key):
+        """
+        :param _workers: The number of worker threads.
+        :param _size: The maximum number of queued notifications per worker.
+        :param _key: A function returning the partition key of a notification.
+        """
+        self.key = _key
+        self.queues = [queue.Queue(_size) for _ in range(_workers)]
+        self.workers = [threading.Thread(target=self.work, args=(q,), daemon=True) for q in self.queues]
+        for worker in self.workers:
+            worker.start()
+
+    def dispatch(self, _item, _handle):
+        """
+        Queue a notification for the worker of its partition, this blocks while the queue is full.
+
+        :param _item: The notification.
+        :param _handle: The function to handle the notification with.
+        """
+        self.queues[hash(self.key(_item)) % len(self.queues)].put((_item, _handle))
+
+    def work(self, _queue):
+        """
+        Handle the queued notifications of a partition one after another.
+
+        :param _queue: The queue of the worker.
+        """
+        for item, handle in iter(_queue.get, None):
+            handle(item)
+
+    def stop(self):
+        """
+        Stop the workers once they have handled their queued notifications.
+        """
+        for q in self.queues:
+            q.put(None)
+
+
+class Publisher(threading.Thread):
+    """
+    Publisher Thread class, buffers events and publishes them in batches.
+    """
+
+    def __init__(self, _stub, _size, _interval):
+        """
+        :param _stub: The stub to publish with.
+        :param _size: The number of events after which a batch is published.
+        :param _interval: The time in ms after which a non-full batch is published.
+        """
+        super(Publisher, self).__init__(daemon=True)
+        self._running = False
+        self._cond = threading.Condition()
+        self.stub = _stub
+        self.size = _size
+        self.interval = _interval / 1000
+        self.batch = []
+        self.since = None
+
+    def run(self):
+        """
+        Publish the buffered events whenever the batch is full or the interval has elapsed.
+        """
+        self._running = True
+        while self._running:
+            with self._cond:
+                if not self.batch:
+                    # the first event starts the interval, it is waited out before publishing
+                    self._cond.wait_for(lambda: not self._running or self.batch)
+                    continue
+                self._cond.wait_for(
+                    lambda: not self._running or len(self.batch) >= self.size,
+                    self.since + self.interval - time.time()
+                )
+            self.flush()
+
+    def stop(self):
+        """
+        Publish the remaining events and stop the thread.
+        """
+        with self._cond:
+            self._running = False
+            self._cond.notify()
+        self.flush()
+
+    def put(self, _topic, _info):
+        """
+        Buffer an event.
+
+        :param _topic: The event topic.
+        :param _info: A dict with the event information.
+        :return: A future of the entry ID.
+        """
+        future = Future()
+        with self._cond:
+            if not self.batch:
+                self.since = time.time()
+            self.batch.append((_topic, _info, future))
+            # the first event starts the interval, a full batch ends it
+            if len(self.batch) == 1 or len(self.batch) >= self.size:
+                self._cond.notify()
+
+        return future
+
+    def flush(self):
+        """
+        Publish the buffered events, one batch per topic.
+        """
+        with self._cond:
+            batch, self.batch = self.batch, []
+
+        topics = {}
+        for topic, info, future in batch:
+            infos, futures = topics.setdefault(topic, ([], []))
+            infos.append(info)
+            futures.append(future)
+
+        for topic, (infos, futures) in topics.items():
+            try:
+                response = self.stub.publish_batch(PublishBatchRequest(
+                    event_topic=topic,
+                    events=[create_message(info) for info in infos]
+                ))
+            except Exception as e:
+                logging.error('error publishing batch ({}) for {}: {}'.format(
+                    e.__class__.__name__, topic, str(e))
+                )
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            for future, entry_id in zip(futures, response.entry_ids):
+                future.set_result(entry_id)
@@ -0,0 +1,256 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import time
+
+import grpc
+
+from event_store_client import create_message, create_subscription, create_query, decode_notification, \
+    EVENT_STORE_HOSTNAME, EVENT_STORE_PORTNR, EVENT_STORE_RECONNECT_INTERVAL
+from event_store_codec import decompress
+
+from event_store_pb2 import PublishRequest, PublishBatchRequest, PublishMultiRequest, GetRequest, AckRequest
+from event_store_pb2_grpc import EventStoreStub
+
+EVENT_STORE_CHANNELS = int(os.getenv('EVENT_STORE_CHANNELS', '4'))
+
+
+class ChannelPool(object):
+    """
+    Channel Pool class, shares a fixed number of channels per target between all clients of a process.
+    Channels are bound to the event loop which created them, so each event loop gets channels of its own.
+    """
+
+    def __init__(self, _size=EVENT_STORE_CHANNELS):
+        """
+        :param _size: The number of channels per target.
+        """
+        self.size = _size
+        self.channels = {}
+        self.cycles = {}
+
+    def get(self, _target):
+        """
+        Get a channel of the current event loop, the channels of a target are handed out round-robin.
+
+        :param _target: The server address.
+        :return: A channel.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = asyncio.get_event_loop()
+
+        # the channels of closed event loops are of no use anymore
+        for key in [key for key in self.channels if key[0].is_closed()]:
+            del self.channels[key], self.cycles[key]
+
+        key = (loop, _target)
+        if key not in self.channels:
+            self.channels[key] = [grpc.aio.insecure_channel(_target) for _ in range(self.size)]
+            self.cycles[key] = itertools.cycle(self.channels[key])
+
+        return next(self.cycles[key])
+
+    async def close(self):
+        """
+        Close all channels of the current event loop.
+        """
+        loop = asyncio.get_running_loop()
+        for key in [key for key in self.channels if key[0] is loop]:
+            channels = self.channels.pop(key)
+            del self.cycles[key]
+            for channel in channels:
+                await channel.close()
+
+
+CHANNEL_POOL = ChannelPool()
+
+
+class AsyncEventStoreClient(object):
+    """
+    Async Event Store Client class.
+    """
+
+    def __init__(self, _pool=CHANNEL_POOL):
+        """
+        :param _pool: The channel pool to take the channel from, defaults to the pool shared by the process.
+        """
+        host, port = EVENT_STORE_HOSTNAME, EVENT_STORE_PORTNR
+        self.channel = _pool.get('{}:{}'.format(host, port))
+        self.stub = EventStoreStub(self.channel)
+
+    async def publish(self, _topic, _info, _expected_id=None):
+        """
+        Publish an event.
+
+        :param _topic: The event topic.
+        :param _info: A dict with the event information.
+        :param _expected_id: Optional entry ID the stream is expected to end at, '0-0' for an empty stream.
+            Otherwise the event is not added and a grpc.aio.AioRpcError with status ABORTED is raised.
+        :return: The entry ID.
+        """
+        response = await self.stub.publish(PublishRequest(
+            event_topic=_topic,
+            event=create_message(_info),
+            expected_id=_expected_id
+        ))
+
+        return response.entry_id
+
+    async def publish_many(self, _topic, _infos, _expected_id=None):
+        """
+        Publish several events at once.
+
+        :param _topic: The event topic.
+        :param _infos: A list of dicts with the event information.
+        :param _expected_id: Optional entry ID the stream is expected to end at, '0-0' for an empty stream.
+            Otherwise none of the events are added and a grpc.aio.AioRpcError with status ABORTED is raised.
+        :return: A list with the entry IDs, in the same order as the events.
+        """
+        response = await self.stub.publish_batch(PublishBatchRequest(
+            event_topic=_topic,
+            events=[create_message(info) for info in _infos],
+            expected_id=_expected_id
+        ))
+
+        return list(response.entry_ids)
+
+    async def publish_multi(self, _infos, _expected_ids=None):
+        """
+        Publish events of several topics atomically, either all of them are added or none.
+
+        :param _infos: A dict mapping event topics to lists of dicts with the event information.
+        :param _expected_ids: Optional dict mapping event topics to the entry IDs their streams are expected to end at.
+            Otherwise none of the events are added and a grpc.aio.AioRpcError with status ABORTED is raised.
+        :return: A dict mapping event topics to lists with the entry IDs, in the same order as the events.
+        """
+        expected_ids = _expected_ids or {}
+        response = await self.stub.publish_multi(PublishMultiRequest(batches=[
+            PublishBatchRequest(
+                event_topic=topic,
+                events=[create_message(info) for info in infos],
+                expected_id=expected_ids.get(topic)
+            ) for topic, infos in _infos.items()
+        ]))
+
+        return {topic: list(batch.entry_ids) for topic, batch in zip(_infos, response.batches)}
+
+    async def subscribe(self, _topics, _group=None, _ack=False, _start=None, _filter=None):
+        """
+        Subscribe to one or several event topics, use with async for. If the stream breaks,
+        it is resubscribed after the last entries seen, or from the time of subscribing for topics without any.
+
+        :param _topics: The event topic or a list of event topics.
+        :param _group: Optional group name.
+        :param _ack: Boolean if group events are acknowledged once the loop body for them has completed.
+        :param _start: Optional start position to replay from, either an entry ID to start after, a timestamp in s
+            or '-' for the beginning, defaults to new events only. Not applicable to groups.
+        :param _filter: Optional dict with a list of 'event_actions' and a dict 'data_equals' of event data values,
+            only matching events are sent.
+        :return: An async generator of notifications.
+        """
+        topics = [_topics] if isinstance(_topics, str) else _topics
+        last_ids = {}
+        start = _start
+        subscribed = time.time()
+        while True:
+            call = self.stub.subscribe(create_subscription(topics, _group, _ack, start, last_ids, _filter))
+            acks = asyncio.Queue()
+            acked = self.stub.ack(iter_queue(acks)) if _ack else None
+            try:
+                async for item in call:
+                    if not _group:
+                        last_ids[item.event_topic] = item.entry_id
+                    yield decode_notification(item)
+                    if _ack:
+                        acks.put_nowait(AckRequest(
+                            event_topic=item.event_topic, group_name=_group, entry_ids=[item.entry_id]
+                        ))
+                return
+            except grpc.aio.AioRpcError as e:
+                logging.error('error subscribing ({}) to {}: {}'.format(
+                    e.__class__.__name__, ', '.join(topics), str(e))
+                )
+            finally:
+                call.cancel()
+                if acked:
+                    acks.put_nowait(None)
+                    await asyncio.gather(acked, return_exceptions=True)
+
+            await asyncio.sleep(EVENT_STORE_RECONNECT_INTERVAL)
+            # topics without entries seen yet resume from the time of the first subscription
+            if start is None:
+                start = subscribed
+
+    async def get(self, _topic):
+        """
+        Get events for a topic.
+
+        :param _topic: The event topic, i.e name of event stream.
+        :return: A list with entities.
+        """
+        response = await self.stub.get(GetRequest(event_topic=_topic, typed=True))
+
+        return [
+            [notification.entry_id, {
+                'event_id': notification.event.event_id,
+                'event_action': notification.event.event_action,
+                'event_data': decompress(notification.event.event_data, notification.event.event_codec).decode()
+            }] for notification in response.notifications
+        ] or None
+
+    async def get_state(self, _topic):
+        """
+        Get the current state of the entities of a topic, folded on the server.
+
+        :param _topic: The event topic, i.e name of event stream.
+        :return: A dict mapping entity IDs to entity properties.
+        """
+        response = await self.stub.get_state(GetRequest(event_topic=_topic))
+
+        return {entity.entity_id: json.loads(entity.entity_data) for entity in response.entities}
+
+    async def query(self, _topic, _start=None, _end=None, _count=None, _reverse=False):
+        """
+        Get a range of events for a topic, e.g. the last 50 with _count=50 and _reverse=True,
+        or those of the last hour with _start=time.time() - 3600.
+
+        :param _topic: The event topic, i.e name of event stream.
+        :param _start: Optional first entry ID, prefix with '(' to exclude it, or a timestamp in s.
+        :param _end: Optional last entry ID, prefix with '(' to exclude it, or a timestamp in s.
+        :param _count: Optional maximum number of events.
+        :param _reverse: Boolean if the events are returned newest first.
+        :return: A list of notifications.
+        """
+        response = await self.stub.query(create_query(_topic, _start, _end, _count, _reverse))
+
+        return [decode_notification(notification) for notification in response.notifications]
+
+    async def get_iter(self, _topic, _page_size=None):
+        """
+        Lazily get events for a topic, the server streams them in pages.
+
+        :param _topic: The event topic, i.e name of event stream.
+        :param _page_size: Optional number of events per page.
+        :return: An async generator of notifications.
+        """
+        async for page in self.stub.get_pages(GetRequest(event_topic=_topic, page_size=_page_size)):
+            for notification in page.notifications:
+                yield decode_notification(notification)
+
+
+async def iter_queue(_queue):
+    """
+    Iterate a queue until None is put into it.
+
+    :param _queue: The queue.
+    :return: An async generator of the queued items.
+    """
+    while True:
+        item = await _queue.get()
+        if item is None:
+            return
+        yield item
@@ -0,0 +1,82 @@
+import base64
+import zlib
+
+EVENT_CODEC_ZLIB = 'zlib'
+EVENT_CODEC_LEVEL = 6
+
+
+def parse_thresholds(_spec):
+    """
+    Parse compression thresholds, e.g. 'order:1024,*:4096' with topic and minimum payload size in bytes.
+
+    :param _spec: The compression threshold specification, '*' applies to all other topics.
+    :return: A dict mapping event topics to minimum payload sizes.
+    """
+    thresholds = {}
+    for threshold in filter(None, _spec.split(',')):
+        topic, size = threshold.strip().rsplit(':', 1)
+        thresholds[topic] = int(size)
+
+    return thresholds
+
+
+def compress_info(_info, _threshold):
+    """
+    Compress the payload of an event if it is large enough. As the streams store strings, the compressed
+    payload is base64 encoded and marked with its codec, so entries with and without compression can be mixed.
+    Payloads which do not get smaller this way, e.g. already compressed ones, are stored as they are.
+
+    :param _info: A dict with the event information, the payload either as bytes or string.
+    :param _threshold: The minimum payload size in bytes, None disables compression.
+    :return: A dict with the event information to store.
+    """
+    data = _info['event_data']
+    data = data if isinstance(data, bytes) else data.encode()
+    if _threshold is None or len(data) < _threshold:
+        return _info
+
+    encoded = base64.b64encode(zlib.compress(data, EVENT_CODEC_LEVEL)).decode()
+    if len(encoded) >= len(data):
+        return _info
+
+    return dict(_info, event_data=encoded, event_codec=EVENT_CODEC_ZLIB)
+
+
+def entry_data(_entry):
+    """
+    Get the payload of a stored entry as it is sent to clients, i.e. still compressed.
+
+    :param _entry: A dict with the event information.
+    :return: A tuple with the payload bytes and the codec, an empty string if not compressed.
+    """
+    codec = _entry.get('event_codec', '')
+    if codec:
+        return base64.b64decode(_entry['event_data']), codec
+
+    return _entry['event_data'].encode(), codec
+
+
+def decompress(_data, _codec):
+    """
+    Decompress a payload.
+
+    :param _data: The payload bytes.
+    :param _codec: The codec, an empty string if not compressed.
+    :return: The uncompressed payload bytes.
+    """
+    if not _codec:
+        return _data
+    if _codec == EVENT_CODEC_ZLIB:
+        return zlib.decompress(_data)
+
+    raise ValueError('unknown codec {}'.format(_codec))
+
+
+def entry_json(_entry):
+    """
+    Get the uncompressed payload of a stored entry.
+
+    :param _entry: A dict with the event information.
+    :return: The payload string.
+    """
+    return decompress(*entry_data(_entry)).decode()
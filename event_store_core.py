@@ -1,58 +1,709 @@
+import abc
+import json
 import time
 
 import redis
 
+from event_store_archive import parse_id, parse_bound
+from event_store_metrics import REDIS_LATENCY
+
 EVENT_STREAM_NAME = 'events:{}'
-EVENT_STREAM_ID = '{0:.6f}'
+EVENT_CLIENT_NAME = 'event_store:{}'
+EVENT_LEGACY_ID_BOUND = 100000000000
+EVENT_SNAPSHOT_NAME = 'snapshots:{}'
+EVENT_DEDUP_NAME = 'dedup:{}:{}'
+EVENT_PAGE_SIZE = 1000
+
+# adds batches of events to several streams, events whose event ID was seen within the window are not added again
+# and get the entry ID of the first one, a batch with an expected entry ID is only added if it is the last one,
+# unless all of its events are duplicates, all expectations are checked first so either all batches are added or none
+EVENT_ADD_SCRIPT = '''
+local window = ARGV[1]
+local batches = {}
+local i = 2
+while i <= #ARGV do
+  local batch = {stream = KEYS[tonumber(ARGV[i])], expected = ARGV[i + 1], events = {}}
+  local count = tonumber(ARGV[i + 2])
+  i = i + 3
+  for _ = 1, count do
+    local event = {key = tonumber(ARGV[i]), fields = {}}
+    for j = i + 2, i + 1 + tonumber(ARGV[i + 1]) * 2 do
+      event.fields[#event.fields + 1] = ARGV[j]
+    end
+    event.id = event.key > 0 and redis.call('GET', KEYS[event.key])
+    batch.events[#batch.events + 1] = event
+    i = i + 2 + #event.fields
+  end
+  batches[#batches + 1] = batch
+end
+
+for _, batch in ipairs(batches) do
+  if batch.expected ~= '' then
+    local retried = true
+    for _, event in ipairs(batch.events) do
+      retried = retried and event.id
+    end
+    if not retried then
+      local last = redis.call('XREVRANGE', batch.stream, '+', '-', 'COUNT', 1)
+      local last_id = last[1] and last[1][1] or '0-0'
+      if last_id ~= batch.expected then
+        return redis.error_reply('CONFLICT ' .. batch.stream .. ' ' .. last_id)
+      end
+    end
+  end
+end
+
+local result = {}
+for _, batch in ipairs(batches) do
+  local ids = {}
+  for _, event in ipairs(batch.events) do
+    -- read again, an earlier event may have had the same event ID
+    local id = event.key > 0 and redis.call('GET', KEYS[event.key])
+    if not id then
+      id = redis.call('XADD', batch.stream, '*', unpack(event.fields))
+      if event.key > 0 then
+        redis.call('SET', KEYS[event.key], id, 'PX', window)
+      end
+    end
+    ids[#ids + 1] = id
+  end
+  result[#result + 1] = ids
+end
+return result
+'''
+
+# deletes the consumers of a group without pending entries which are idle for at least the given time in ms, except
+# the given one, checked and deleted in one step so no entries can be delivered to a consumer in between,
+# XINFO is non-deterministic before Redis 7, so writes after it need effects replication
+EVENT_PRUNE_SCRIPT = '''
+if redis.replicate_commands then
+  redis.replicate_commands()
+end
+local deleted = 0
+for _, consumer in ipairs(redis.call('XINFO', 'CONSUMERS', KEYS[1], ARGV[1])) do
+  local info = {}
+  for i = 1, #consumer, 2 do
+    info[consumer[i]] = consumer[i + 1]
+  end
+  if info.name ~= ARGV[3] and info.pending == 0 and info.idle >= tonumber(ARGV[2]) then
+    redis.call('XGROUP', 'DELCONSUMER', KEYS[1], ARGV[1], info.name)
+    deleted = deleted + 1
+  end
+end
+return deleted
+'''
+
+# deletes a consumer of a group unless it has pending entries
+EVENT_DELETE_CONSUMER_SCRIPT = '''
+if redis.call('XPENDING', KEYS[1], ARGV[1], '-', '+', 1, ARGV[2])[1] then
+  return 0
+end
+redis.call('XGROUP', 'DELCONSUMER', KEYS[1], ARGV[1], ARGV[2])
+return 1
+'''
+
+
+class ConcurrencyError(Exception):
+    """
+    Concurrency Error class, raised if a stream moved on from the entry ID expected by an append.
+    """
+
+    def __init__(self, _topic, _expected_id, _last_id):
+        """
+        :param _topic: The event topic.
+        :param _expected_id: The expected last entry ID.
+        :param _last_id: The actual last entry ID.
+        """
+        super(ConcurrencyError, self).__init__(
+            'expected {} to end at {}, but it ends at {}'.format(_topic, _expected_id, _last_id)
+        )
+        self.topic = _topic
+        self.expected_id = _expected_id
+        self.last_id = _last_id
+
+
+def stream_topic(_stream_name):
+    """
+    Get the event topic of a stream.
+
+    :param _stream_name: The stream name.
+    :return: The event topic.
+    """
+    return _stream_name[len(EVENT_STREAM_NAME.format('')):]
+
+
+def ts_id(_ts):
+    """
+    Get the first entry ID for a timestamp.
+
+    :param _ts: The timestamp in s.
+    :return: The entry ID.
+    """
+    return '{}-0'.format(int(_ts * 1000))
+
+
+def legacy_id(_ts):
+    """
+    Get the first legacy entry ID, i.e. of seconds and microseconds, for a timestamp.
+
+    :param _ts: The timestamp in s.
+    :return: The entry ID.
+    """
+    return '{}-{}'.format(*divmod(int(_ts * 1000000), 1000000))
+
+
+def id_ts(_entry_id):
+    """
+    Get the timestamp of an entry ID.
+
+    :param _entry_id: The entry ID, either allocated by Redis or a legacy ID of seconds and microseconds.
+    :return: The timestamp in s.
+    """
+    ms, seq = parse_id(_entry_id)
+    if ms < EVENT_LEGACY_ID_BOUND:
+        return ms + seq / 1000000
 
+    return ms / 1000
 
-class EventStore(object):
+
+def script_args(_batches, _window):
+    """
+    Get the keys and arguments of the add script.
+
+    :param _batches: A list of tuples with event topic, list of dicts with the event information and expected entry ID.
+    :param _window: The deduplication window in s, 0 to disable.
+    :return: A tuple with the list of keys and the list of arguments.
+    """
+    keys, args = [], [int(_window * 1000)]
+    for topic, infos, expected_id in _batches:
+        keys.append(EVENT_STREAM_NAME.format(topic))
+        args.extend((len(keys), expected_id or '', len(infos)))
+        for info in infos:
+            if _window and info.get('event_id'):
+                keys.append(EVENT_DEDUP_NAME.format(topic, info['event_id']))
+                args.append(len(keys))
+            else:
+                args.append(0)
+            args.append(len(info))
+            for name, value in info.items():
+                args.extend((name, value))
+
+    return keys, args
+
+
+def conflict(_error, _batches):
+    """
+    Translate an error of the add script.
+
+    :param _error: The Redis error.
+    :param _batches: A list of tuples with event topic, list of dicts with the event information and expected entry ID.
+    :return: A concurrency error if an expected entry ID did not match, otherwise the Redis error.
     """
-    Event Store class.
+    message = str(_error)
+    if not message.startswith('CONFLICT '):
+        return _error
+
+    stream_name, _, last_id = message[len('CONFLICT '):].rpartition(' ')
+    topic = stream_topic(stream_name)
+    expected_id = next(expected_id for batch_topic, infos, expected_id in _batches if batch_topic == topic)
+
+    return ConcurrencyError(topic, expected_id, last_id)
+
+
+class Storage(abc.ABC):
+    """
+    Storage class, the interface of an event store engine.
     """
 
-    def __init__(self, host='localhost', port=6379):
+    archive = None
+
+    @abc.abstractmethod
+    def add(self, _topic, _info, _expected_id=None):
+        """
+        Add an event to the stream.
+
+        :param _topic: The event topic.
+        :param _info: A dict with the event information.
+        :param _expected_id: Optional entry ID the stream is expected to end at, '0-0' for an empty stream.
+        :return: The entry ID.
+        :raises ConcurrencyError: If the stream does not end at the expected entry ID.
+        """
+
+    def add_many(self, _topic, _infos, _expected_id=None):
+        """
+        Add several events to the stream. The expected entry ID is only checked before the first event,
+        engines override this to append atomically.
+
+        :param _topic: The event topic.
+        :param _infos: A list of dicts with the event information.
+        :param _expected_id: Optional entry ID the stream is expected to end at, '0-0' for an empty stream.
+        :return: A list with the entry IDs, in the same order as the events.
+        :raises ConcurrencyError: If the stream does not end at the expected entry ID.
+        """
+        return [self.add(_topic, info, None if i else _expected_id) for i, info in enumerate(_infos)]
+
+    @abc.abstractmethod
+    def add_topics(self, _batches):
+        """
+        Add batches of events to several streams atomically, either all of them are added or none.
+
+        :param _batches: A list of tuples with event topic, list of dicts with the event information and
+            optional entry ID the stream is expected to end at.
+        :return: A list with a list of entry IDs per batch, in the same order as the events.
+        :raises ConcurrencyError: If a stream does not end at its expected entry ID.
+        """
+
+    @abc.abstractmethod
+    def get(self, _topic):
+        """
+        Get all events for a topic, including archived ones.
+
+        :param _topic: The event topic.
+        :return: A list of event entries.
+        """
+
+    @abc.abstractmethod
+    def get_range(self, _topic, _start='-', _end='+', _count=None, _reverse=False):
+        """
+        Get a range of events for a topic.
+
+        :param _topic: The event topic.
+        :param _start: The first entry ID, prefix with '(' to exclude it, defaults to the beginning.
+        :param _end: The last entry ID, prefix with '(' to exclude it, defaults to the end.
+        :param _count: Optional maximum number of entries.
+        :param _reverse: Boolean if the entries are returned newest first, the count then applies from the end.
+        :return: A list of event entries.
+        """
+
+    def get_history(self, _topic, _start='-', _end='+', _count=None, _reverse=False):
+        """
+        Get a range of events for a topic, including archived ones.
+
+        :param _topic: The event topic.
+        :param _start: The first entry ID, prefix with '(' to exclude it, defaults to the beginning.
+        :param _end: The last entry ID, prefix with '(' to exclude it, defaults to the end.
+        :param _count: Optional maximum number of entries.
+        :param _reverse: Boolean if the entries are returned newest first, the count then applies from the end.
+        :return: A list of event entries.
+        """
+        archived_id = self.archive.last_id(_topic) if self.archive else None
+        if not archived_id or parse_bound(_start, 0)[0] > parse_id(archived_id):
+            return self.get_range(_topic, _start, _end, _count, _reverse)
+
+        # the archive holds the entries up to its last ID, the stream those after
+        start = '(' + archived_id
+        if _reverse:
+            entries = self.get_range(_topic, start, _end, _count, True)
+            if _count and len(entries) >= _count:
+                return entries
+            return entries + self.archive.get_range(_topic, _start, _end, _count and _count - len(entries), True)
+
+        entries = self.archive.get_range(_topic, _start, _end, _count)
+        if _count and len(entries) >= _count:
+            return entries
+        return entries + self.get_range(_topic, start, _end, _count and _count - len(entries))
+
+    def get_pages(self, _topic, _count=EVENT_PAGE_SIZE, _start='-'):
+        """
+        Walk all events for a topic page by page, using the last entry ID of a page as cursor.
+        Archived events are read first.
+
+        :param _topic: The event topic.
+        :param _count: The maximum number of entries per page.
+        :param _start: The first entry ID, prefix with '(' to exclude it, defaults to the beginning.
+        :return: A generator of lists of event entries.
+        :raises ValueError: If the page size is not positive.
+        """
+        if _count < 1:
+            raise ValueError('invalid page size {}'.format(_count))
+
+        start = _start
+        if self.archive:
+            last_id = self.archive.last_id(_topic)
+            if last_id:
+                yield from self.archive.get_pages(_topic, start, _count)
+                if start == '-' or parse_id(start.lstrip('(')) <= parse_id(last_id):
+                    start = '(' + last_id
+
+        yield from self.get_range_pages(_topic, start, '+', _count)
+
+    def get_range_pages(self, _topic, _start, _end, _count=EVENT_PAGE_SIZE):
+        """
+        Walk a range of events in Redis page by page.
+
+        :param _topic: The event topic.
+        :param _start: The first entry ID, prefix with '(' to exclude it.
+        :param _end: The last entry ID, prefix with '(' to exclude it.
+        :param _count: The maximum number of entries per page.
+        :return: A generator of lists of event entries.
+        :raises ValueError: If the page size is not positive.
+        """
+        if _count < 1:
+            raise ValueError('invalid page size {}'.format(_count))
+
+        start = _start
+        while True:
+            entries = self.get_range(_topic, start, _end, _count)
+            if entries:
+                yield entries
+            if len(entries) < _count:
+                return
+            start = '(' + entries[-1][0]
+
+    @abc.abstractmethod
+    def last_id(self, _topic):
+        """
+        Get the ID of the last entry of a stream.
+
+        :param _topic: The event topic.
+        :return: The entry ID, '0-0' if the stream is empty.
+        """
+
+    @abc.abstractmethod
+    def get_snapshot(self, _topic):
+        """
+        Get the latest state snapshot of a topic.
+
+        :param _topic: The event topic.
+        :return: A dict with the snapshot or None if there is none.
+        """
+
+    @abc.abstractmethod
+    def set_snapshot(self, _topic, _snapshot):
+        """
+        Store a state snapshot of a topic, replacing the previous one.
+
+        :param _topic: The event topic.
+        :param _snapshot: A dict with the snapshot.
+        """
+
+    @abc.abstractmethod
+    def topics(self):
+        """
+        Get all event topics.
+
+        :return: A list of event topics.
+        """
+
+    @abc.abstractmethod
+    def retain(self, _topic, _max_len=0, _max_age=0):
+        """
+        Apply a retention policy, entries beyond it are archived first and then trimmed.
+
+        :param _topic: The event topic.
+        :param _max_len: The maximum number of entries to keep, 0 for no limit.
+        :param _max_age: The maximum age of entries in s, 0 for no limit.
+        :return: The number of archived entries.
+        """
+
+    @abc.abstractmethod
+    def read(self, _topic, _last_id=None, _block=1000):
+        """
+        Read from a stream. This is a blocking operation.
+
+        :param _topic: The event topic.
+        :param _last_id: Optional entry ID to read after, defaults to new entries only.
+        :param _block: The time to block in ms, defaults to 1000.
+        :return: A list of stream names with event entries, empty if timed out.
+        """
+
+    @abc.abstractmethod
+    def create_group(self, _topic, _name):
+        """
+        Create a consumer group, ignore if already exists.
+
+        :param _topic: The event topic.
+        :param _name: The consumer group name.
+        """
+
+    @abc.abstractmethod
+    def read_group(self, _topics, _name, _group, _block=1000, _no_ack=False):
+        """
+        Read new event stream entries from a group, several topics are read at once.
+
+        :param _topics: The event topic or a list of event topics.
+        :param _name: The name of the consumer.
+        :param _group: The consumer group name.
+        :param _block: The time to block in ms, defaults to 1000.
+        :param _no_ack: Boolean if acknowledge is required.
+        :return: A list of stream names with event entries, empty if timed out.
+        """
+
+    @abc.abstractmethod
+    def unblock(self, _name):
+        """
+        Wake up the blocking group read of a consumer, it returns as if it timed out.
+
+        :param _name: The name of the consumer.
+        """
+
+    @abc.abstractmethod
+    def ack_group(self, _topic, _group, _ids):
+        """
+        Acknowledge processing of group events.
+
+        :param _topic: The event topic.
+        :param _group: The consumer group name.
+        :param _ids: A list of entry IDs.
+        :return: The number of acknowledged entries.
+        """
+
+    def ack_groups(self, _acks):
+        """
+        Acknowledge processing of events of several groups.
+
+        :param _acks: A dict mapping (topic, group name) tuples to lists of entry IDs.
+        :return: A list with the number of acknowledged entries per group.
+        """
+        return [self.ack_group(topic, group, ids) for (topic, group), ids in _acks.items()]
+
+    @abc.abstractmethod
+    def claim_group(self, _topic, _name, _group, _min_idle, _count=EVENT_PAGE_SIZE):
+        """
+        Claim pending entries of a group which were not acknowledged in time, e.g. by a dead consumer.
+
+        :param _topic: The event topic.
+        :param _name: The name of the claiming consumer.
+        :param _group: The consumer group name.
+        :param _min_idle: The minimum time in ms an entry has been pending.
+        :param _count: The maximum number of entries to claim per round-trip.
+        :return: A list of event entries.
+        """
+
+    @abc.abstractmethod
+    def delete_consumer(self, _topic, _group, _name):
+        """
+        Delete a consumer from a group, unless it has pending entries. Those are left to be claimed,
+        the consumer is deleted once it is idle without pending entries.
+
+        :param _topic: The event topic.
+        :param _group: The consumer group name.
+        :param _name: The name of the consumer.
+        :return: Boolean if the consumer was deleted.
+        """
+
+    @abc.abstractmethod
+    def group_lags(self):
+        """
+        Get the lag of all consumer groups.
+
+        :return: A dict mapping (topic, group name) tuples to the number of entries not yet delivered or acknowledged.
+        """
+
+
+class EventStore(Storage):
+    """
+    Event Store class, stores the events in Redis streams.
+    """
+
+    def __init__(self, host='localhost', port=6379, archive=None, dedup_window=0):
         """
         :param host: The Redis host.
         :param port: The Redis port.
+        :param archive: Optional archive holding the trimmed entries.
+        :param dedup_window: The time in s an event ID is remembered to drop duplicates, 0 to disable.
         """
         self.redis = redis.StrictRedis(decode_responses=True, host=host, port=port)
+        self.archive = archive
+        self.dedup_window = dedup_window
+        self.add_script = self.redis.register_script(EVENT_ADD_SCRIPT)
+        self.prune_script = self.redis.register_script(EVENT_PRUNE_SCRIPT)
+        self.delete_consumer_script = self.redis.register_script(EVENT_DELETE_CONSUMER_SCRIPT)
 
-    def add(self, _topic, _info):
+    def add(self, _topic, _info, _expected_id=None):
         """
         Add an event to the stream.
 
         :param _topic: The event topic.
         :param _info: A dict with the event information.
-        :return: The entry ID, i.e. timestamp in ms.
+        :param _expected_id: Optional entry ID the stream is expected to end at, '0-0' for an empty stream.
+        :return: The entry ID, i.e. timestamp in ms and sequence number, allocated by Redis.
+        :raises ConcurrencyError: If the stream does not end at the expected entry ID.
         """
-        return self.redis.xadd(
-            EVENT_STREAM_NAME.format(_topic),
-            _info,
-            id=EVENT_STREAM_ID.format(time.time()).replace('.', '-')
-        )
+        if self.dedup_window or _expected_id:
+            return self.add_many(_topic, [_info], _expected_id)[0]
+
+        with REDIS_LATENCY.time(('xadd',)):
+            return self.redis.xadd(EVENT_STREAM_NAME.format(_topic), _info)
+
+    def add_many(self, _topic, _infos, _expected_id=None):
+        """
+        Add several events to the stream in one pipelined round-trip.
+        With deduplication or an expected entry ID, a script checks them and adds the events atomically instead.
+
+        :param _topic: The event topic.
+        :param _infos: A list of dicts with the event information.
+        :param _expected_id: Optional entry ID the stream is expected to end at, '0-0' for an empty stream.
+        :return: A list with the entry IDs, in the same order as the events, the first entry ID for duplicates.
+        :raises ConcurrencyError: If the stream does not end at the expected entry ID.
+        """
+        if self.dedup_window or _expected_id:
+            return self.add_topics([(_topic, _infos, _expected_id)])[0]
+
+        pipe = self.redis.pipeline(transaction=False)
+        for info in _infos:
+            pipe.xadd(EVENT_STREAM_NAME.format(_topic), info)
+
+        with REDIS_LATENCY.time(('xadd',)):
+            return pipe.execute()
+
+    def add_topics(self, _batches):
+        """
+        Add batches of events to several streams atomically in one script, either all of them are added or none.
+
+        :param _batches: A list of tuples with event topic, list of dicts with the event information and
+            optional entry ID the stream is expected to end at.
+        :return: A list with a list of entry IDs per batch, in the same order as the events.
+        :raises ConcurrencyError: If a stream does not end at its expected entry ID.
+        """
+        keys, args = script_args(_batches, self.dedup_window)
+        try:
+            with REDIS_LATENCY.time(('xadd',)):
+                return self.add_script(keys, args)
+        except redis.ResponseError as e:
+            raise conflict(e, _batches)
 
     def get(self, _topic):
         """
-        Get all events for a topic.
+        Get all events for a topic, including archived ones.
 
         :param _topic: The event topic.
-        :return:
+        :return: A list of event entries.
+        """
+        if self.archive:
+            return [entry for entries in self.get_pages(_topic) for entry in entries]
+
+        with REDIS_LATENCY.time(('xrange',)):
+            return self.redis.xrange(EVENT_STREAM_NAME.format(_topic))
+
+    def get_range(self, _topic, _start='-', _end='+', _count=None, _reverse=False):
+        """
+        Get a range of events for a topic.
+
+        :param _topic: The event topic.
+        :param _start: The first entry ID, prefix with '(' to exclude it, defaults to the beginning.
+        :param _end: The last entry ID, prefix with '(' to exclude it, defaults to the end.
+        :param _count: Optional maximum number of entries.
+        :param _reverse: Boolean if the entries are returned newest first, the count then applies from the end.
+        :return: A list of event entries.
+        """
+        if _reverse:
+            with REDIS_LATENCY.time(('xrevrange',)):
+                return self.redis.xrevrange(EVENT_STREAM_NAME.format(_topic), _end, _start, count=_count)
+
+        with REDIS_LATENCY.time(('xrange',)):
+            return self.redis.xrange(EVENT_STREAM_NAME.format(_topic), _start, _end, count=_count)
+
+    def last_id(self, _topic):
+        """
+        Get the ID of the last entry of a stream.
+
+        :param _topic: The event topic.
+        :return: The entry ID, '0-0' if the stream is empty.
+        """
+        with REDIS_LATENCY.time(('xrevrange',)):
+            entries = self.redis.xrevrange(EVENT_STREAM_NAME.format(_topic), count=1)
+
+        return entries[0][0] if entries else '0-0'
+
+    def get_snapshot(self, _topic):
+        """
+        Get the latest state snapshot of a topic.
+
+        :param _topic: The event topic.
+        :return: A dict with the snapshot or None if there is none.
+        """
+        snapshot = self.redis.get(EVENT_SNAPSHOT_NAME.format(_topic))
+
+        return json.loads(snapshot) if snapshot else None
+
+    def set_snapshot(self, _topic, _snapshot):
         """
-        return self.redis.xrange(EVENT_STREAM_NAME.format(_topic))
+        Store a state snapshot of a topic, replacing the previous one.
+
+        :param _topic: The event topic.
+        :param _snapshot: A dict with the snapshot.
+        """
+        self.redis.set(EVENT_SNAPSHOT_NAME.format(_topic), json.dumps(_snapshot))
+
+    def topics(self):
+        """
+        Get all event topics.
+
+        :return: A list of event topics.
+        """
+        return [
+            stream_topic(name) for name in self.redis.scan_iter(match=EVENT_STREAM_NAME.format('*'), _type='STREAM')
+        ]
+
+    def group_lags(self):
+        """
+        Get the lag of all consumer groups.
+
+        :return: A dict mapping (topic, group name) tuples to the number of entries not yet delivered or acknowledged.
+        """
+        lags = {}
+        for topic in self.topics():
+            for group in self.redis.xinfo_groups(EVENT_STREAM_NAME.format(topic)):
+                lags[(topic, group['name'])] = (group.get('lag') or 0) + group['pending']
+
+        return lags
+
+    def retain(self, _topic, _max_len=0, _max_age=0):
+        """
+        Apply a retention policy, entries beyond it are archived first and then trimmed approximately.
+
+        :param _topic: The event topic.
+        :param _max_len: The maximum number of entries to keep, 0 for no limit.
+        :param _max_age: The maximum age of entries in s, 0 for no limit.
+        :return: The number of archived entries.
+        """
+        stream_name = EVENT_STREAM_NAME.format(_topic)
+        bounds = []
+        if _max_len:
+            excess = self.redis.xlen(stream_name) - _max_len
+            # the first entry kept is the bound, it is looked up from whichever end of the stream is closer
+            if 0 < excess < _max_len:
+                bounds.append(self.redis.xrange(stream_name, count=excess + 1)[-1][0])
+            elif excess > 0:
+                bounds.append(self.redis.xrevrange(stream_name, count=_max_len)[-1][0])
+        if _max_age:
+            ts = time.time() - _max_age
+            # legacy IDs sort below the IDs allocated by Redis, unless some of those are old enough, only legacy
+            # entries are trimmed, by a bound in their own format
+            min_id = ts_id(ts)
+            if not self.redis.xrange(stream_name, '{}-0'.format(EVENT_LEGACY_ID_BOUND), '(' + min_id, count=1):
+                min_id = legacy_id(ts)
+            bounds.append(min_id)
+
+        if not bounds:
+            return 0
+
+        min_id = max(bounds, key=parse_id)
+        archived = 0
+        if self.archive:
+            last_id = self.archive.last_id(_topic)
+            archived = self.archive.write(_topic, self.get_range_pages(
+                _topic, '(' + last_id if last_id else '-', '(' + min_id
+            ))
+
+        self.redis.xtrim(stream_name, minid=min_id, approximate=True)
+
+        return archived
 
     def read(self, _topic, _last_id=None, _block=1000):
         """
         Read from a stream. This is a blocking operation.
 
-        :param _topic:
-        :param _last_id:
-        :param _block:
-        :return:
+        :param _topic: The event topic.
+        :param _last_id: Optional entry ID to read after, defaults to new entries only.
+        :param _block: The time to block in ms, defaults to 1000.
+        :return: A list of stream names with event entries, empty if timed out.
         """
         last_id = _last_id if _last_id else '$'
 
-        return self.redis.xread({EVENT_STREAM_NAME.format(_topic): last_id}, block=_block)
+        with REDIS_LATENCY.time(('xread',)):
+            return self.redis.xread({EVENT_STREAM_NAME.format(_topic): last_id}, block=_block)
 
     def create_group(self, _topic, _name):
         """
@@ -68,28 +719,103 @@ class EventStore(object):
             if 'BUSYGROUP' not in e.args[0]:
                 raise e
 
-    def read_group(self, _topic, _name, _group, _block=1000, _no_ack=False):
+    def read_group(self, _topics, _name, _group, _block=1000, _no_ack=False):
         """
-        Read new event stream entries from a group.
+        Read new event stream entries from a group, several topics are read at once.
 
-        :param _topic: The event topic.
+        :param _topics: The event topic or a list of event topics.
         :param _name: The name of the consumer.
         :param _group: The consumer group name.
         :param _block: The time to block in ms, defaults to 1000.
         :param _no_ack: Boolean if acknowledge is required.
         :return: A list of event entries or None if timed out.
         """
-        return self.redis.xreadgroup(
-            _group, _name, {EVENT_STREAM_NAME.format(_topic): '>'}, block=_block, noack=_no_ack
-        )
+        topics = [_topics] if isinstance(_topics, str) else _topics
+        streams = {EVENT_STREAM_NAME.format(topic): '>' for topic in topics}
+
+        with REDIS_LATENCY.time(('xreadgroup',)):
+            if _block is None:
+                return self.redis.xreadgroup(_group, _name, streams, noack=_no_ack)
+
+            # name the connection while it blocks, so it can be found to unblock it
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.client_setname(EVENT_CLIENT_NAME.format(_name))
+            pipe.xreadgroup(_group, _name, streams, block=_block, noack=_no_ack)
+            pipe.client_setname('')
+
+            return pipe.execute()[1]
+
+    def unblock(self, _name):
+        """
+        Wake up the blocking group read of a consumer, it returns as if it timed out.
+
+        :param _name: The name of the consumer.
+        """
+        for client in self.redis.client_list():
+            if client.get('name') == EVENT_CLIENT_NAME.format(_name):
+                self.redis.client_unblock(client['id'])
 
     def ack_group(self, _topic, _group, _ids):
         """
-        Acknowledge processing of a group event.
+        Acknowledge processing of group events.
 
-        :param _topic:
-        :param _group:
-        :param _ids:
-        :return:
+        :param _topic: The event topic.
+        :param _group: The consumer group name.
+        :param _ids: A list of entry IDs.
+        :return: The number of acknowledged entries.
+        """
+        return self.redis.xack(EVENT_STREAM_NAME.format(_topic), _group, *_ids)
+
+    def ack_groups(self, _acks):
+        """
+        Acknowledge processing of events of several groups in one pipelined round-trip.
+
+        :param _acks: A dict mapping (topic, group name) tuples to lists of entry IDs.
+        :return: A list with the number of acknowledged entries per group.
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        for (topic, group), ids in _acks.items():
+            pipe.xack(EVENT_STREAM_NAME.format(topic), group, *ids)
+
+        with REDIS_LATENCY.time(('xack',)):
+            return pipe.execute()
+
+    def claim_group(self, _topic, _name, _group, _min_idle, _count=EVENT_PAGE_SIZE):
+        """
+        Claim pending entries of a group which were not acknowledged in time, e.g. by a dead consumer.
+        Other consumers idle as long without pending entries are deleted.
+
+        :param _topic: The event topic.
+        :param _name: The name of the claiming consumer.
+        :param _group: The consumer group name.
+        :param _min_idle: The minimum time in ms an entry has been pending.
+        :param _count: The maximum number of entries to claim per round-trip.
+        :return: A list of event entries.
+        """
+        stream_name = EVENT_STREAM_NAME.format(_topic)
+        claimed = []
+        start = '0-0'
+        while True:
+            start, entries = self.redis.xautoclaim(
+                stream_name, _group, _name, _min_idle, start, count=_count
+            )[:2]
+            claimed.extend(entry for entry in entries if entry[1])
+            if start == '0-0':
+                break
+
+        # consumers of ended subscriptions are left with their pending entries, delete them once those are claimed
+        self.prune_script([stream_name], [_group, _min_idle, _name])
+
+        return claimed
+
+    def delete_consumer(self, _topic, _group, _name):
+        """
+        Delete a consumer from a group, unless it has pending entries. Those are left to be claimed,
+        the consumer is deleted by the claim once it is idle without pending entries.
+
+        :param _topic: The event topic.
+        :param _group: The consumer group name.
+        :param _name: The name of the consumer.
+        :return: Boolean if the consumer was deleted.
         """
-        return self.redis.xack(EVENT_STREAM_NAME.format(_topic), _group, _ids)
+        return bool(self.delete_consumer_script([EVENT_STREAM_NAME.format(_topic)], [_group, _name]))
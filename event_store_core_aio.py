@@ -0,0 +1,321 @@
+import asyncio
+import json
+
+import redis
+import redis.asyncio
+
+from event_store_archive import parse_id, parse_bound
+from event_store_metrics import REDIS_LATENCY
+from event_store_core import script_args, conflict, EVENT_STREAM_NAME, EVENT_SNAPSHOT_NAME, EVENT_PAGE_SIZE, \
+    EVENT_ADD_SCRIPT, EVENT_PRUNE_SCRIPT, EVENT_DELETE_CONSUMER_SCRIPT
+
+
+class AsyncEventStore(object):
+    """
+    Async Event Store class.
+    """
+
+    def __init__(self, host='localhost', port=6379, archive=None, dedup_window=0):
+        """
+        :param host: The Redis host.
+        :param port: The Redis port.
+        :param archive: Optional archive holding the trimmed entries.
+        :param dedup_window: The time in s an event ID is remembered to drop duplicates, 0 to disable.
+        """
+        self.redis = redis.asyncio.StrictRedis(decode_responses=True, host=host, port=port)
+        self.archive = archive
+        self.dedup_window = dedup_window
+        self.add_script = self.redis.register_script(EVENT_ADD_SCRIPT)
+        self.prune_script = self.redis.register_script(EVENT_PRUNE_SCRIPT)
+        self.delete_consumer_script = self.redis.register_script(EVENT_DELETE_CONSUMER_SCRIPT)
+
+    async def add(self, _topic, _info, _expected_id=None):
+        """
+        Add an event to the stream.
+
+        :param _topic: The event topic.
+        :param _info: A dict with the event information.
+        :param _expected_id: Optional entry ID the stream is expected to end at, '0-0' for an empty stream.
+        :return: The entry ID, i.e. timestamp in ms and sequence number, allocated by Redis.
+        :raises ConcurrencyError: If the stream does not end at the expected entry ID.
+        """
+        if self.dedup_window or _expected_id:
+            return (await self.add_many(_topic, [_info], _expected_id))[0]
+
+        with REDIS_LATENCY.time(('xadd',)):
+            return await self.redis.xadd(EVENT_STREAM_NAME.format(_topic), _info)
+
+    async def add_many(self, _topic, _infos, _expected_id=None):
+        """
+        Add several events to the stream in one pipelined round-trip.
+        With deduplication or an expected entry ID, a script checks them and adds the events atomically instead.
+
+        :param _topic: The event topic.
+        :param _infos: A list of dicts with the event information.
+        :param _expected_id: Optional entry ID the stream is expected to end at, '0-0' for an empty stream.
+        :return: A list with the entry IDs, in the same order as the events, the first entry ID for duplicates.
+        :raises ConcurrencyError: If the stream does not end at the expected entry ID.
+        """
+        if self.dedup_window or _expected_id:
+            return (await self.add_topics([(_topic, _infos, _expected_id)]))[0]
+
+        pipe = self.redis.pipeline(transaction=False)
+        for info in _infos:
+            pipe.xadd(EVENT_STREAM_NAME.format(_topic), info)
+
+        with REDIS_LATENCY.time(('xadd',)):
+            return await pipe.execute()
+
+    async def add_topics(self, _batches):
+        """
+        Add batches of events to several streams atomically in one script, either all of them are added or none.
+
+        :param _batches: A list of tuples with event topic, list of dicts with the event information and
+            optional entry ID the stream is expected to end at.
+        :return: A list with a list of entry IDs per batch, in the same order as the events.
+        :raises ConcurrencyError: If a stream does not end at its expected entry ID.
+        """
+        keys, args = script_args(_batches, self.dedup_window)
+        try:
+            with REDIS_LATENCY.time(('xadd',)):
+                return await self.add_script(keys, args)
+        except redis.ResponseError as e:
+            raise conflict(e, _batches)
+
+    async def get(self, _topic):
+        """
+        Get all events for a topic, including archived ones.
+
+        :param _topic: The event topic.
+        :return: A list of event entries.
+        """
+        if self.archive:
+            return [entry async for entries in self.get_pages(_topic) for entry in entries]
+
+        with REDIS_LATENCY.time(('xrange',)):
+            return await self.redis.xrange(EVENT_STREAM_NAME.format(_topic))
+
+    async def get_range(self, _topic, _start='-', _end='+', _count=None, _reverse=False):
+        """
+        Get a range of events for a topic.
+
+        :param _topic: The event topic.
+        :param _start: The first entry ID, prefix with '(' to exclude it, defaults to the beginning.
+        :param _end: The last entry ID, prefix with '(' to exclude it, defaults to the end.
+        :param _count: Optional maximum number of entries.
+        :param _reverse: Boolean if the entries are returned newest first, the count then applies from the end.
+        :return: A list of event entries.
+        """
+        if _reverse:
+            with REDIS_LATENCY.time(('xrevrange',)):
+                return await self.redis.xrevrange(EVENT_STREAM_NAME.format(_topic), _end, _start, count=_count)
+
+        with REDIS_LATENCY.time(('xrange',)):
+            return await self.redis.xrange(EVENT_STREAM_NAME.format(_topic), _start, _end, count=_count)
+
+    async def get_history(self, _topic, _start='-', _end='+', _count=None, _reverse=False):
+        """
+        Get a range of events for a topic, including archived ones, those are read in a worker thread.
+
+        :param _topic: The event topic.
+        :param _start: The first entry ID, prefix with '(' to exclude it, defaults to the beginning.
+        :param _end: The last entry ID, prefix with '(' to exclude it, defaults to the end.
+        :param _count: Optional maximum number of entries.
+        :param _reverse: Boolean if the entries are returned newest first, the count then applies from the end.
+        :return: A list of event entries.
+        """
+        archived_id = await asyncio.to_thread(self.archive.last_id, _topic) if self.archive else None
+        if not archived_id or parse_bound(_start, 0)[0] > parse_id(archived_id):
+            return await self.get_range(_topic, _start, _end, _count, _reverse)
+
+        # the archive holds the entries up to its last ID, the stream those after
+        start = '(' + archived_id
+        if _reverse:
+            entries = await self.get_range(_topic, start, _end, _count, True)
+            if _count and len(entries) >= _count:
+                return entries
+            return entries + await asyncio.to_thread(
+                self.archive.get_range, _topic, _start, _end, _count and _count - len(entries), True
+            )
+
+        entries = await asyncio.to_thread(self.archive.get_range, _topic, _start, _end, _count)
+        if _count and len(entries) >= _count:
+            return entries
+        return entries + await self.get_range(_topic, start, _end, _count and _count - len(entries))
+
+    async def get_pages(self, _topic, _count=EVENT_PAGE_SIZE, _start='-'):
+        """
+        Walk all events for a topic page by page, using the last entry ID of a page as cursor.
+        Archived events are read first, in a worker thread.
+
+        :param _topic: The event topic.
+        :param _count: The maximum number of entries per page.
+        :param _start: The first entry ID, prefix with '(' to exclude it, defaults to the beginning.
+        :return: An async generator of lists of event entries.
+        :raises ValueError: If the page size is not positive.
+        """
+        if _count < 1:
+            raise ValueError('invalid page size {}'.format(_count))
+
+        start = _start
+        if self.archive:
+            last_id = await asyncio.to_thread(self.archive.last_id, _topic)
+            if last_id:
+                pages = self.archive.get_pages(_topic, start, _count)
+                while True:
+                    entries = await asyncio.to_thread(next, pages, None)
+                    if entries is None:
+                        break
+                    yield entries
+                if start == '-' or parse_id(start.lstrip('(')) <= parse_id(last_id):
+                    start = '(' + last_id
+
+        while True:
+            entries = await self.get_range(_topic, start, _count=_count)
+            if entries:
+                yield entries
+            if len(entries) < _count:
+                return
+            start = '(' + entries[-1][0]
+
+    async def last_id(self, _topic):
+        """
+        Get the ID of the last entry of a stream.
+
+        :param _topic: The event topic.
+        :return: The entry ID, '0-0' if the stream is empty.
+        """
+        with REDIS_LATENCY.time(('xrevrange',)):
+            entries = await self.redis.xrevrange(EVENT_STREAM_NAME.format(_topic), count=1)
+
+        return entries[0][0] if entries else '0-0'
+
+    async def get_snapshot(self, _topic):
+        """
+        Get the latest state snapshot of a topic.
+
+        :param _topic: The event topic.
+        :return: A dict with the snapshot or None if there is none.
+        """
+        snapshot = await self.redis.get(EVENT_SNAPSHOT_NAME.format(_topic))
+
+        return json.loads(snapshot) if snapshot else None
+
+    async def set_snapshot(self, _topic, _snapshot):
+        """
+        Store a state snapshot of a topic, replacing the previous one.
+
+        :param _topic: The event topic.
+        :param _snapshot: A dict with the snapshot.
+        """
+        await self.redis.set(EVENT_SNAPSHOT_NAME.format(_topic), json.dumps(_snapshot))
+
+    async def read(self, _topic, _last_id=None, _block=1000):
+        """
+        Read from a stream. This blocks the calling coroutine only.
+
+        :param _topic: The event topic.
+        :param _last_id: Optional entry ID to read after, defaults to new entries only.
+        :param _block: The time to block in ms, defaults to 1000.
+        :return: A list of event entries or None if timed out.
+        """
+        last_id = _last_id if _last_id else '$'
+
+        with REDIS_LATENCY.time(('xread',)):
+            return await self.redis.xread({EVENT_STREAM_NAME.format(_topic): last_id}, block=_block)
+
+    async def create_group(self, _topic, _name):
+        """
+        Create a consumer group, ignore if already exists.
+
+        :param _topic: The event topic.
+        :param _name: The consumer group name.
+        """
+        try:
+            await self.redis.xgroup_create(EVENT_STREAM_NAME.format(_topic), _name, mkstream=True)
+        except redis.ResponseError as e:
+            if 'BUSYGROUP' not in e.args[0]:
+                raise e
+
+    async def read_group(self, _topics, _name, _group, _block=1000, _no_ack=False):
+        """
+        Read new event stream entries from a group, several topics are read at once.
+
+        :param _topics: The event topic or a list of event topics.
+        :param _name: The name of the consumer.
+        :param _group: The consumer group name.
+        :param _block: The time to block in ms, defaults to 1000.
+        :param _no_ack: Boolean if acknowledge is required.
+        :return: A list of event entries or None if timed out.
+        """
+        topics = [_topics] if isinstance(_topics, str) else _topics
+
+        with REDIS_LATENCY.time(('xreadgroup',)):
+            return await self.redis.xreadgroup(
+                _group, _name, {EVENT_STREAM_NAME.format(topic): '>' for topic in topics}, block=_block, noack=_no_ack
+            )
+
+    async def ack_group(self, _topic, _group, _ids):
+        """
+        Acknowledge processing of group events.
+
+        :param _topic: The event topic.
+        :param _group: The consumer group name.
+        :param _ids: A list of entry IDs.
+        :return: The number of acknowledged entries.
+        """
+        return await self.redis.xack(EVENT_STREAM_NAME.format(_topic), _group, *_ids)
+
+    async def ack_groups(self, _acks):
+        """
+        Acknowledge processing of events of several groups in one pipelined round-trip.
+
+        :param _acks: A dict mapping (topic, group name) tuples to lists of entry IDs.
+        :return: A list with the number of acknowledged entries per group.
+        """
+        pipe = self.redis.pipeline(transaction=False)
+        for (topic, group), ids in _acks.items():
+            pipe.xack(EVENT_STREAM_NAME.format(topic), group, *ids)
+
+        with REDIS_LATENCY.time(('xack',)):
+            return await pipe.execute()
+
+    async def claim_group(self, _topic, _name, _group, _min_idle, _count=EVENT_PAGE_SIZE):
+        """
+        Claim pending entries of a group which were not acknowledged in time, e.g. by a dead consumer.
+        Other consumers idle as long without pending entries are deleted.
+
+        :param _topic: The event topic.
+        :param _name: The name of the claiming consumer.
+        :param _group: The consumer group name.
+        :param _min_idle: The minimum time in ms an entry has been pending.
+        :param _count: The maximum number of entries to claim per round-trip.
+        :return: A list of event entries.
+        """
+        stream_name = EVENT_STREAM_NAME.format(_topic)
+        claimed = []
+        start = '0-0'
+        while True:
+            start, entries = (await self.redis.xautoclaim(
+                stream_name, _group, _name, _min_idle, start, count=_count
+            ))[:2]
+            claimed.extend(entry for entry in entries if entry[1])
+            if start == '0-0':
+                break
+
+        # consumers of ended subscriptions are left with their pending entries, delete them once those are claimed
+        await self.prune_script([stream_name], [_group, _min_idle, _name])
+
+        return claimed
+
+    async def delete_consumer(self, _topic, _group, _name):
+        """
+        Delete a consumer from a group, unless it has pending entries. Those are left to be claimed,
+        the consumer is deleted by the claim once it is idle without pending entries.
+
+        :param _topic: The event topic.
+        :param _group: The consumer group name.
+        :param _name: The name of the consumer.
+        :return: Boolean if the consumer was deleted.
+        """
+        return bool(await self.delete_consumer_script([EVENT_STREAM_NAME.format(_topic)], [_group, _name]))
@@ -0,0 +1,471 @@
+import bisect
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from event_store_archive import parse_id, parse_bound
+from event_store_core import Storage, ConcurrencyError, EVENT_STREAM_NAME, EVENT_PAGE_SIZE, \
+    EVENT_LEGACY_ID_BOUND, ts_id, legacy_id
+
+
+class MemoryStream(object):
+    """
+    Memory Stream class, an append-only array of entries with an index of their IDs and the recent event IDs.
+    Blocked readers register a condition of their own, so an append only wakes the readers of its stream.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self.entries = []
+        self.groups = {}
+        self.seen = OrderedDict()
+        self.waiters = set()
+
+    def last_key(self):
+        """
+        Get the ID of the last entry.
+
+        :return: A tuple with the two parts of the entry ID.
+        """
+        return self.keys[-1] if self.keys else (0, 0)
+
+    def after(self, _key, _count=None):
+        """
+        Get the entries after an entry ID.
+
+        :param _key: A tuple with the two parts of the entry ID.
+        :param _count: Optional maximum number of entries.
+        :return: A list of event entries.
+        """
+        start = bisect.bisect_right(self.keys, _key)
+
+        return self.entries[start:start + _count if _count else None]
+
+
+class MemoryGroup(object):
+    """
+    Memory Group class, the delivery state of a consumer group.
+    """
+
+    def __init__(self, _last_key):
+        """
+        :param _last_key: The ID of the last delivered entry.
+        """
+        self.last_key = _last_key
+        self.pending = {}
+
+
+class MemoryEventStore(Storage):
+    """
+    Memory Event Store class, stores the events in process, e.g. for single node deployments, tests and benchmarks.
+    """
+
+    def __init__(self, archive=None, dedup_window=0):
+        """
+        :param archive: Optional archive holding the trimmed entries.
+        :param dedup_window: The time in s an event ID is remembered to drop duplicates, 0 to disable.
+        """
+        self.archive = archive
+        self.dedup_window = dedup_window
+        self.streams = {}
+        self.snapshots = {}
+        self.blocked = {}
+        self.unblocked = set()
+        self.lock = threading.Lock()
+
+    def stream(self, _topic):
+        """
+        Get the stream of a topic, create it if it does not exist.
+
+        :param _topic: The event topic.
+        :return: The stream.
+        """
+        stream = self.streams.get(_topic)
+        if stream is None:
+            stream = self.streams[_topic] = MemoryStream()
+
+        return stream
+
+    def wait(self, _streams, _predicate, _timeout, _name=None):
+        """
+        Wait with the lock held until entries are added to one of the streams, or the time is up.
+
+        :param _streams: A list of streams.
+        :param _predicate: A function returning True once the wait is over.
+        :param _timeout: The time to wait in s, None to wait forever.
+        :param _name: Optional consumer name to wake up the wait with unblock.
+        """
+        waiter = threading.Condition(self.lock)
+        for stream in _streams:
+            stream.waiters.add(waiter)
+        if _name:
+            self.blocked[_name] = waiter
+        try:
+            waiter.wait_for(_predicate, _timeout)
+        finally:
+            for stream in _streams:
+                stream.waiters.discard(waiter)
+            if _name:
+                self.blocked.pop(_name, None)
+
+    def add(self, _topic, _info, _expected_id=None):
+        """
+        Add an event to the stream.
+
+        :param _topic: The event topic.
+        :param _info: A dict with the event information.
+        :param _expected_id: Optional entry ID the stream is expected to end at, '0-0' for an empty stream.
+        :return: The entry ID, i.e. timestamp in ms and sequence number.
+        :raises ConcurrencyError: If the stream does not end at the expected entry ID.
+        """
+        return self.add_many(_topic, [_info], _expected_id)[0]
+
+    def add_many(self, _topic, _infos, _expected_id=None):
+        """
+        Add several events to the stream at once.
+
+        :param _topic: The event topic.
+        :param _infos: A list of dicts with the event information.
+        :param _expected_id: Optional entry ID the stream is expected to end at, '0-0' for an empty stream.
+        :return: A list with the entry IDs, in the same order as the events, the first entry ID for duplicates.
+        :raises ConcurrencyError: If the stream does not end at the expected entry ID.
+        """
+        return self.add_topics([(_topic, _infos, _expected_id)])[0]
+
+    def add_topics(self, _batches):
+        """
+        Add batches of events to several streams atomically, either all of them are added or none.
+
+        :param _batches: A list of tuples with event topic, list of dicts with the event information and
+            optional entry ID the stream is expected to end at.
+        :return: A list with a list of entry IDs per batch, in the same order as the events.
+        :raises ConcurrencyError: If a stream does not end at its expected entry ID.
+        """
+        result = []
+        with self.lock:
+            now = time.time()
+            for topic, infos, expected_id in _batches:
+                stream = self.stream(topic)
+                while stream.seen and next(iter(stream.seen.values()))[1] <= now:
+                    stream.seen.popitem(last=False)
+
+                # a retry of an append which succeeded is answered from the seen event IDs, like any duplicate
+                retried = self.dedup_window and all(info.get('event_id') in stream.seen for info in infos)
+                last_id = '{}-{}'.format(*stream.last_key())
+                if expected_id and not retried and last_id != expected_id:
+                    raise ConcurrencyError(topic, expected_id, last_id)
+
+            for topic, infos, expected_id in _batches:
+                stream, entry_ids = self.stream(topic), []
+                for info in infos:
+                    event_id = info.get('event_id') if self.dedup_window else None
+                    if event_id and event_id in stream.seen:
+                        entry_ids.append(stream.seen[event_id][0])
+                        continue
+                    ms, seq = stream.last_key()
+                    key = (ms, seq + 1) if ms >= int(time.time() * 1000) else (int(time.time() * 1000), 0)
+                    entry_id = '{}-{}'.format(*key)
+                    stream.keys.append(key)
+                    stream.entries.append((entry_id, {
+                        name: value.decode() if isinstance(value, bytes) else str(value) for name, value in info.items()
+                    }))
+                    entry_ids.append(entry_id)
+                    if event_id:
+                        stream.seen[event_id] = (entry_id, now + self.dedup_window)
+                result.append(entry_ids)
+                for waiter in stream.waiters:
+                    waiter.notify()
+
+        return result
+
+    def get(self, _topic):
+        """
+        Get all events for a topic, including archived ones.
+
+        :param _topic: The event topic.
+        :return: A list of event entries.
+        """
+        if self.archive:
+            return [entry for entries in self.get_pages(_topic) for entry in entries]
+
+        with self.lock:
+            return list(self.streams[_topic].entries) if _topic in self.streams else []
+
+    def get_range(self, _topic, _start='-', _end='+', _count=None, _reverse=False):
+        """
+        Get a range of events for a topic.
+
+        :param _topic: The event topic.
+        :param _start: The first entry ID, prefix with '(' to exclude it, defaults to the beginning.
+        :param _end: The last entry ID, prefix with '(' to exclude it, defaults to the end.
+        :param _count: Optional maximum number of entries.
+        :param _reverse: Boolean if the entries are returned newest first, the count then applies from the end.
+        :return: A list of event entries.
+        """
+        start, start_exclusive = parse_bound(_start, 0)
+        end, end_exclusive = parse_bound(_end, float('inf'))
+
+        with self.lock:
+            stream = self.streams.get(_topic)
+            if stream is None:
+                return []
+            first = (bisect.bisect_right if start_exclusive else bisect.bisect_left)(stream.keys, start)
+            last = (bisect.bisect_left if end_exclusive else bisect.bisect_right)(stream.keys, end)
+            if _reverse:
+                if _count:
+                    first = max(first, last - _count)
+
+                return stream.entries[first:last][::-1]
+
+            if _count:
+                last = min(last, first + _count)
+
+            return stream.entries[first:last]
+
+    def last_id(self, _topic):
+        """
+        Get the ID of the last entry of a stream.
+
+        :param _topic: The event topic.
+        :return: The entry ID, '0-0' if the stream is empty.
+        """
+        with self.lock:
+            return '{}-{}'.format(*self.streams[_topic].last_key()) if _topic in self.streams else '0-0'
+
+    def get_snapshot(self, _topic):
+        """
+        Get the latest state snapshot of a topic.
+
+        :param _topic: The event topic.
+        :return: A dict with the snapshot or None if there is none.
+        """
+        snapshot = self.snapshots.get(_topic)
+
+        return json.loads(snapshot) if snapshot else None
+
+    def set_snapshot(self, _topic, _snapshot):
+        """
+        Store a state snapshot of a topic, replacing the previous one.
+
+        :param _topic: The event topic.
+        :param _snapshot: A dict with the snapshot.
+        """
+        self.snapshots[_topic] = json.dumps(_snapshot)
+
+    def topics(self):
+        """
+        Get all event topics.
+
+        :return: A list of event topics.
+        """
+        with self.lock:
+            return list(self.streams)
+
+    def retain(self, _topic, _max_len=0, _max_age=0):
+        """
+        Apply a retention policy, entries beyond it are archived first and then trimmed.
+
+        :param _topic: The event topic.
+        :param _max_len: The maximum number of entries to keep, 0 for no limit.
+        :param _max_age: The maximum age of entries in s, 0 for no limit.
+        :return: The number of archived entries.
+        """
+        with self.lock:
+            stream = self.streams.get(_topic)
+            if stream is None:
+                return 0
+            bounds = []
+            if _max_len and len(stream.keys) >= _max_len:
+                bounds.append(stream.keys[-_max_len])
+            if _max_age:
+                ts = time.time() - _max_age
+                # like in Redis, the bound is a legacy ID if no newer entry is old enough, as legacy IDs sort first
+                key = parse_id(ts_id(ts))
+                index = bisect.bisect_left(stream.keys, (EVENT_LEGACY_ID_BOUND, 0))
+                if index == len(stream.keys) or stream.keys[index] >= key:
+                    key = parse_id(legacy_id(ts))
+                bounds.append(key)
+
+        if not bounds:
+            return 0
+
+        min_id = '{}-{}'.format(*max(bounds))
+        archived = 0
+        if self.archive:
+            last_id = self.archive.last_id(_topic)
+            archived = self.archive.write(_topic, self.get_range_pages(
+                _topic, '(' + last_id if last_id else '-', '(' + min_id
+            ))
+
+        with self.lock:
+            trimmed = bisect.bisect_left(stream.keys, max(bounds))
+            del stream.keys[:trimmed]
+            del stream.entries[:trimmed]
+
+        return archived
+
+    def read(self, _topic, _last_id=None, _block=1000):
+        """
+        Read from a stream. This blocks until an entry is added or the time is up.
+
+        :param _topic: The event topic.
+        :param _last_id: Optional entry ID to read after, defaults to new entries only.
+        :param _block: The time to block in ms, defaults to 1000.
+        :return: A list of stream names with event entries, empty if timed out.
+        """
+        with self.lock:
+            stream = self.stream(_topic)
+            key = parse_id(_last_id) if _last_id else stream.last_key()
+            entries = stream.after(key)
+            if not entries and _block is not None:
+                self.wait([stream], lambda: stream.last_key() > key, _block / 1000 if _block else None)
+                entries = stream.after(key)
+
+        return [[EVENT_STREAM_NAME.format(_topic), entries]] if entries else []
+
+    def create_group(self, _topic, _name):
+        """
+        Create a consumer group, ignore if already exists.
+
+        :param _topic: The event topic.
+        :param _name: The consumer group name.
+        """
+        with self.lock:
+            stream = self.stream(_topic)
+            if _name not in stream.groups:
+                stream.groups[_name] = MemoryGroup(stream.last_key())
+
+    def read_group(self, _topics, _name, _group, _block=1000, _no_ack=False):
+        """
+        Read new event stream entries from a group, several topics are read at once.
+
+        :param _topics: The event topic or a list of event topics.
+        :param _name: The name of the consumer.
+        :param _group: The consumer group name.
+        :param _block: The time to block in ms, defaults to 1000.
+        :param _no_ack: Boolean if acknowledge is required.
+        :return: A list of stream names with event entries, empty if timed out.
+        """
+        topics = [_topics] if isinstance(_topics, str) else _topics
+
+        def deliver():
+            result = []
+            for topic in topics:
+                stream = self.streams[topic]
+                group = stream.groups[_group]
+                entries = stream.after(group.last_key)
+                if not entries:
+                    continue
+                group.last_key = parse_id(entries[-1][0])
+                if not _no_ack:
+                    now = time.time()
+                    group.pending.update((entry_id, (_name, now)) for entry_id, entry in entries)
+                result.append([EVENT_STREAM_NAME.format(topic), entries])
+
+            return result
+
+        def ready():
+            return any(
+                self.streams[topic].last_key() > self.streams[topic].groups[_group].last_key for topic in topics
+            )
+
+        with self.lock:
+            if not ready() and _block is not None:
+                self.wait(
+                    [self.streams[topic] for topic in topics],
+                    lambda: ready() or _name in self.unblocked,
+                    _block / 1000 if _block else None,
+                    _name
+                )
+                if _name in self.unblocked:
+                    self.unblocked.discard(_name)
+                    return []
+
+            return deliver()
+
+    def unblock(self, _name):
+        """
+        Wake up the blocking group read of a consumer, it returns as if it timed out.
+
+        :param _name: The name of the consumer.
+        """
+        with self.lock:
+            waiter = self.blocked.get(_name)
+            if waiter:
+                self.unblocked.add(_name)
+                waiter.notify()
+
+    def ack_group(self, _topic, _group, _ids):
+        """
+        Acknowledge processing of group events.
+
+        :param _topic: The event topic.
+        :param _group: The consumer group name.
+        :param _ids: A list of entry IDs.
+        :return: The number of acknowledged entries.
+        """
+        with self.lock:
+            pending = self.streams[_topic].groups[_group].pending
+
+            return sum(1 for entry_id in _ids if pending.pop(entry_id, None))
+
+    def claim_group(self, _topic, _name, _group, _min_idle, _count=EVENT_PAGE_SIZE):
+        """
+        Claim pending entries of a group which were not acknowledged in time, e.g. by a dead consumer.
+
+        :param _topic: The event topic.
+        :param _name: The name of the claiming consumer.
+        :param _group: The consumer group name.
+        :param _min_idle: The minimum time in ms an entry has been pending.
+        :param _count: The maximum number of entries to claim at once, unused.
+        :return: A list of event entries.
+        """
+        claimed = []
+        with self.lock:
+            stream = self.streams[_topic]
+            pending = stream.groups[_group].pending
+            now = time.time()
+            for entry_id, (name, ts) in list(pending.items()):
+                if (now - ts) * 1000 < _min_idle:
+                    continue
+                key = parse_id(entry_id)
+                index = bisect.bisect_left(stream.keys, key)
+                if index == len(stream.keys) or stream.keys[index] != key:
+                    # trimmed meanwhile, like XAUTOCLAIM drop it from the pending entries
+                    del pending[entry_id]
+                    continue
+                pending[entry_id] = (_name, now)
+                claimed.append(stream.entries[index])
+
+        return sorted(claimed, key=lambda entry: parse_id(entry[0]))
+
+    def delete_consumer(self, _topic, _group, _name):
+        """
+        Delete a consumer from a group, unless it has pending entries. Consumers only exist as the owners
+        of pending entries here, so there is nothing to delete, those entries are left to be claimed.
+
+        :param _topic: The event topic.
+        :param _group: The consumer group name.
+        :param _name: The name of the consumer.
+        :return: Boolean if the consumer has no pending entries left.
+        """
+        with self.lock:
+            pending = self.streams[_topic].groups[_group].pending
+
+            return all(name != _name for name, ts in pending.values())
+
+    def group_lags(self):
+        """
+        Get the lag of all consumer groups.
+
+        :return: A dict mapping (topic, group name) tuples to the number of entries not yet delivered or acknowledged.
+        """
+        lags = {}
+        with self.lock:
+            for topic, stream in self.streams.items():
+                for name, group in stream.groups.items():
+                    undelivered = len(stream.keys) - bisect.bisect_right(stream.keys, group.last_key)
+                    lags[(topic, name)] = undelivered + len(group.pending)
+
+        return lags
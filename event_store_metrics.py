@@ -0,0 +1,299 @@
+import bisect
+import functools
+import http.server
+import inspect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+EVENT_METRICS_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+
+def format_labels(_names, _values):
+    """
+    Format the labels of a sample in Prometheus text format.
+
+    :param _names: A list of label names.
+    :param _values: A tuple of label values.
+    :return: The formatted labels, e.g. '{topic="order"}'.
+    """
+    if not _names:
+        return ''
+
+    return '{' + ','.join('{}="{}"'.format(
+        name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    ) for name, value in zip(_names, _values)) + '}'
+
+
+class Metric(object):
+    """
+    Metric class, holds one value per combination of label values.
+    """
+
+    type = 'untyped'
+
+    def __init__(self, _name, _help, _labels=()):
+        """
+        :param _name: The metric name.
+        :param _help: The metric description.
+        :param _labels: A list of label names.
+        """
+        self.name = _name
+        self.help = _help
+        self.labels = list(_labels)
+        self.values = {}
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def remove(self, _labels):
+        """
+        Remove the value of a label combination, e.g. of a closed subscription.
+
+        :param _labels: A tuple of label values.
+        """
+        with self.lock:
+            self.values.pop(_labels, None)
+
+    def samples(self):
+        """
+        Get the samples of the metric.
+
+        :return: A list of tuples with name suffix, label names, label values and value.
+        """
+        with self.lock:
+            return [('', self.labels, labels, value) for labels, value in self.values.items()]
+
+    def render(self):
+        """
+        Render the metric in Prometheus text format.
+
+        :return: A list of lines.
+        """
+        lines = ['# HELP {} {}'.format(self.name, self.help), '# TYPE {} {}'.format(self.name, self.type)]
+        for suffix, names, labels, value in self.samples():
+            lines.append('{}{}{} {}'.format(self.name, suffix, format_labels(names, labels), value))
+
+        return lines
+
+
+class Counter(Metric):
+    """
+    Counter class, a monotonically increasing value.
+    """
+
+    type = 'counter'
+
+    def inc(self, _labels=(), _value=1):
+        """
+        Increase the counter.
+
+        :param _labels: A tuple of label values.
+        :param _value: The amount to increase by.
+        """
+        with self.lock:
+            self.values[_labels] = self.values.get(_labels, 0) + _value
+
+
+class Gauge(Metric):
+    """
+    Gauge class, a value which goes up and down, either set directly or collected on each scrape.
+    """
+
+    type = 'gauge'
+
+    def __init__(self, _name, _help, _labels=()):
+        super(Gauge, self).__init__(_name, _help, _labels)
+        self.collectors = []
+
+    def set(self, _labels, _value):
+        """
+        Set the gauge.
+
+        :param _labels: A tuple of label values.
+        :param _value: The value.
+        """
+        with self.lock:
+            self.values[_labels] = _value
+
+    def inc(self, _labels=(), _value=1):
+        """
+        Increase the gauge.
+
+        :param _labels: A tuple of label values.
+        :param _value: The amount to increase by.
+        """
+        with self.lock:
+            self.values[_labels] = self.values.get(_labels, 0) + _value
+
+    def dec(self, _labels=(), _value=1):
+        """
+        Decrease the gauge.
+
+        :param _labels: A tuple of label values.
+        :param _value: The amount to decrease by.
+        """
+        self.inc(_labels, -_value)
+
+    def add_collector(self, _collect):
+        """
+        Add a function which is called on each scrape.
+
+        :param _collect: A function returning a dict mapping tuples of label values to values.
+        """
+        self.collectors.append(_collect)
+
+    def samples(self):
+        samples = super(Gauge, self).samples()
+        for collect in self.collectors:
+            try:
+                samples.extend(('', self.labels, labels, value) for labels, value in collect().items())
+            except Exception as e:
+                logging.error('error collecting ({}) {}: {}'.format(e.__class__.__name__, self.name, str(e)))
+
+        return samples
+
+
+class Histogram(Metric):
+    """
+    Histogram class, counts observations in cumulative buckets.
+    """
+
+    type = 'histogram'
+
+    def __init__(self, _name, _help, _labels=(), _buckets=EVENT_METRICS_BUCKETS):
+        """
+        :param _name: The metric name.
+        :param _help: The metric description.
+        :param _labels: A list of label names.
+        :param _buckets: A sorted list of upper bucket bounds.
+        """
+        super(Histogram, self).__init__(_name, _help, _labels)
+        self.buckets = list(_buckets)
+
+    def observe(self, _labels, _value):
+        """
+        Observe a value.
+
+        :param _labels: A tuple of label values.
+        :param _value: The value, e.g. a duration in s.
+        """
+        with self.lock:
+            counts, total = self.values.get(_labels, ([0] * (len(self.buckets) + 1), 0))
+            counts[bisect.bisect_left(self.buckets, _value)] += 1
+            self.values[_labels] = (counts, total + _value)
+
+    @contextmanager
+    def time(self, _labels):
+        """
+        Observe the duration of a block.
+
+        :param _labels: A tuple of label values.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(_labels, time.perf_counter() - start)
+
+    def timed(self, _labels):
+        """
+        Decorate a function or coroutine function to observe the duration of each call.
+
+        :param _labels: A tuple of label values.
+        :return: The decorator.
+        """
+        def decorator(_func):
+            if inspect.iscoroutinefunction(_func):
+                @functools.wraps(_func)
+                async def wrapper(*args, **kwargs):
+                    with self.time(_labels):
+                        return await _func(*args, **kwargs)
+            else:
+                @functools.wraps(_func)
+                def wrapper(*args, **kwargs):
+                    with self.time(_labels):
+                        return _func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def samples(self):
+        samples = []
+        names = self.labels + ['le']
+        with self.lock:
+            for labels, (counts, total) in self.values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + ['+Inf'], counts):
+                    cumulative += count
+                    samples.append(('_bucket', names, labels + (bound,), cumulative))
+                samples.append(('_sum', self.labels, labels, total))
+                samples.append(('_count', self.labels, labels, cumulative))
+
+        return samples
+
+
+def render():
+    """
+    Render all metrics in Prometheus text format.
+
+    :return: The exposition text.
+    """
+    return '\n'.join(line for metric in REGISTRY for line in metric.render()) + '\n'
+
+
+def observe_notification(_notification, _subscriber):
+    """
+    Count a notification sent to a subscriber and record its lag, i.e. the time since it was published.
+
+    :param _notification: The notification.
+    :param _subscriber: The subscriber, i.e. the ID of its subscription.
+    """
+    NOTIFICATIONS.inc((_notification.event_topic,))
+    SUBSCRIBER_LAG.set((_notification.event_topic, _subscriber), time.time() - _notification.event_ts)
+
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Metrics Handler class, serves the metrics on every path.
+    """
+
+    def do_GET(self):
+        body = render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(_port):
+    """
+    Serve the metrics for scraping in a background thread.
+
+    :param _port: The port to listen on.
+    :return: The HTTP server.
+    """
+    server = http.server.ThreadingHTTPServer(('', _port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logging.info('serving metrics on port {} ...'.format(_port))
+
+    return server
+
+
+REGISTRY = []
+
+RPC_LATENCY = Histogram('event_store_rpc_seconds', 'Latency of unary RPCs.', ['rpc'])
+ENCODE_LATENCY = Histogram('event_store_encode_seconds', 'Latency of building notifications.', ['rpc'])
+CACHE_READS = Counter('event_store_cache_reads_total', 'Reads of the history cache.', ['result'])
+REDIS_LATENCY = Histogram('event_store_redis_seconds', 'Latency of Redis commands, including blocking.', ['command'])
+SUBSCRIPTIONS = Gauge('event_store_subscriptions', 'Active subscriptions.', ['topic'])
+NOTIFICATIONS = Counter('event_store_notifications_total', 'Notifications sent to subscribers.', ['topic'])
+SUBSCRIBER_LAG = Gauge(
+    'event_store_subscriber_lag_seconds', 'Age of the last notification sent.', ['topic', 'subscriber']
+)
+GROUP_LAG = Gauge('event_store_group_lag', 'Entries not yet delivered or acknowledged.', ['topic', 'group'])
@@ -1,12 +1,22 @@
+# -*- coding: utf-8 -*-
 # Generated by the protocol buffer compiler.  DO NOT EDIT!
+# NO CHECKED-IN PROTOBUF GENCODE
 # source: event_store.proto
-
-import sys
-_b=sys.version_info[0]<3 and (lambda x:x) or (lambda x:x.encode('latin1'))
+# Protobuf Python Version: 7.35.1
+"""Generated protocol buffer code."""
 from google.protobuf import descriptor as _descriptor
-from google.protobuf import message as _message
-from google.protobuf import reflection as _reflection
+from google.protobuf import descriptor_pool as _descriptor_pool
+from google.protobuf import runtime_version as _runtime_version
 from google.protobuf import symbol_database as _symbol_database
+from google.protobuf.internal import builder as _builder
+_runtime_version.ValidateProtobufRuntimeVersion(
+    _runtime_version.Domain.PUBLIC,
+    7,
+    35,
+    1,
+    '',
+    'event_store.proto'
+)
 # @@protoc_insertion_point(imports)
 
 _sym_db = _symbol_database.Default()
@@ -14,415 +24,61 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor.FileDescriptor(
-  name='event_store.proto',
-  package='eventstore',
-  syntax='proto3',
-  serialized_options=None,
-  serialized_pb=_b('\n\x11\x65vent_store.proto\x12\neventstore\"9\n\x0ePublishRequest\x12\x13\n\x0b\x65vent_topic\x18\x01 \x01(\t\x12\x12\n\nevent_info\x18\x02 \x01(\t\"#\n\x0fPublishResponse\x12\x10\n\x08\x65ntry_id\x18\x01 \x01(\t\";\n\x10SubscribeRequest\x12\x13\n\x0b\x65vent_topic\x18\x01 \x01(\t\x12\x12\n\ngroup_name\x18\x02 \x01(\t\"\\\n\x0cNotification\x12\x10\n\x08\x65vent_id\x18\x01 \x01(\t\x12\x10\n\x08\x65vent_ts\x18\x02 \x01(\x01\x12\x14\n\x0c\x65vent_action\x18\x03 \x01(\t\x12\x12\n\nevent_data\x18\x04 \x01(\t\")\n\x12UnsubscribeRequest\x12\x13\n\x0b\x65vent_topic\x18\x01 \x01(\t\"&\n\x13UnsubscribeResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\"!\n\nGetRequest\x12\x13\n\x0b\x65vent_topic\x18\x01 \x01(\t\"\x1d\n\x0bGetResponse\x12\x0e\n\x06\x65vents\x18\x01 \x01(\t2\xa7\x02\n\nEventStore\x12\x44\n\x07publish\x12\x1a.eventstore.PublishRequest\x1a\x1b.eventstore.PublishResponse\"\x00\x12G\n\tsubscribe\x12\x1c.eventstore.SubscribeRequest\x1a\x18.eventstore.Notification\"\x00\x30\x01\x12P\n\x0bunsubscribe\x12\x1e.eventstore.UnsubscribeRequest\x1a\x1f.eventstore.UnsubscribeResponse\"\x00\x12\x38\n\x03get\x12\x16.eventstore.GetRequest\x1a\x17.eventstore.GetResponse\"\x00\x62\x06proto3')
-)
-
-
-
-
-_PUBLISHREQUEST = _descriptor.Descriptor(
-  name='PublishRequest',
-  full_name='eventstore.PublishRequest',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='event_topic', full_name='eventstore.PublishRequest.event_topic', index=0,
-      number=1, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=_b("").decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='event_info', full_name='eventstore.PublishRequest.event_info', index=1,
-      number=2, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=_b("").decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=33,
-  serialized_end=90,
-)
-
-
-_PUBLISHRESPONSE = _descriptor.Descriptor(
-  name='PublishResponse',
-  full_name='eventstore.PublishResponse',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='entry_id', full_name='eventstore.PublishResponse.entry_id', index=0,
-      number=1, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=_b("").decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=92,
-  serialized_end=127,
-)
-
-
-_SUBSCRIBEREQUEST = _descriptor.Descriptor(
-  name='SubscribeRequest',
-  full_name='eventstore.SubscribeRequest',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='event_topic', full_name='eventstore.SubscribeRequest.event_topic', index=0,
-      number=1, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=_b("").decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='group_name', full_name='eventstore.SubscribeRequest.group_name', index=1,
-      number=2, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=_b("").decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=129,
-  serialized_end=188,
-)
-
-
-_NOTIFICATION = _descriptor.Descriptor(
-  name='Notification',
-  full_name='eventstore.Notification',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='event_id', full_name='eventstore.Notification.event_id', index=0,
-      number=1, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=_b("").decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='event_ts', full_name='eventstore.Notification.event_ts', index=1,
-      number=2, type=1, cpp_type=5, label=1,
-      has_default_value=False, default_value=float(0),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='event_action', full_name='eventstore.Notification.event_action', index=2,
-      number=3, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=_b("").decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-    _descriptor.FieldDescriptor(
-      name='event_data', full_name='eventstore.Notification.event_data', index=3,
-      number=4, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=_b("").decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=190,
-  serialized_end=282,
-)
-
-
-_UNSUBSCRIBEREQUEST = _descriptor.Descriptor(
-  name='UnsubscribeRequest',
-  full_name='eventstore.UnsubscribeRequest',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='event_topic', full_name='eventstore.UnsubscribeRequest.event_topic', index=0,
-      number=1, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=_b("").decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=284,
-  serialized_end=325,
-)
-
-
-_UNSUBSCRIBERESPONSE = _descriptor.Descriptor(
-  name='UnsubscribeResponse',
-  full_name='eventstore.UnsubscribeResponse',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='success', full_name='eventstore.UnsubscribeResponse.success', index=0,
-      number=1, type=8, cpp_type=7, label=1,
-      has_default_value=False, default_value=False,
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=327,
-  serialized_end=365,
-)
-
-
-_GETREQUEST = _descriptor.Descriptor(
-  name='GetRequest',
-  full_name='eventstore.GetRequest',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='event_topic', full_name='eventstore.GetRequest.event_topic', index=0,
-      number=1, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=_b("").decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=367,
-  serialized_end=400,
-)
-
-
-_GETRESPONSE = _descriptor.Descriptor(
-  name='GetResponse',
-  full_name='eventstore.GetResponse',
-  filename=None,
-  file=DESCRIPTOR,
-  containing_type=None,
-  fields=[
-    _descriptor.FieldDescriptor(
-      name='events', full_name='eventstore.GetResponse.events', index=0,
-      number=1, type=9, cpp_type=9, label=1,
-      has_default_value=False, default_value=_b("").decode('utf-8'),
-      message_type=None, enum_type=None, containing_type=None,
-      is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
-  ],
-  extensions=[
-  ],
-  nested_types=[],
-  enum_types=[
-  ],
-  serialized_options=None,
-  is_extendable=False,
-  syntax='proto3',
-  extension_ranges=[],
-  oneofs=[
-  ],
-  serialized_start=402,
-  serialized_end=431,
-)
-
-DESCRIPTOR.message_types_by_name['PublishRequest'] = _PUBLISHREQUEST
-DESCRIPTOR.message_types_by_name['PublishResponse'] = _PUBLISHRESPONSE
-DESCRIPTOR.message_types_by_name['SubscribeRequest'] = _SUBSCRIBEREQUEST
-DESCRIPTOR.message_types_by_name['Notification'] = _NOTIFICATION
-DESCRIPTOR.message_types_by_name['UnsubscribeRequest'] = _UNSUBSCRIBEREQUEST
-DESCRIPTOR.message_types_by_name['UnsubscribeResponse'] = _UNSUBSCRIBERESPONSE
-DESCRIPTOR.message_types_by_name['GetRequest'] = _GETREQUEST
-DESCRIPTOR.message_types_by_name['GetResponse'] = _GETRESPONSE
-_sym_db.RegisterFileDescriptor(DESCRIPTOR)
-
-PublishRequest = _reflection.GeneratedProtocolMessageType('PublishRequest', (_message.Message,), dict(
-  DESCRIPTOR = _PUBLISHREQUEST,
-  __module__ = 'event_store_pb2'
-  # @@protoc_insertion_point(class_scope:eventstore.PublishRequest)
-  ))
-_sym_db.RegisterMessage(PublishRequest)
-
-PublishResponse = _reflection.GeneratedProtocolMessageType('PublishResponse', (_message.Message,), dict(
-  DESCRIPTOR = _PUBLISHRESPONSE,
-  __module__ = 'event_store_pb2'
-  # @@protoc_insertion_point(class_scope:eventstore.PublishResponse)
-  ))
-_sym_db.RegisterMessage(PublishResponse)
-
-SubscribeRequest = _reflection.GeneratedProtocolMessageType('SubscribeRequest', (_message.Message,), dict(
-  DESCRIPTOR = _SUBSCRIBEREQUEST,
-  __module__ = 'event_store_pb2'
-  # @@protoc_insertion_point(class_scope:eventstore.SubscribeRequest)
-  ))
-_sym_db.RegisterMessage(SubscribeRequest)
-
-Notification = _reflection.GeneratedProtocolMessageType('Notification', (_message.Message,), dict(
-  DESCRIPTOR = _NOTIFICATION,
-  __module__ = 'event_store_pb2'
-  # @@protoc_insertion_point(class_scope:eventstore.Notification)
-  ))
-_sym_db.RegisterMessage(Notification)
-
-UnsubscribeRequest = _reflection.GeneratedProtocolMessageType('UnsubscribeRequest', (_message.Message,), dict(
-  DESCRIPTOR = _UNSUBSCRIBEREQUEST,
-  __module__ = 'event_store_pb2'
-  # @@protoc_insertion_point(class_scope:eventstore.UnsubscribeRequest)
-  ))
-_sym_db.RegisterMessage(UnsubscribeRequest)
-
-UnsubscribeResponse = _reflection.GeneratedProtocolMessageType('UnsubscribeResponse', (_message.Message,), dict(
-  DESCRIPTOR = _UNSUBSCRIBERESPONSE,
-  __module__ = 'event_store_pb2'
-  # @@protoc_insertion_point(class_scope:eventstore.UnsubscribeResponse)
-  ))
-_sym_db.RegisterMessage(UnsubscribeResponse)
-
-GetRequest = _reflection.GeneratedProtocolMessageType('GetRequest', (_message.Message,), dict(
-  DESCRIPTOR = _GETREQUEST,
-  __module__ = 'event_store_pb2'
-  # @@protoc_insertion_point(class_scope:eventstore.GetRequest)
-  ))
-_sym_db.RegisterMessage(GetRequest)
-
-GetResponse = _reflection.GeneratedProtocolMessageType('GetResponse', (_message.Message,), dict(
-  DESCRIPTOR = _GETRESPONSE,
-  __module__ = 'event_store_pb2'
-  # @@protoc_insertion_point(class_scope:eventstore.GetResponse)
-  ))
-_sym_db.RegisterMessage(GetResponse)
-
-
-
-_EVENTSTORE = _descriptor.ServiceDescriptor(
-  name='EventStore',
-  full_name='eventstore.EventStore',
-  file=DESCRIPTOR,
-  index=0,
-  serialized_options=None,
-  serialized_start=434,
-  serialized_end=729,
-  methods=[
-  _descriptor.MethodDescriptor(
-    name='publish',
-    full_name='eventstore.EventStore.publish',
-    index=0,
-    containing_service=None,
-    input_type=_PUBLISHREQUEST,
-    output_type=_PUBLISHRESPONSE,
-    serialized_options=None,
-  ),
-  _descriptor.MethodDescriptor(
-    name='subscribe',
-    full_name='eventstore.EventStore.subscribe',
-    index=1,
-    containing_service=None,
-    input_type=_SUBSCRIBEREQUEST,
-    output_type=_NOTIFICATION,
-    serialized_options=None,
-  ),
-  _descriptor.MethodDescriptor(
-    name='unsubscribe',
-    full_name='eventstore.EventStore.unsubscribe',
-    index=2,
-    containing_service=None,
-    input_type=_UNSUBSCRIBEREQUEST,
-    output_type=_UNSUBSCRIBERESPONSE,
-    serialized_options=None,
-  ),
-  _descriptor.MethodDescriptor(
-    name='get',
-    full_name='eventstore.EventStore.get',
-    index=3,
-    containing_service=None,
-    input_type=_GETREQUEST,
-    output_type=_GETRESPONSE,
-    serialized_options=None,
-  ),
-])
-_sym_db.RegisterServiceDescriptor(_EVENTSTORE)
-
-DESCRIPTOR.services_by_name['EventStore'] = _EVENTSTORE
-
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x11\x65vent_store.proto\x12\neventstore\"X\n\x05\x45vent\x12\x10\n\x08\x65vent_id\x18\x01 \x01(\t\x12\x14\n\x0c\x65vent_action\x18\x02 \x01(\t\x12\x12\n\nevent_data\x18\x03 \x01(\x0c\x12\x13\n\x0b\x65vent_codec\x18\x04 \x01(\t\"p\n\x0ePublishRequest\x12\x13\n\x0b\x65vent_topic\x18\x01 \x01(\t\x12\x12\n\nevent_info\x18\x02 \x01(\t\x12 \n\x05\x65vent\x18\x03 \x01(\x0b\x32\x11.eventstore.Event\x12\x13\n\x0b\x65xpected_id\x18\x04 \x01(\t\"#\n\x0fPublishResponse\x12\x10\n\x08\x65ntry_id\x18\x01 \x01(\t\"w\n\x13PublishBatchRequest\x12\x13\n\x0b\x65vent_topic\x18\x01 \x01(\t\x12\x13\n\x0b\x65vent_infos\x18\x02 \x03(\t\x12!\n\x06\x65vents\x18\x03 \x03(\x0b\x32\x11.eventstore.Event\x12\x13\n\x0b\x65xpected_id\x18\x04 \x01(\t\")\n\x14PublishBatchResponse\x12\x11\n\tentry_ids\x18\x01 \x03(\t\"G\n\x13PublishMultiRequest\x12\x30\n\x07\x62\x61tches\x18\x01 \x03(\x0b\x32\x1f.eventstore.PublishBatchRequest\"I\n\x14PublishMultiResponse\x12\x31\n\x07\x62\x61tches\x18\x01 \x03(\x0b\x32 .eventstore.PublishBatchResponse\"\xc4\x02\n\x10SubscribeRequest\x12\x13\n\x0b\x65vent_topic\x18\x01 \x01(\t\x12\x12\n\ngroup_name\x18\x02 \x01(\t\x12\x14\n\x0c\x65vent_topics\x18\x03 \x03(\t\x12\x0b\n\x03\x61\x63k\x18\x04 \x01(\x08\x12=\n\tstart_ids\x18\x05 \x03(\x0b\x32*.eventstore.SubscribeRequest.StartIdsEntry\x12\x10\n\x08start_ts\x18\x06 \x01(\x01\x12\x16\n\x0e\x66rom_beginning\x18\x07 \x01(\x08\x12\"\n\x06\x66ilter\x18\x08 \x01(\x0b\x32\x12.eventstore.Filter\x12\x17\n\x0fsubscription_id\x18\t \x01(\t\x12\r\n\x05typed\x18\n \x01(\x08\x1a/\n\rStartIdsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"\x8b\x01\n\x06\x46ilter\x12\x15\n\revent_actions\x18\x01 \x03(\t\x12\x37\n\x0b\x64\x61ta_equals\x18\x02 \x03(\x0b\x32\".eventstore.Filter.DataEqualsEntry\x1a\x31\n\x0f\x44\x61taEqualsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\"\xa5\x01\n\x0cNotification\x12\x10\n\x08\x65vent_id\x18\x01 \x01(\t\x12\x10\n\x08\x65vent_ts\x18\x02 \x01(\x01\x12\x14\n\x0c\x65vent_action\x18\x03 \x01(\t\x12\x12\n\nevent_data\x18\x04 \x01(\t\x12\x10\n\x08\x65ntry_id\x18\x05 \x01(\t\x12 \n\x05\x65vent\x18\x06 \x01(\x0b\x32\x11.eventstore.Event\x12\x13\n\x0b\x65vent_topic\x18\x07 \x01(\t\"B\n\x12UnsubscribeRequest\x12\x13\n\x0b\x65vent_topic\x18\x01 \x01(\t\x12\x17\n\x0fsubscription_id\x18\x02 \x01(\t\"&\n\x13UnsubscribeResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\"C\n\nGetRequest\x12\x13\n\x0b\x65vent_topic\x18\x01 \x01(\t\x12\x11\n\tpage_size\x18\x02 \x01(\x05\x12\r\n\x05typed\x18\x03 \x01(\x08\"N\n\x0bGetResponse\x12\x0e\n\x06\x65vents\x18\x01 \x01(\t\x12/\n\rnotifications\x18\x02 \x03(\x0b\x32\x18.eventstore.Notification\":\n\x07GetPage\x12/\n\rnotifications\x18\x01 \x03(\x0b\x32\x18.eventstore.Notification\"\x87\x01\n\x0cQueryRequest\x12\x13\n\x0b\x65vent_topic\x18\x01 \x01(\t\x12\x10\n\x08start_id\x18\x02 \x01(\t\x12\x0e\n\x06\x65nd_id\x18\x03 \x01(\t\x12\x10\n\x08start_ts\x18\x04 \x01(\x01\x12\x0e\n\x06\x65nd_ts\x18\x05 \x01(\x01\x12\r\n\x05\x63ount\x18\x06 \x01(\x05\x12\x0f\n\x07reverse\x18\x07 \x01(\x08\"H\n\nAckRequest\x12\x13\n\x0b\x65vent_topic\x18\x01 \x01(\t\x12\x12\n\ngroup_name\x18\x02 \x01(\t\x12\x11\n\tentry_ids\x18\x03 \x03(\t\"\x1e\n\x0b\x41\x63kResponse\x12\x0f\n\x07success\x18\x01 \x01(\x08\"5\n\x0b\x45ntityState\x12\x11\n\tentity_id\x18\x01 \x01(\t\x12\x13\n\x0b\x65ntity_data\x18\x02 \x01(\x0c\"N\n\x10GetStateResponse\x12)\n\x08\x65ntities\x18\x01 \x03(\x0b\x32\x17.eventstore.EntityState\x12\x0f\n\x07last_id\x18\x02 \x01(\t2\xd0\x05\n\nEventStore\x12\x44\n\x07publish\x12\x1a.eventstore.PublishRequest\x1a\x1b.eventstore.PublishResponse\"\x00\x12T\n\rpublish_batch\x12\x1f.eventstore.PublishBatchRequest\x1a .eventstore.PublishBatchResponse\"\x00\x12T\n\rpublish_multi\x12\x1f.eventstore.PublishMultiRequest\x1a .eventstore.PublishMultiResponse\"\x00\x12G\n\tsubscribe\x12\x1c.eventstore.SubscribeRequest\x1a\x18.eventstore.Notification\"\x00\x30\x01\x12P\n\x0bunsubscribe\x12\x1e.eventstore.UnsubscribeRequest\x1a\x1f.eventstore.UnsubscribeResponse\"\x00\x12\x38\n\x03get\x12\x16.eventstore.GetRequest\x1a\x17.eventstore.GetResponse\"\x00\x12<\n\tget_pages\x12\x16.eventstore.GetRequest\x1a\x13.eventstore.GetPage\"\x00\x30\x01\x12:\n\x03\x61\x63k\x12\x16.eventstore.AckRequest\x1a\x17.eventstore.AckResponse\"\x00(\x01\x12\x43\n\tget_state\x12\x16.eventstore.GetRequest\x1a\x1c.eventstore.GetStateResponse\"\x00\x12<\n\x05query\x12\x18.eventstore.QueryRequest\x1a\x17.eventstore.GetResponse\"\x00\x62\x06proto3')
+
+_globals = globals()
+_builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
+_builder.BuildTopDescriptorsAndMessages(DESCRIPTOR, 'event_store_pb2', _globals)
+if not _descriptor._USE_C_DESCRIPTORS:
+  DESCRIPTOR._loaded_options = None
+  _globals['_SUBSCRIBEREQUEST_STARTIDSENTRY']._loaded_options = None
+  _globals['_SUBSCRIBEREQUEST_STARTIDSENTRY']._serialized_options = b'8\001'
+  _globals['_FILTER_DATAEQUALSENTRY']._loaded_options = None
+  _globals['_FILTER_DATAEQUALSENTRY']._serialized_options = b'8\001'
+  _globals['_EVENT']._serialized_start=33
+  _globals['_EVENT']._serialized_end=121
+  _globals['_PUBLISHREQUEST']._serialized_start=123
+  _globals['_PUBLISHREQUEST']._serialized_end=235
+  _globals['_PUBLISHRESPONSE']._serialized_start=237
+  _globals['_PUBLISHRESPONSE']._serialized_end=272
+  _globals['_PUBLISHBATCHREQUEST']._serialized_start=274
+  _globals['_PUBLISHBATCHREQUEST']._serialized_end=393
+  _globals['_PUBLISHBATCHRESPONSE']._serialized_start=395
+  _globals['_PUBLISHBATCHRESPONSE']._serialized_end=436
+  _globals['_PUBLISHMULTIREQUEST']._serialized_start=438
+  _globals['_PUBLISHMULTIREQUEST']._serialized_end=509
+  _globals['_PUBLISHMULTIRESPONSE']._serialized_start=511
+  _globals['_PUBLISHMULTIRESPONSE']._serialized_end=584
+  _globals['_SUBSCRIBEREQUEST']._serialized_start=587
+  _globals['_SUBSCRIBEREQUEST']._serialized_end=911
+  _globals['_SUBSCRIBEREQUEST_STARTIDSENTRY']._serialized_start=864
+  _globals['_SUBSCRIBEREQUEST_STARTIDSENTRY']._serialized_end=911
+  _globals['_FILTER']._serialized_start=914
+  _globals['_FILTER']._serialized_end=1053
+  _globals['_FILTER_DATAEQUALSENTRY']._serialized_start=1004
+  _globals['_FILTER_DATAEQUALSENTRY']._serialized_end=1053
+  _globals['_NOTIFICATION']._serialized_start=1056
+  _globals['_NOTIFICATION']._serialized_end=1221
+  _globals['_UNSUBSCRIBEREQUEST']._serialized_start=1223
+  _globals['_UNSUBSCRIBEREQUEST']._serialized_end=1289
+  _globals['_UNSUBSCRIBERESPONSE']._serialized_start=1291
+  _globals['_UNSUBSCRIBERESPONSE']._serialized_end=1329
+  _globals['_GETREQUEST']._serialized_start=1331
+  _globals['_GETREQUEST']._serialized_end=1398
+  _globals['_GETRESPONSE']._serialized_start=1400
+  _globals['_GETRESPONSE']._serialized_end=1478
+  _globals['_GETPAGE']._serialized_start=1480
+  _globals['_GETPAGE']._serialized_end=1538
+  _globals['_QUERYREQUEST']._serialized_start=1541
+  _globals['_QUERYREQUEST']._serialized_end=1676
+  _globals['_ACKREQUEST']._serialized_start=1678
+  _globals['_ACKREQUEST']._serialized_end=1750
+  _globals['_ACKRESPONSE']._serialized_start=1752
+  _globals['_ACKRESPONSE']._serialized_end=1782
+  _globals['_ENTITYSTATE']._serialized_start=1784
+  _globals['_ENTITYSTATE']._serialized_end=1837
+  _globals['_GETSTATERESPONSE']._serialized_start=1839
+  _globals['_GETSTATERESPONSE']._serialized_end=1917
+  _globals['_EVENTSTORE']._serialized_start=1920
+  _globals['_EVENTSTORE']._serialized_end=2640
 # @@protoc_insertion_point(module_scope)
@@ -1,97 +1,484 @@
 # Generated by the gRPC Python protocol compiler plugin. DO NOT EDIT!
+"""Client and server classes corresponding to protobuf-defined services."""
 import grpc
+import warnings
 
 import event_store_pb2 as event__store__pb2
 
+GRPC_GENERATED_VERSION = '1.84.0'
+GRPC_VERSION = grpc.__version__
+_version_not_supported = False
 
-class EventStoreStub(object):
-  # missing associated documentation comment in .proto file
-  pass
-
-  def __init__(self, channel):
-    """Constructor.
-
-    Args:
-      channel: A grpc.Channel.
-    """
-    self.publish = channel.unary_unary(
-        '/eventstore.EventStore/publish',
-        request_serializer=event__store__pb2.PublishRequest.SerializeToString,
-        response_deserializer=event__store__pb2.PublishResponse.FromString,
-        )
-    self.subscribe = channel.unary_stream(
-        '/eventstore.EventStore/subscribe',
-        request_serializer=event__store__pb2.SubscribeRequest.SerializeToString,
-        response_deserializer=event__store__pb2.Notification.FromString,
-        )
-    self.unsubscribe = channel.unary_unary(
-        '/eventstore.EventStore/unsubscribe',
-        request_serializer=event__store__pb2.UnsubscribeRequest.SerializeToString,
-        response_deserializer=event__store__pb2.UnsubscribeResponse.FromString,
-        )
-    self.get = channel.unary_unary(
-        '/eventstore.EventStore/get',
-        request_serializer=event__store__pb2.GetRequest.SerializeToString,
-        response_deserializer=event__store__pb2.GetResponse.FromString,
-        )
-
-
-class EventStoreServicer(object):
-  # missing associated documentation comment in .proto file
-  pass
-
-  def publish(self, request, context):
-    # missing associated documentation comment in .proto file
-    pass
-    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
-    context.set_details('Method not implemented!')
-    raise NotImplementedError('Method not implemented!')
-
-  def subscribe(self, request, context):
-    # missing associated documentation comment in .proto file
-    pass
-    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
-    context.set_details('Method not implemented!')
-    raise NotImplementedError('Method not implemented!')
-
-  def unsubscribe(self, request, context):
-    # missing associated documentation comment in .proto file
-    pass
-    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
-    context.set_details('Method not implemented!')
-    raise NotImplementedError('Method not implemented!')
-
-  def get(self, request, context):
-    # missing associated documentation comment in .proto file
-    pass
-    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
-    context.set_details('Method not implemented!')
-    raise NotImplementedError('Method not implemented!')
+try:
+    from grpc._utilities import first_version_is_lower
+    _version_not_supported = first_version_is_lower(GRPC_VERSION, GRPC_GENERATED_VERSION)
+except ImportError:
+    _version_not_supported = True
+
+if _version_not_supported:
+    raise RuntimeError(
+        f'The grpc package installed is at version {GRPC_VERSION},'
+        + ' but the generated code in event_store_pb2_grpc.py depends on'
+        + f' grpcio>={GRPC_GENERATED_VERSION}.'
+        + f' Please upgrade your grpc module to grpcio>={GRPC_GENERATED_VERSION}'
+        + f' or downgrade your generated code using grpcio-tools<={GRPC_VERSION}.'
+    )
+
+
+class EventStoreStub:
+    """Missing associated documentation comment in .proto file."""
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.publish = channel.unary_unary(
+                '/eventstore.EventStore/publish',
+                request_serializer=event__store__pb2.PublishRequest.SerializeToString,
+                response_deserializer=event__store__pb2.PublishResponse.FromString,
+                _registered_method=True)
+        self.publish_batch = channel.unary_unary(
+                '/eventstore.EventStore/publish_batch',
+                request_serializer=event__store__pb2.PublishBatchRequest.SerializeToString,
+                response_deserializer=event__store__pb2.PublishBatchResponse.FromString,
+                _registered_method=True)
+        self.publish_multi = channel.unary_unary(
+                '/eventstore.EventStore/publish_multi',
+                request_serializer=event__store__pb2.PublishMultiRequest.SerializeToString,
+                response_deserializer=event__store__pb2.PublishMultiResponse.FromString,
+                _registered_method=True)
+        self.subscribe = channel.unary_stream(
+                '/eventstore.EventStore/subscribe',
+                request_serializer=event__store__pb2.SubscribeRequest.SerializeToString,
+                response_deserializer=event__store__pb2.Notification.FromString,
+                _registered_method=True)
+        self.unsubscribe = channel.unary_unary(
+                '/eventstore.EventStore/unsubscribe',
+                request_serializer=event__store__pb2.UnsubscribeRequest.SerializeToString,
+                response_deserializer=event__store__pb2.UnsubscribeResponse.FromString,
+                _registered_method=True)
+        self.get = channel.unary_unary(
+                '/eventstore.EventStore/get',
+                request_serializer=event__store__pb2.GetRequest.SerializeToString,
+                response_deserializer=event__store__pb2.GetResponse.FromString,
+                _registered_method=True)
+        self.get_pages = channel.unary_stream(
+                '/eventstore.EventStore/get_pages',
+                request_serializer=event__store__pb2.GetRequest.SerializeToString,
+                response_deserializer=event__store__pb2.GetPage.FromString,
+                _registered_method=True)
+        self.ack = channel.stream_unary(
+                '/eventstore.EventStore/ack',
+                request_serializer=event__store__pb2.AckRequest.SerializeToString,
+                response_deserializer=event__store__pb2.AckResponse.FromString,
+                _registered_method=True)
+        self.get_state = channel.unary_unary(
+                '/eventstore.EventStore/get_state',
+                request_serializer=event__store__pb2.GetRequest.SerializeToString,
+                response_deserializer=event__store__pb2.GetStateResponse.FromString,
+                _registered_method=True)
+        self.query = channel.unary_unary(
+                '/eventstore.EventStore/query',
+                request_serializer=event__store__pb2.QueryRequest.SerializeToString,
+                response_deserializer=event__store__pb2.GetResponse.FromString,
+                _registered_method=True)
+
+
+class EventStoreServicer:
+    """Missing associated documentation comment in .proto file."""
+
+    def publish(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def publish_batch(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def publish_multi(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def subscribe(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def unsubscribe(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def get(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def get_pages(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def ack(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def get_state(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def query(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
 
 
 def add_EventStoreServicer_to_server(servicer, server):
-  rpc_method_handlers = {
-      'publish': grpc.unary_unary_rpc_method_handler(
-          servicer.publish,
-          request_deserializer=event__store__pb2.PublishRequest.FromString,
-          response_serializer=event__store__pb2.PublishResponse.SerializeToString,
-      ),
-      'subscribe': grpc.unary_stream_rpc_method_handler(
-          servicer.subscribe,
-          request_deserializer=event__store__pb2.SubscribeRequest.FromString,
-          response_serializer=event__store__pb2.Notification.SerializeToString,
-      ),
-      'unsubscribe': grpc.unary_unary_rpc_method_handler(
-          servicer.unsubscribe,
-          request_deserializer=event__store__pb2.UnsubscribeRequest.FromString,
-          response_serializer=event__store__pb2.UnsubscribeResponse.SerializeToString,
-      ),
-      'get': grpc.unary_unary_rpc_method_handler(
-          servicer.get,
-          request_deserializer=event__store__pb2.GetRequest.FromString,
-          response_serializer=event__store__pb2.GetResponse.SerializeToString,
-      ),
-  }
-  generic_handler = grpc.method_handlers_generic_handler(
-      'eventstore.EventStore', rpc_method_handlers)
-  server.add_generic_rpc_handlers((generic_handler,))
+    rpc_method_handlers = {
+            'publish': grpc.unary_unary_rpc_method_handler(
+                    servicer.publish,
+                    request_deserializer=event__store__pb2.PublishRequest.FromString,
+                    response_serializer=event__store__pb2.PublishResponse.SerializeToString,
+            ),
+            'publish_batch': grpc.unary_unary_rpc_method_handler(
+                    servicer.publish_batch,
+                    request_deserializer=event__store__pb2.PublishBatchRequest.FromString,
+                    response_serializer=event__store__pb2.PublishBatchResponse.SerializeToString,
+            ),
+            'publish_multi': grpc.unary_unary_rpc_method_handler(
+                    servicer.publish_multi,
+                    request_deserializer=event__store__pb2.PublishMultiRequest.FromString,
+                    response_serializer=event__store__pb2.PublishMultiResponse.SerializeToString,
+            ),
+            'subscribe': grpc.unary_stream_rpc_method_handler(
+                    servicer.subscribe,
+                    request_deserializer=event__store__pb2.SubscribeRequest.FromString,
+                    response_serializer=event__store__pb2.Notification.SerializeToString,
+            ),
+            'unsubscribe': grpc.unary_unary_rpc_method_handler(
+                    servicer.unsubscribe,
+                    request_deserializer=event__store__pb2.UnsubscribeRequest.FromString,
+                    response_serializer=event__store__pb2.UnsubscribeResponse.SerializeToString,
+            ),
+            'get': grpc.unary_unary_rpc_method_handler(
+                    servicer.get,
+                    request_deserializer=event__store__pb2.GetRequest.FromString,
+                    response_serializer=event__store__pb2.GetResponse.SerializeToString,
+            ),
+            'get_pages': grpc.unary_stream_rpc_method_handler(
+                    servicer.get_pages,
+                    request_deserializer=event__store__pb2.GetRequest.FromString,
+                    response_serializer=event__store__pb2.GetPage.SerializeToString,
+            ),
+            'ack': grpc.stream_unary_rpc_method_handler(
+                    servicer.ack,
+                    request_deserializer=event__store__pb2.AckRequest.FromString,
+                    response_serializer=event__store__pb2.AckResponse.SerializeToString,
+            ),
+            'get_state': grpc.unary_unary_rpc_method_handler(
+                    servicer.get_state,
+                    request_deserializer=event__store__pb2.GetRequest.FromString,
+                    response_serializer=event__store__pb2.GetStateResponse.SerializeToString,
+            ),
+            'query': grpc.unary_unary_rpc_method_handler(
+                    servicer.query,
+                    request_deserializer=event__store__pb2.QueryRequest.FromString,
+                    response_serializer=event__store__pb2.GetResponse.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'eventstore.EventStore', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('eventstore.EventStore', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class EventStore:
+    """Missing associated documentation comment in .proto file."""
+
+    @staticmethod
+    def publish(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/eventstore.EventStore/publish',
+            event__store__pb2.PublishRequest.SerializeToString,
+            event__store__pb2.PublishResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def publish_batch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/eventstore.EventStore/publish_batch',
+            event__store__pb2.PublishBatchRequest.SerializeToString,
+            event__store__pb2.PublishBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def publish_multi(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/eventstore.EventStore/publish_multi',
+            event__store__pb2.PublishMultiRequest.SerializeToString,
+            event__store__pb2.PublishMultiResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def subscribe(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/eventstore.EventStore/subscribe',
+            event__store__pb2.SubscribeRequest.SerializeToString,
+            event__store__pb2.Notification.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def unsubscribe(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/eventstore.EventStore/unsubscribe',
+            event__store__pb2.UnsubscribeRequest.SerializeToString,
+            event__store__pb2.UnsubscribeResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def get(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/eventstore.EventStore/get',
+            event__store__pb2.GetRequest.SerializeToString,
+            event__store__pb2.GetResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def get_pages(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/eventstore.EventStore/get_pages',
+            event__store__pb2.GetRequest.SerializeToString,
+            event__store__pb2.GetPage.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def ack(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/eventstore.EventStore/ack',
+            event__store__pb2.AckRequest.SerializeToString,
+            event__store__pb2.AckResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def get_state(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/eventstore.EventStore/get_state',
+            event__store__pb2.GetRequest.SerializeToString,
+            event__store__pb2.GetStateResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def query(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/eventstore.EventStore/query',
+            event__store__pb2.QueryRequest.SerializeToString,
+            event__store__pb2.GetResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
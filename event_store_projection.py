@@ -0,0 +1,96 @@
+import json
+
+from event_store_codec import entry_json
+
+EVENT_SNAPSHOT_INTERVAL = 1000
+
+
+def apply_entry(_entities, _entry):
+    """
+    Apply an event to the state of the entities of a topic.
+
+    :param _entities: A dict mapping entity IDs to entity properties, updated in place.
+    :param _entry: A dict with the event information, skipped if its payload is not a JSON object.
+    """
+    try:
+        data = json.loads(entry_json(_entry))
+    except ValueError:
+        return
+    if not isinstance(data, dict):
+        return
+
+    entity_id = data.get('entity_id')
+    if not entity_id:
+        return
+
+    action = _entry['event_action']
+    if action == 'entity_created':
+        _entities[entity_id] = data
+    elif action == 'entity_updated':
+        _entities[entity_id] = dict(_entities.get(entity_id, {}), **data)
+    elif action == 'entity_deleted':
+        _entities.pop(entity_id, None)
+
+
+class EntityProjection(object):
+    """
+    Entity Projection class, folds the events of a topic into the current state of its entities.
+    """
+
+    def __init__(self, _core, _interval=EVENT_SNAPSHOT_INTERVAL):
+        """
+        :param _core: The event store core.
+        :param _interval: The number of events applied after a snapshot until a new one is stored.
+        """
+        self.core = _core
+        self.interval = _interval
+
+    def get_state(self, _topic):
+        """
+        Get the current state of the entities of a topic, starting at the latest snapshot.
+
+        :param _topic: The event topic.
+        :return: The last applied entry ID and a dict mapping entity IDs to entity properties.
+        """
+        snapshot = self.core.get_snapshot(_topic) or {'last_id': None, 'entities': {}}
+        last_id, entities = snapshot['last_id'], snapshot['entities']
+
+        applied = 0
+        for entries in self.core.get_pages(_topic, _start='(' + last_id if last_id else '-'):
+            for entry_id, entry in entries:
+                apply_entry(entities, entry)
+            last_id = entries[-1][0]
+            applied += len(entries)
+
+        if applied >= self.interval:
+            self.core.set_snapshot(_topic, {'last_id': last_id, 'entities': entities})
+
+        return last_id, entities
+
+
+class AsyncEntityProjection(EntityProjection):
+    """
+    Async Entity Projection class, folds the events of a topic into the current state of its entities.
+    """
+
+    async def get_state(self, _topic):
+        """
+        Get the current state of the entities of a topic, starting at the latest snapshot.
+
+        :param _topic: The event topic.
+        :return: The last applied entry ID and a dict mapping entity IDs to entity properties.
+        """
+        snapshot = await self.core.get_snapshot(_topic) or {'last_id': None, 'entities': {}}
+        last_id, entities = snapshot['last_id'], snapshot['entities']
+
+        applied = 0
+        async for entries in self.core.get_pages(_topic, _start='(' + last_id if last_id else '-'):
+            for entry_id, entry in entries:
+                apply_entry(entities, entry)
+            last_id = entries[-1][0]
+            applied += len(entries)
+
+        if applied >= self.interval:
+            await self.core.set_snapshot(_topic, {'last_id': last_id, 'entities': entities})
+
+        return last_id, entities
@@ -1,15 +1,28 @@
 import json
 import logging
 import os
+import queue
+import re
 import signal
+import threading
 import time
+import uuid
 from concurrent.futures import ThreadPoolExecutor
 
 import grpc
 
-from event_store_core import EventStore
-
-from event_store_pb2 import PublishResponse, Notification, UnsubscribeResponse, GetResponse
+from event_store_archive import Archive, parse_policies, parse_id
+from event_store_cache import HistoryCache, EVENT_CACHE_BUDGET
+from event_store_codec import parse_thresholds, compress_info, entry_data, entry_json
+from event_store_core import EventStore, ConcurrencyError, stream_topic, ts_id, id_ts, EVENT_PAGE_SIZE
+from event_store_memory import MemoryEventStore
+from event_store_shard import ShardedEventStore, parse_nodes
+from event_store_metrics import RPC_LATENCY, ENCODE_LATENCY, CACHE_READS, SUBSCRIPTIONS, SUBSCRIBER_LAG, GROUP_LAG, \
+    observe_notification, serve_metrics
+from event_store_projection import EntityProjection
+
+from event_store_pb2 import Event, PublishResponse, PublishBatchResponse, PublishMultiResponse, Notification, \
+    UnsubscribeResponse, GetResponse, GetPage, AckResponse, EntityState, GetStateResponse
 from event_store_pb2_grpc import EventStoreServicer, add_EventStoreServicer_to_server
 
 
@@ -19,87 +32,793 @@ class EventStoreServer(EventStoreServicer):
     """
 
     def __init__(self):
-        self.core = EventStore(EVENT_STORE_REDIS_HOST, EVENT_STORE_REDIS_PORT)
-        self.subscribers = {}
-
+        self.archive = Archive(EVENT_STORE_ARCHIVE_DIR) if EVENT_STORE_ARCHIVE_DIR else None
+        if EVENT_STORE_BACKEND == 'memory':
+            self.core = MemoryEventStore(self.archive, EVENT_STORE_DEDUP_WINDOW)
+        elif EVENT_STORE_REDIS_NODES:
+            self.core = ShardedEventStore(parse_nodes(EVENT_STORE_REDIS_NODES), self.archive, EVENT_STORE_DEDUP_WINDOW)
+        else:
+            self.core = EventStore(
+                EVENT_STORE_REDIS_HOST, EVENT_STORE_REDIS_PORT, self.archive, EVENT_STORE_DEDUP_WINDOW
+            )
+        self.projection = EntityProjection(self.core, EVENT_STORE_SNAPSHOT_INTERVAL)
+        self.cache = HistoryCache(EVENT_STORE_CACHE_BUDGET) if EVENT_STORE_CACHE_BUDGET else None
+        self.subscriptions = {}
+        self.readers = {}
+        self.lock = threading.Lock()
+        self.acknowledger = Acknowledger(self.core, EVENT_STORE_ACK_INTERVAL)
+        self.acknowledger.start()
+        self.retainer = None
+        GROUP_LAG.add_collector(self.core.group_lags)
+
+        if EVENT_STORE_RETENTION:
+            self.retainer = Retainer(
+                self.core, parse_policies(EVENT_STORE_RETENTION), EVENT_STORE_RETENTION_INTERVAL, self.cache
+            )
+            self.retainer.start()
+
+    @RPC_LATENCY.timed(('publish',))
     def publish(self, request, context):
         """
         Publish an event.
 
         :param request: The client request.
         :param context: The client context.
-        :return: An entry ID.
+        :return: An entry ID, aborted if the stream does not end at the expected entry ID,
+            invalid arguments if the event is malformed.
         """
-        entry_id = self.core.add(request.event_topic, json.loads(request.event_info))
+        try:
+            info = create_info(request.event) if request.HasField('event') else json.loads(request.event_info)
+            entry_id = self.core.add(
+                request.event_topic, compress(request.event_topic, info), request.expected_id or None
+            )
+        except ConcurrencyError as e:
+            context.abort(grpc.StatusCode.ABORTED, str(e))
+        except ValueError as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
 
         return PublishResponse(entry_id=entry_id)
 
+    @RPC_LATENCY.timed(('publish_batch',))
+    def publish_batch(self, request, context):
+        """
+        Publish several events of a topic at once.
+
+        :param request: The client request.
+        :param context: The client context.
+        :return: The entry IDs, in the same order as the events, aborted if the stream does not end at the expected
+            entry ID, invalid arguments if an event is malformed.
+        """
+        try:
+            entry_ids = self.core.add_many(*create_batch(request))
+        except ConcurrencyError as e:
+            context.abort(grpc.StatusCode.ABORTED, str(e))
+        except ValueError as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+        return PublishBatchResponse(entry_ids=entry_ids)
+
+    @RPC_LATENCY.timed(('publish_multi',))
+    def publish_multi(self, request, context):
+        """
+        Publish events of several topics atomically, either all of them are added or none.
+
+        :param request: The client request.
+        :param context: The client context.
+        :return: The entry IDs per batch, aborted if a stream does not end at its expected entry ID.
+        """
+        try:
+            entry_ids = self.core.add_topics([create_batch(batch) for batch in request.batches])
+        except ConcurrencyError as e:
+            context.abort(grpc.StatusCode.ABORTED, str(e))
+        except ValueError as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+        return PublishMultiResponse(batches=[PublishBatchResponse(entry_ids=ids) for ids in entry_ids])
+
     def subscribe(self, request, context):
         """
-        Subscribe to an event.
+        Subscribe to one or several event topics.
 
         :param request: The client request.
         :param context: The client context.
         :return: Notification stream.
         """
-        self.subscribers[(request.event_topic, context.peer())] = True
+        subscription = self.register(request, context)
+        if not context.add_callback(subscription.cancel):
+            self.unregister(subscription)
+            return
 
-        if request.group_name:
-            self.core.create_group(request.event_topic, request.group_name)
+        try:
+            if request.group_name:
+                subscription.wakeup = lambda: self.core.unblock(subscription.name)
+                yield from self.subscribe_group(request, subscription)
+                return
+
+            match = compile_filter(request.filter)
+            notifications = queue.Queue()
+            subscription.wakeup = lambda: notifications.put(None)
+            try:
+                self.attach(subscription.topics, notifications)
+
+                # replay the history after attaching, live notifications already replayed are skipped
+                replayed = {}
+                for topic in subscription.topics:
+                    start = start_position(request, topic)
+                    if start is None:
+                        continue
+                    for entries in self.core.get_pages(topic, _start=start):
+                        if topic not in subscription.active:
+                            break
+                        for entry_id, entry in entries:
+                            if match and not match(entry):
+                                continue
+                            notification = create_notification(topic, entry_id, entry)
+                            observe_notification(notification, subscription.id)
+                            yield notification if request.typed else legacy_notification(notification, entry)
+                        replayed[topic] = parse_id(entries[-1][0])
+
+                while subscription:
+                    item = notifications.get()
+                    if item is None:
+                        continue
+                    entry, notification = item
+                    if notification.event_topic in replayed and \
+                            parse_id(notification.entry_id) <= replayed[notification.event_topic]:
+                        continue
+                    if match and not match(entry):
+                        continue
+                    if notification.event_topic in subscription.active:
+                        observe_notification(notification, subscription.id)
+                        yield notification if request.typed else legacy_notification(notification, entry)
+            finally:
+                self.detach(subscription.topics, notifications)
+        finally:
+            self.unregister(subscription)
+
+    def subscribe_group(self, request, subscription):
+        """
+        Subscribe to one or several event topics as a member of a consumer group.
 
-        last_id = None
-        while self.subscribers[(request.event_topic, context.peer())]:
+        :param request: The client request.
+        :param subscription: The subscription, its name is the consumer name.
+        :return: Notification stream.
+        """
+        topics = subscription.topics
+        for topic in topics:
+            self.core.create_group(topic, request.group_name)
+
+        match = compile_filter(request.filter)
+        claim_ts = 0
+        try:
+            while subscription:
+                result = self.core.read_group(topics, subscription.name, request.group_name, _no_ack=not request.ack)
+                batches = [(stream_topic(stream_name), entries) for stream_name, entries in result]
+
+                if request.ack and time.time() >= claim_ts:
+                    claim_ts = time.time() + EVENT_STORE_CLAIM_INTERVAL
+                    for topic in topics:
+                        batches.append((topic, self.core.claim_group(
+                            topic, subscription.name, request.group_name, EVENT_STORE_CLAIM_IDLE
+                        )))
+
+                for topic, entries in batches:
+                    if topic not in subscription.active:
+                        continue
+                    for entry_id, entry in entries:
+                        if match and not match(entry):
+                            # filtered entries are done with, they must not be claimed again
+                            if request.ack:
+                                self.acknowledger.put(topic, request.group_name, [entry_id])
+                            continue
+                        notification = create_notification(topic, entry_id, entry)
+                        observe_notification(notification, subscription.id)
+                        yield notification if request.typed else legacy_notification(notification, entry)
+        finally:
+            # the consumer ends with its subscription, unless entries are still pending, see claim_group
+            for topic in subscription.topics:
+                try:
+                    self.core.delete_consumer(topic, request.group_name, subscription.name)
+                except Exception as e:
+                    logging.error('error deleting consumer ({}) {}: {}'.format(e.__class__.__name__, topic, str(e)))
+
+    @RPC_LATENCY.timed(('unsubscribe',))
+    def unsubscribe(self, request, context):
+        """
+        Unsubscribe a subscription from an event topic, its stream ends once it has no topics left.
+        Without a subscription ID, all subscriptions of the client to the topic are unsubscribed.
 
-            if request.group_name:
-                result = self.core.read_group(
-                    request.event_topic, context.peer(), request.group_name, _no_ack=True
-                )
+        :param request: The client request.
+        :param context: The client context.
+        :return: Success.
+        """
+        with self.lock:
+            if request.subscription_id:
+                subscriptions = [self.subscriptions.get(request.subscription_id)]
             else:
-                result = self.core.read(
-                    request.event_topic, last_id
-                )
+                subscriptions = [s for s in self.subscriptions.values() if s.peer == context.peer()]
+        subscriptions = [s for s in subscriptions if s and request.event_topic in s.active]
 
-            for stream_name, entries in result:
-                for entry_id, entry in entries:
-                    last_id = entry_id
-                    yield Notification(
-                        event_id=entry['event_id'],
-                        event_ts=float(last_id.replace('-', '.')),
-                        event_action=entry['event_action'],
-                        event_data=entry['event_data']
-                    )
+        for subscription in subscriptions:
+            subscription.cancel([request.event_topic])
 
-    def unsubscribe(self, request, context):
+        return UnsubscribeResponse(success=bool(subscriptions))
+
+    @RPC_LATENCY.timed(('get',))
+    def get(self, request, context):
+        """
+        Get all events for a topic, only the entries added since the last read are fetched if the topic is cached.
+
+        :param request: The client request.
+        :param context: The client context.
+        :return: A list with all notifications, or the entries as JSON for clients which predate the typed events.
+        """
+        if not request.typed:
+            events = self.core.get(request.event_topic)
+            return GetResponse(events=json.dumps([
+                [entry_id, legacy_info(entry)] for entry_id, entry in events
+            ]) if events else None)
+
+        last_id, cached = self.cache.lookup(request.event_topic) if self.cache else (None, [])
+        if last_id is None:
+            events = self.core.get(request.event_topic)
+        else:
+            events = self.core.get_range(request.event_topic, '(' + last_id)
+        CACHE_READS.inc(('hit' if last_id else 'miss',))
+
+        with ENCODE_LATENCY.time(('get',)):
+            notifications = [create_notification(request.event_topic, entry_id, entry) for entry_id, entry in events]
+
+        if self.cache:
+            notifications = self.cache.extend(request.event_topic, last_id, cached, notifications)
+
+        return GetResponse(notifications=notifications)
+
+    def get_pages(self, request, context):
+        """
+        Get all events for a topic as a stream of pages.
+
+        :param request: The client request.
+        :param context: The client context.
+        :return: A stream of pages with notifications, invalid arguments if the page size is negative.
+        """
+        if request.page_size < 0:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, 'invalid page size {}'.format(request.page_size))
+
+        for entries in self.core.get_pages(request.event_topic, request.page_size or EVENT_PAGE_SIZE):
+            with ENCODE_LATENCY.time(('get_pages',)):
+                page = GetPage(notifications=[
+                    create_notification(request.event_topic, entry_id, entry) for entry_id, entry in entries
+                ])
+            yield page
+
+    @RPC_LATENCY.timed(('query',))
+    def query(self, request, context):
+        """
+        Get a range of events for a topic, bounded by entry IDs or timestamps, optionally newest first.
+
+        :param request: The client request.
+        :param context: The client context.
+        :return: A list with the notifications in range, invalid arguments if a bound is malformed.
         """
-        Unsubscribe from an event.
+        try:
+            start, end = query_range(request)
+        except ValueError as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+        events = self.core.get_history(request.event_topic, start, end, request.count or None, request.reverse)
+
+        with ENCODE_LATENCY.time(('query',)):
+            return GetResponse(notifications=[
+                create_notification(request.event_topic, entry_id, entry) for entry_id, entry in events
+            ])
+
+    @RPC_LATENCY.timed(('get_state',))
+    def get_state(self, request, context):
+        """
+        Get the current state of the entities of a topic.
 
         :param request: The client request.
         :param context: The client context.
+        :return: The entity states and the last applied entry ID.
+        """
+        last_id, entities = self.projection.get_state(request.event_topic)
+
+        return GetStateResponse(
+            entities=[
+                EntityState(entity_id=entity_id, entity_data=json.dumps(data).encode())
+                for entity_id, data in entities.items()
+            ],
+            last_id=last_id
+        )
+
+    def ack(self, request_iterator, context):
+        """
+        Acknowledge processing of group events, the acknowledgements are flushed in batches.
+
+        :param request_iterator: The client request stream.
+        :param context: The client context.
         :return: Success.
         """
-        self.subscribers[(request.event_topic, context.peer())] = False
+        for request in request_iterator:
+            self.acknowledger.put(request.event_topic, request.group_name, request.entry_ids)
 
-        return UnsubscribeResponse(success=True)
+        return AckResponse(success=True)
 
-    def get(self, request, context):
+    def register(self, request, context):
         """
-        Get all events for a topic.
+        Register a subscription, abort if its ID is already taken.
 
         :param request: The client request.
         :param context: The client context.
-        :return: A list with all entities or None.
+        :return: The subscription.
+        """
+        subscription = Subscription(
+            request.subscription_id or str(uuid.uuid4()), context.peer(), request.event_topics or [request.event_topic]
+        )
+        with self.lock:
+            if subscription.id in self.subscriptions:
+                context.abort(grpc.StatusCode.ALREADY_EXISTS, 'subscription {} exists'.format(subscription.id))
+            self.subscriptions[subscription.id] = subscription
+
+        for topic in subscription.topics:
+            SUBSCRIPTIONS.inc((topic,))
+
+        return subscription
+
+    def unregister(self, _subscription):
+        """
+        Remove a subscription from the registry once its stream has ended.
+
+        :param _subscription: The subscription.
+        """
+        _subscription.wakeup = None
+        with self.lock:
+            self.subscriptions.pop(_subscription.id, None)
+
+        for topic in _subscription.topics:
+            SUBSCRIPTIONS.dec((topic,))
+            SUBSCRIBER_LAG.remove((topic, _subscription.id))
+
+    def attach(self, _topics, _notifications):
+        """
+        Attach a subscriber to the shared readers of its topics, start a reader if it is the first one.
+        If this fails, the subscriber has to be detached all the same.
+
+        :param _topics: A list of event topics.
+        :param _notifications: The queue receiving the notifications of all topics.
+        """
+        with self.lock:
+            for topic in _topics:
+                reader = self.readers.get(topic)
+                if reader is None:
+                    reader = TopicReader(self.core, topic, self.core.last_id(topic))
+                    reader.start()
+                    self.readers[topic] = reader
+                reader.add_queue(_notifications)
+
+    def detach(self, _topics, _notifications):
+        """
+        Detach a subscriber from the shared readers of its topics, stop a reader if it was the last one.
+
+        :param _topics: A list of event topics.
+        :param _notifications: The queue receiving the notifications.
         """
-        events = self.core.get(request.event_topic)
+        with self.lock:
+            for topic in _topics:
+                reader = self.readers.get(topic)
+                if reader is None or _notifications not in reader.queues:
+                    continue
+                reader.rem_queue(_notifications)
+                if not reader:
+                    reader.stop()
+                    del self.readers[topic]
+
+
+class Subscription(object):
+    """
+    Subscription class, the state of an open subscription stream.
+    """
+
+    def __init__(self, _id, _peer, _topics):
+        """
+        :param _id: The subscription ID, chosen by the client or generated.
+        :param _peer: The peer of the stream.
+        :param _topics: A list of event topics.
+        """
+        self.id = _id
+        self.peer = _peer
+        self.name = uuid.uuid4().hex
+        self.topics = list(_topics)
+        self.active = set(_topics)
+        self.wakeup = None
+
+    def __bool__(self):
+        return bool(self.active)
+
+    def cancel(self, _topics=None):
+        """
+        Cancel some or all topics, wake up the stream if none are left, e.g. when the RPC terminated.
+
+        :param _topics: Optional list of event topics, defaults to all.
+        """
+        self.active.difference_update(self.topics if _topics is None else _topics)
+        wakeup = self.wakeup
+        if not self.active and wakeup:
+            wakeup()
+
+
+class TopicReader(threading.Thread):
+    """
+    Topic Reader Thread class, reads a stream once for all subscribers of a topic.
+    """
+
+    def __init__(self, _core, _topic, _last_id=None):
+        """
+        :param _core: The event store core.
+        :param _topic: The event topic.
+        :param _last_id: Optional entry ID to read after, defaults to new entries only.
+        """
+        super(TopicReader, self).__init__(daemon=True)
+        self._running = False
+        self.core = _core
+        self.topic = _topic
+        self.last_id = _last_id
+        self.queues = []
+
+    def __len__(self):
+        return len(self.queues)
+
+    def run(self):
+        """
+        Read the event stream and put a notification for each entry into every subscriber queue.
+        """
+        self._running = True
+        last_id = self.last_id
+        while self._running:
+            try:
+                result = self.core.read(self.topic, last_id)
+            except Exception as e:
+                # keep the subscribers, read on after the last entry seen once the store is back
+                logging.error('error reading ({}) {}: {}'.format(e.__class__.__name__, self.topic, str(e)))
+                time.sleep(EVENT_STORE_SLEEP_INTERVAL)
+                continue
+
+            for stream_name, entries in result:
+                for entry_id, entry in entries:
+                    last_id = entry_id
+                    notification = create_notification(self.topic, entry_id, entry)
+                    for notifications in list(self.queues):
+                        notifications.put((entry, notification))
+
+    def stop(self):
+        """
+        Stop reading, this takes effect after the current blocking read returns.
+        """
+        self._running = False
+
+    def add_queue(self, _notifications):
+        """
+        Add a subscriber queue.
+
+        :param _notifications: The queue receiving the notifications.
+        """
+        self.queues.append(_notifications)
+
+    def rem_queue(self, _notifications):
+        """
+        Remove a subscriber queue.
+
+        :param _notifications: The queue receiving the notifications.
+        """
+        self.queues.remove(_notifications)
+
+
+class Acknowledger(threading.Thread):
+    """
+    Acknowledger Thread class, collects acknowledgements and flushes them with one XACK per group.
+    """
+
+    def __init__(self, _core, _interval):
+        """
+        :param _core: The event store core.
+        :param _interval: The flush interval in ms.
+        """
+        super(Acknowledger, self).__init__(daemon=True)
+        self._running = False
+        self.core = _core
+        self.interval = _interval / 1000
+        self.acks = {}
+        self.lock = threading.Lock()
+
+    def run(self):
+        """
+        Flush the collected acknowledgements once per interval.
+        """
+        self._running = True
+        while self._running:
+            time.sleep(self.interval)
+            self.flush()
+
+    def stop(self):
+        """
+        Stop flushing, this takes effect after the current interval.
+        """
+        self._running = False
+
+    def put(self, _topic, _group, _ids):
+        """
+        Collect acknowledgements.
+
+        :param _topic: The event topic.
+        :param _group: The consumer group name.
+        :param _ids: A list of entry IDs.
+        """
+        with self.lock:
+            self.acks.setdefault((_topic, _group), []).extend(_ids)
+
+    def flush(self):
+        """
+        Acknowledge the collected entries, unacknowledged entries are reclaimed later on failure.
+        """
+        with self.lock:
+            acks, self.acks = self.acks, {}
+
+        if not acks:
+            return
+
+        try:
+            self.core.ack_groups(acks)
+        except Exception as e:
+            logging.error('error acknowledging ({}): {}'.format(e.__class__.__name__, str(e)))
+
+
+class Retainer(threading.Thread):
+    """
+    Retainer Thread class, periodically archives and trims the streams according to the retention policies.
+    """
+
+    def __init__(self, _core, _policies, _interval, _cache=None):
+        """
+        :param _core: The event store core.
+        :param _policies: A dict mapping event topics to tuples with max length and max age, '*' for all others.
+        :param _interval: The retention interval in s.
+        :param _cache: Optional history cache to invalidate, trimmed entries can only be read from an archive.
+        """
+        super(Retainer, self).__init__(daemon=True)
+        self._running = False
+        self.core = _core
+        self.policies = _policies
+        self.interval = _interval
+        self.cache = _cache
+
+    def run(self):
+        """
+        Apply the retention policies once per interval.
+        """
+        self._running = True
+        while self._running:
+            time.sleep(self.interval)
+            self.retain()
+
+    def stop(self):
+        """
+        Stop retaining, this takes effect after the current interval.
+        """
+        self._running = False
+
+    def retain(self):
+        """
+        Apply the retention policy of each topic.
+        """
+        default = self.policies.get('*')
+        topics = self.core.topics() if default else [topic for topic in self.policies if topic != '*']
+
+        for topic in topics:
+            max_len, max_age = self.policies.get(topic, default)
+            try:
+                archived = self.core.retain(topic, max_len, max_age)
+            except Exception as e:
+                logging.error('error retaining ({}) {}: {}'.format(e.__class__.__name__, topic, str(e)))
+                continue
+
+            if self.cache and not self.core.archive:
+                self.cache.invalidate(topic)
+
+            if archived:
+                logging.info('archived {} entries of {}'.format(archived, topic))
+
+
+def create_info(_event):
+    """
+    Create the event information to store from a typed event.
+
+    :param _event: The event message.
+    :return: A dict with the event information.
+    :raises ValueError: If the payload is not UTF-8, the streams are read as strings.
+    """
+    try:
+        event_data = _event.event_data.decode()
+    except UnicodeDecodeError:
+        raise ValueError('event data of {} is not UTF-8'.format(_event.event_id or 'an event'))
+
+    return {
+        'event_id': _event.event_id,
+        'event_action': _event.event_action,
+        'event_data': event_data
+    }
+
+
+def create_batch(_request):
+    """
+    Create the events to store from a batch request, typed and JSON events.
+
+    :param _request: The batch request.
+    :return: A tuple with event topic, list of dicts with the event information and expected entry ID.
+    """
+    infos = [create_info(event) for event in _request.events]
+    infos.extend(json.loads(event_info) for event_info in _request.event_infos)
+
+    return _request.event_topic, [compress(_request.event_topic, info) for info in infos], _request.expected_id or None
+
+
+def start_position(_request, _topic):
+    """
+    Get the position a subscription replays a topic from.
+
+    :param _request: The subscribe request.
+    :param _topic: The event topic.
+    :return: The first entry ID, prefixed with '(' to exclude it, or None to receive new entries only.
+    """
+    if _topic in _request.start_ids:
+        return '(' + _request.start_ids[_topic]
+    if _request.from_beginning:
+        return '-'
+    if _request.start_ts:
+        return ts_id(_request.start_ts)
+
+    return None
+
+
+def query_range(_request):
+    """
+    Get the range of a query, entry IDs take precedence over timestamps.
+
+    :param _request: The query request.
+    :return: A tuple with the first and the last entry ID.
+    :raises ValueError: If a bound is not a valid entry ID or the count is negative.
+    """
+    start = _request.start_id or (ts_id(_request.start_ts) if _request.start_ts else '-')
+    # an end ID without sequence number includes all entries of that millisecond
+    end = _request.end_id or (str(int(_request.end_ts * 1000)) if _request.end_ts else '+')
+
+    for bound in (start, end):
+        match = EVENT_STORE_BOUND.fullmatch(bound)
+        if not match or any(int(part) >= 2 ** 64 for part in match.groups() if part):
+            raise ValueError('invalid bound {!r}'.format(bound))
+    if _request.count < 0:
+        raise ValueError('invalid count {}'.format(_request.count))
+
+    return start, end
+
+
+def compile_filter(_filter):
+    """
+    Compile the filter of a subscription into a predicate on stream entries.
+
+    :param _filter: The filter message.
+    :return: A function returning if an entry passes the filter, or None if nothing is filtered.
+    """
+    actions = set(_filter.event_actions)
+    equals = dict(_filter.data_equals)
+    if not actions and not equals:
+        return None
+
+    def match(_entry):
+        if actions and _entry['event_action'] not in actions:
+            return False
+        if not equals:
+            return True
+
+        data = json.loads(entry_json(_entry))
+        for name, value in equals.items():
+            if name not in data:
+                return False
+            if (data[name] if isinstance(data[name], str) else json.dumps(data[name])) != value:
+                return False
+
+        return True
+
+    return match
+
+
+def compress(_topic, _info):
+    """
+    Compress the payload of an event according to the compression threshold of its topic.
+
+    :param _topic: The event topic.
+    :param _info: A dict with the event information.
+    :return: A dict with the event information to store.
+    """
+    return compress_info(_info, EVENT_STORE_THRESHOLDS.get(_topic, EVENT_STORE_THRESHOLDS.get('*')))
+
+
+def create_notification(_topic, _entry_id, _entry):
+    """
+    Create a notification from a stream entry.
+
+    :param _topic: The event topic.
+    :param _entry_id: The entry ID.
+    :param _entry: A dict with the event information.
+    :return: The notification, a compressed payload is left to the client to decompress.
+    """
+    event_data, event_codec = entry_data(_entry)
+
+    return Notification(
+        event_ts=id_ts(_entry_id),
+        entry_id=_entry_id,
+        event_topic=_topic,
+        event=Event(
+            event_id=_entry['event_id'],
+            event_action=_entry['event_action'],
+            event_data=event_data,
+            event_codec=event_codec
+        )
+    )
+
+
+def legacy_info(_entry):
+    """
+    Get the event information of a stored entry as clients which predate the typed events read it.
+
+    :param _entry: A dict with the event information.
+    :return: A dict with the event information, the payload uncompressed.
+    """
+    info = dict(_entry, event_data=entry_json(_entry))
+    info.pop('event_codec', None)
+
+    return info
+
+
+def legacy_notification(_notification, _entry):
+    """
+    Copy a notification and fill in the string fields read by clients which predate the typed events.
+    Notifications are shared between subscribers, so they are not changed in place.
+
+    :param _notification: The notification.
+    :param _entry: A dict with the event information.
+    :return: The notification with the string fields.
+    """
+    notification = Notification()
+    notification.CopyFrom(_notification)
+    notification.event_id = _entry['event_id']
+    notification.event_action = _entry['event_action']
+    notification.event_data = entry_json(_entry)
 
-        return GetResponse(events=json.dumps(events) if events else None)
+    return notification
 
 
+EVENT_STORE_BACKEND = os.getenv('EVENT_STORE_BACKEND', 'redis')
 EVENT_STORE_REDIS_HOST = os.getenv('EVENT_STORE_REDIS_HOST', 'localhost')
 EVENT_STORE_REDIS_PORT = int(os.getenv('EVENT_STORE_REDIS_PORT', '6379'))
+EVENT_STORE_REDIS_NODES = os.getenv('EVENT_STORE_REDIS_NODES', '')
 EVENT_STORE_LISTEN_PORT = os.getenv('EVENT_STORE_LISTEN_PORT', '50051')
 EVENT_STORE_MAX_WORKERS = int(os.getenv('EVENT_STORE_MAX_WORKERS', '10'))
+EVENT_STORE_ACK_INTERVAL = int(os.getenv('EVENT_STORE_ACK_INTERVAL', '100'))
+EVENT_STORE_CLAIM_INTERVAL = int(os.getenv('EVENT_STORE_CLAIM_INTERVAL', '10'))
+EVENT_STORE_CLAIM_IDLE = int(os.getenv('EVENT_STORE_CLAIM_IDLE', '30000'))
+EVENT_STORE_SNAPSHOT_INTERVAL = int(os.getenv('EVENT_STORE_SNAPSHOT_INTERVAL', '1000'))
+EVENT_STORE_ARCHIVE_DIR = os.getenv('EVENT_STORE_ARCHIVE_DIR', '')
+EVENT_STORE_RETENTION = os.getenv('EVENT_STORE_RETENTION', '')
+EVENT_STORE_RETENTION_INTERVAL = int(os.getenv('EVENT_STORE_RETENTION_INTERVAL', '60'))
+EVENT_STORE_METRICS_PORT = int(os.getenv('EVENT_STORE_METRICS_PORT', '9102'))
+EVENT_STORE_COMPRESSION = os.getenv('EVENT_STORE_COMPRESSION', '')
+EVENT_STORE_CACHE_BUDGET = int(os.getenv('EVENT_STORE_CACHE_BUDGET', str(EVENT_CACHE_BUDGET)))
+EVENT_STORE_DEDUP_WINDOW = int(os.getenv('EVENT_STORE_DEDUP_WINDOW', '0'))
 
 EVENT_STORE_ADDRESS = '[::]:{}'.format(EVENT_STORE_LISTEN_PORT)
+EVENT_STORE_THRESHOLDS = parse_thresholds(EVENT_STORE_COMPRESSION)
+EVENT_STORE_BOUND = re.compile(r'[-+]|\(?(\d+)(?:-(\d+))?', re.ASCII)
 EVENT_STORE_SLEEP_INTERVAL = 1
 EVENT_STORE_GRACE_INTERVAL = 0
 EVENT_STORE_RUNNING = True
@@ -114,6 +833,8 @@ def serve():
         add_EventStoreServicer_to_server(EventStoreServer(), server)
         server.add_insecure_port(EVENT_STORE_ADDRESS)
         server.start()
+        if EVENT_STORE_METRICS_PORT:
+            serve_metrics(EVENT_STORE_METRICS_PORT)
     except Exception as e:
         logging.error(e)
 
@@ -0,0 +1,590 @@
+import asyncio
+import json
+import logging
+import signal
+import time
+import uuid
+
+import grpc
+
+from event_store_archive import Archive, parse_policies, parse_id
+from event_store_cache import HistoryCache
+from event_store_core import EventStore, ConcurrencyError, stream_topic, EVENT_PAGE_SIZE
+from event_store_core_aio import AsyncEventStore
+from event_store_metrics import RPC_LATENCY, ENCODE_LATENCY, CACHE_READS, SUBSCRIPTIONS, SUBSCRIBER_LAG, GROUP_LAG, \
+    observe_notification, serve_metrics
+from event_store_projection import AsyncEntityProjection
+from event_store_server import Retainer, Subscription, create_info, create_batch, create_notification, \
+    legacy_notification, legacy_info, compress, start_position, query_range, compile_filter, EVENT_STORE_REDIS_HOST, \
+    EVENT_STORE_REDIS_PORT, EVENT_STORE_ARCHIVE_DIR, EVENT_STORE_RETENTION, EVENT_STORE_RETENTION_INTERVAL, \
+    EVENT_STORE_ADDRESS, EVENT_STORE_GRACE_INTERVAL, EVENT_STORE_ACK_INTERVAL, EVENT_STORE_CLAIM_INTERVAL, \
+    EVENT_STORE_CLAIM_IDLE, EVENT_STORE_SNAPSHOT_INTERVAL, EVENT_STORE_METRICS_PORT, EVENT_STORE_BACKEND, \
+    EVENT_STORE_REDIS_NODES, EVENT_STORE_CACHE_BUDGET, EVENT_STORE_DEDUP_WINDOW, EVENT_STORE_SLEEP_INTERVAL
+
+from event_store_pb2 import PublishResponse, PublishBatchResponse, PublishMultiResponse, UnsubscribeResponse, \
+    GetResponse, GetPage, AckResponse, EntityState, GetStateResponse
+from event_store_pb2_grpc import EventStoreServicer, add_EventStoreServicer_to_server
+
+
+class AsyncEventStoreServer(EventStoreServicer):
+    """
+    Async Event Store Server class, every open subscription costs a coroutine instead of a thread.
+    """
+
+    def __init__(self):
+        if EVENT_STORE_BACKEND != 'redis':
+            raise ValueError('backend {} is not supported by the async server'.format(EVENT_STORE_BACKEND))
+        if EVENT_STORE_REDIS_NODES:
+            raise ValueError('sharding is not supported by the async server')
+
+        self.archive = Archive(EVENT_STORE_ARCHIVE_DIR) if EVENT_STORE_ARCHIVE_DIR else None
+        self.core = AsyncEventStore(
+            EVENT_STORE_REDIS_HOST, EVENT_STORE_REDIS_PORT, self.archive, EVENT_STORE_DEDUP_WINDOW
+        )
+        self.projection = AsyncEntityProjection(self.core, EVENT_STORE_SNAPSHOT_INTERVAL)
+        self.cache = HistoryCache(EVENT_STORE_CACHE_BUDGET) if EVENT_STORE_CACHE_BUDGET else None
+        self.subscriptions = {}
+        self.readers = {}
+        self.acknowledger = AsyncAcknowledger(self.core, EVENT_STORE_ACK_INTERVAL)
+        self.acknowledger.start()
+        self.retainer = None
+
+        # lags are collected in the thread of the metrics server, with its own synchronous core
+        GROUP_LAG.add_collector(EventStore(EVENT_STORE_REDIS_HOST, EVENT_STORE_REDIS_PORT).group_lags)
+
+        if EVENT_STORE_RETENTION:
+            # retention is a background job, it runs in a thread with its own synchronous core
+            self.retainer = Retainer(
+                EventStore(EVENT_STORE_REDIS_HOST, EVENT_STORE_REDIS_PORT, self.archive),
+                parse_policies(EVENT_STORE_RETENTION),
+                EVENT_STORE_RETENTION_INTERVAL,
+                self.cache
+            )
+            self.retainer.start()
+
+    @RPC_LATENCY.timed(('publish',))
+    async def publish(self, request, context):
+        """
+        Publish an event.
+
+        :param request: The client request.
+        :param context: The client context.
+        :return: An entry ID, aborted if the stream does not end at the expected entry ID,
+            invalid arguments if the event is malformed.
+        """
+        try:
+            info = create_info(request.event) if request.HasField('event') else json.loads(request.event_info)
+            entry_id = await self.core.add(
+                request.event_topic, compress(request.event_topic, info), request.expected_id or None
+            )
+        except ConcurrencyError as e:
+            await context.abort(grpc.StatusCode.ABORTED, str(e))
+        except ValueError as e:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+        return PublishResponse(entry_id=entry_id)
+
+    @RPC_LATENCY.timed(('publish_batch',))
+    async def publish_batch(self, request, context):
+        """
+        Publish several events of a topic at once.
+
+        :param request: The client request.
+        :param context: The client context.
+        :return: The entry IDs, in the same order as the events, aborted if the stream does not end at the expected
+            entry ID, invalid arguments if an event is malformed.
+        """
+        try:
+            entry_ids = await self.core.add_many(*create_batch(request))
+        except ConcurrencyError as e:
+            await context.abort(grpc.StatusCode.ABORTED, str(e))
+        except ValueError as e:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+        return PublishBatchResponse(entry_ids=entry_ids)
+
+    @RPC_LATENCY.timed(('publish_multi',))
+    async def publish_multi(self, request, context):
+        """
+        Publish events of several topics atomically, either all of them are added or none.
+
+        :param request: The client request.
+        :param context: The client context.
+        :return: The entry IDs per batch, aborted if a stream does not end at its expected entry ID.
+        """
+        try:
+            entry_ids = await self.core.add_topics([create_batch(batch) for batch in request.batches])
+        except ConcurrencyError as e:
+            await context.abort(grpc.StatusCode.ABORTED, str(e))
+        except ValueError as e:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+        return PublishMultiResponse(batches=[PublishBatchResponse(entry_ids=ids) for ids in entry_ids])
+
+    async def subscribe(self, request, context):
+        """
+        Subscribe to one or several event topics.
+
+        :param request: The client request.
+        :param context: The client context.
+        :return: Notification stream.
+        """
+        subscription = await self.register(request, context)
+
+        # a terminated RPC cancels this coroutine, the finally clauses release its resources
+        try:
+            if request.group_name:
+                async for notification in self.subscribe_group(request, subscription):
+                    yield notification
+                return
+
+            match = compile_filter(request.filter)
+            notifications = asyncio.Queue()
+            subscription.wakeup = lambda: notifications.put_nowait(None)
+            try:
+                await self.attach(subscription.topics, notifications)
+
+                # replay the history after attaching, live notifications already replayed are skipped
+                replayed = {}
+                for topic in subscription.topics:
+                    start = start_position(request, topic)
+                    if start is None:
+                        continue
+                    async for entries in self.core.get_pages(topic, _start=start):
+                        if topic not in subscription.active:
+                            break
+                        for entry_id, entry in entries:
+                            if match and not match(entry):
+                                continue
+                            notification = create_notification(topic, entry_id, entry)
+                            observe_notification(notification, subscription.id)
+                            yield notification if request.typed else legacy_notification(notification, entry)
+                        replayed[topic] = parse_id(entries[-1][0])
+
+                while subscription:
+                    item = await notifications.get()
+                    if item is None:
+                        continue
+                    entry, notification = item
+                    if notification.event_topic in replayed and \
+                            parse_id(notification.entry_id) <= replayed[notification.event_topic]:
+                        continue
+                    if match and not match(entry):
+                        continue
+                    if notification.event_topic in subscription.active:
+                        observe_notification(notification, subscription.id)
+                        yield notification if request.typed else legacy_notification(notification, entry)
+            finally:
+                self.detach(subscription.topics, notifications)
+        finally:
+            self.unregister(subscription)
+
+    async def subscribe_group(self, request, subscription):
+        """
+        Subscribe to one or several event topics as a member of a consumer group.
+
+        :param request: The client request.
+        :param subscription: The subscription, its name is the consumer name.
+        :return: Notification stream.
+        """
+        for topic in subscription.topics:
+            await self.core.create_group(topic, request.group_name)
+
+        match = compile_filter(request.filter)
+        claim_ts = 0
+        try:
+            while subscription:
+                # unsubscribing cancels the blocking read, which closes its connection
+                read = asyncio.ensure_future(self.core.read_group(
+                    subscription.topics, subscription.name, request.group_name, _no_ack=not request.ack
+                ))
+                subscription.wakeup = read.cancel
+                try:
+                    result = await read
+                except asyncio.CancelledError:
+                    if subscription:
+                        raise
+                    break
+                batches = [(stream_topic(stream_name), entries) for stream_name, entries in result]
+
+                if request.ack and time.time() >= claim_ts:
+                    claim_ts = time.time() + EVENT_STORE_CLAIM_INTERVAL
+                    for topic in subscription.topics:
+                        batches.append((topic, await self.core.claim_group(
+                            topic, subscription.name, request.group_name, EVENT_STORE_CLAIM_IDLE
+                        )))
+
+                for topic, entries in batches:
+                    if topic not in subscription.active:
+                        continue
+                    for entry_id, entry in entries:
+                        if match and not match(entry):
+                            # filtered entries are done with, they must not be claimed again
+                            if request.ack:
+                                self.acknowledger.put(topic, request.group_name, [entry_id])
+                            continue
+                        notification = create_notification(topic, entry_id, entry)
+                        observe_notification(notification, subscription.id)
+                        yield notification if request.typed else legacy_notification(notification, entry)
+        finally:
+            # the consumer ends with its subscription, unless entries are still pending, see claim_group
+            for topic in subscription.topics:
+                try:
+                    await self.core.delete_consumer(topic, request.group_name, subscription.name)
+                except Exception as e:
+                    logging.error('error deleting consumer ({}) {}: {}'.format(e.__class__.__name__, topic, str(e)))
+
+    @RPC_LATENCY.timed(('unsubscribe',))
+    async def unsubscribe(self, request, context):
+        """
+        Unsubscribe a subscription from an event topic, its stream ends once it has no topics left.
+        Without a subscription ID, all subscriptions of the client to the topic are unsubscribed.
+
+        :param request: The client request.
+        :param context: The client context.
+        :return: Success.
+        """
+        if request.subscription_id:
+            subscriptions = [self.subscriptions.get(request.subscription_id)]
+        else:
+            subscriptions = [s for s in self.subscriptions.values() if s.peer == context.peer()]
+        subscriptions = [s for s in subscriptions if s and request.event_topic in s.active]
+
+        for subscription in subscriptions:
+            subscription.cancel([request.event_topic])
+
+        return UnsubscribeResponse(success=bool(subscriptions))
+
+    @RPC_LATENCY.timed(('get',))
+    async def get(self, request, context):
+        """
+        Get all events for a topic, only the entries added since the last read are fetched if the topic is cached.
+
+        :param request: The client request.
+        :param context: The client context.
+        :return: A list with all notifications, or the entries as JSON for clients which predate the typed events.
+        """
+        if not request.typed:
+            events = await self.core.get(request.event_topic)
+            return GetResponse(events=json.dumps([
+                [entry_id, legacy_info(entry)] for entry_id, entry in events
+            ]) if events else None)
+
+        last_id, cached = self.cache.lookup(request.event_topic) if self.cache else (None, [])
+        if last_id is None:
+            events = await self.core.get(request.event_topic)
+        else:
+            events = await self.core.get_range(request.event_topic, '(' + last_id)
+        CACHE_READS.inc(('hit' if last_id else 'miss',))
+
+        with ENCODE_LATENCY.time(('get',)):
+            notifications = [create_notification(request.event_topic, entry_id, entry) for entry_id, entry in events]
+
+        if self.cache:
+            notifications = self.cache.extend(request.event_topic, last_id, cached, notifications)
+
+        return GetResponse(notifications=notifications)
+
+    async def get_pages(self, request, context):
+        """
+        Get all events for a topic as a stream of pages.
+
+        :param request: The client request.
+        :param context: The client context.
+        :return: A stream of pages with notifications, invalid arguments if the page size is negative.
+        """
+        if request.page_size < 0:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, 'invalid page size {}'.format(request.page_size))
+
+        async for entries in self.core.get_pages(request.event_topic, request.page_size or EVENT_PAGE_SIZE):
+            with ENCODE_LATENCY.time(('get_pages',)):
+                page = GetPage(notifications=[
+                    create_notification(request.event_topic, entry_id, entry) for entry_id, entry in entries
+                ])
+            yield page
+
+    @RPC_LATENCY.timed(('query',))
+    async def query(self, request, context):
+        """
+        Get a range of events for a topic, bounded by entry IDs or timestamps, optionally newest first.
+
+        :param request: The client request.
+        :param context: The client context.
+        :return: A list with the notifications in range, invalid arguments if a bound is malformed.
+        """
+        try:
+            start, end = query_range(request)
+        except ValueError as e:
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+        events = await self.core.get_history(request.event_topic, start, end, request.count or None, request.reverse)
+
+        with ENCODE_LATENCY.time(('query',)):
+            return GetResponse(notifications=[
+                create_notification(request.event_topic, entry_id, entry) for entry_id, entry in events
+            ])
+
+    @RPC_LATENCY.timed(('get_state',))
+    async def get_state(self, request, context):
+        """
+        Get the current state of the entities of a topic.
+
+        :param request: The client request.
+        :param context: The client context.
+        :return: The entity states and the last applied entry ID.
+        """
+        last_id, entities = await self.projection.get_state(request.event_topic)
+
+        return GetStateResponse(
+            entities=[
+                EntityState(entity_id=entity_id, entity_data=json.dumps(data).encode())
+                for entity_id, data in entities.items()
+            ],
+            last_id=last_id
+        )
+
+    async def ack(self, request_iterator, context):
+        """
+        Acknowledge processing of group events, the acknowledgements are flushed in batches.
+
+        :param request_iterator: The client request stream.
+        :param context: The client context.
+        :return: Success.
+        """
+        async for request in request_iterator:
+            self.acknowledger.put(request.event_topic, request.group_name, request.entry_ids)
+
+        return AckResponse(success=True)
+
+    async def register(self, request, context):
+        """
+        Register a subscription, abort if its ID is already taken.
+
+        :param request: The client request.
+        :param context: The client context.
+        :return: The subscription.
+        """
+        subscription = Subscription(
+            request.subscription_id or str(uuid.uuid4()), context.peer(), request.event_topics or [request.event_topic]
+        )
+        if subscription.id in self.subscriptions:
+            await context.abort(grpc.StatusCode.ALREADY_EXISTS, 'subscription {} exists'.format(subscription.id))
+        self.subscriptions[subscription.id] = subscription
+
+        for topic in subscription.topics:
+            SUBSCRIPTIONS.inc((topic,))
+
+        return subscription
+
+    def unregister(self, _subscription):
+        """
+        Remove a subscription from the registry once its stream has ended.
+
+        :param _subscription: The subscription.
+        """
+        _subscription.wakeup = None
+        self.subscriptions.pop(_subscription.id, None)
+
+        for topic in _subscription.topics:
+            SUBSCRIPTIONS.dec((topic,))
+            SUBSCRIBER_LAG.remove((topic, _subscription.id))
+
+    async def attach(self, _topics, _notifications):
+        """
+        Attach a subscriber to the shared readers of its topics, start a reader if it is the first one.
+        This returns once each reader knows where it reads from. If this fails or is cancelled,
+        the subscriber has to be detached all the same.
+
+        :param _topics: A list of event topics.
+        :param _notifications: The queue receiving the notifications of all topics.
+        """
+        readers = []
+        for topic in _topics:
+            reader = self.readers.get(topic)
+            if reader is None:
+                reader = AsyncTopicReader(self.core, topic)
+                reader.start()
+                self.readers[topic] = reader
+            reader.add_queue(_notifications)
+            readers.append(reader)
+
+        for reader in readers:
+            await asyncio.shield(reader.started)
+
+    def detach(self, _topics, _notifications):
+        """
+        Detach a subscriber from the shared readers of its topics, stop a reader if it was the last one.
+
+        :param _topics: A list of event topics.
+        :param _notifications: The queue receiving the notifications.
+        """
+        for topic in _topics:
+            reader = self.readers.get(topic)
+            if reader is None or _notifications not in reader.queues:
+                continue
+            reader.rem_queue(_notifications)
+            if not reader:
+                reader.stop()
+                del self.readers[topic]
+
+
+class AsyncTopicReader(object):
+    """
+    Async Topic Reader class, reads a stream once for all subscribers of a topic.
+    """
+
+    def __init__(self, _core, _topic):
+        """
+        :param _core: The async event store core.
+        :param _topic: The event topic.
+        """
+        self.core = _core
+        self.topic = _topic
+        self.queues = []
+        self.started = None
+        self.task = None
+
+    def __len__(self):
+        return len(self.queues)
+
+    def start(self):
+        """
+        Start reading in a task, after the last entry ID at this point in time.
+        """
+        self.started = asyncio.ensure_future(self.core.last_id(self.topic))
+        self.task = asyncio.ensure_future(self.run())
+
+    async def run(self):
+        """
+        Read the event stream and put a notification for each entry into every subscriber queue.
+        """
+        try:
+            last_id = await self.started
+        except Exception:
+            # the subscribers attaching fail with this error and detach, which drops the reader
+            return
+
+        while True:
+            try:
+                result = await self.core.read(self.topic, last_id)
+            except Exception as e:
+                # keep the subscribers, read on after the last entry seen once the store is back
+                logging.error('error reading ({}) {}: {}'.format(e.__class__.__name__, self.topic, str(e)))
+                await asyncio.sleep(EVENT_STORE_SLEEP_INTERVAL)
+                continue
+
+            for stream_name, entries in result:
+                for entry_id, entry in entries:
+                    last_id = entry_id
+                    notification = create_notification(self.topic, entry_id, entry)
+                    for notifications in self.queues:
+                        notifications.put_nowait((entry, notification))
+
+    def stop(self):
+        """
+        Stop reading, this cancels the pending blocking read.
+        """
+        self.task.cancel()
+
+    def add_queue(self, _notifications):
+        """
+        Add a subscriber queue.
+
+        :param _notifications: The queue receiving the notifications.
+        """
+        self.queues.append(_notifications)
+
+    def rem_queue(self, _notifications):
+        """
+        Remove a subscriber queue.
+
+        :param _notifications: The queue receiving the notifications.
+        """
+        self.queues.remove(_notifications)
+
+
+class AsyncAcknowledger(object):
+    """
+    Async Acknowledger class, collects acknowledgements and flushes them with one XACK per group.
+    """
+
+    def __init__(self, _core, _interval):
+        """
+        :param _core: The async event store core.
+        :param _interval: The flush interval in ms.
+        """
+        self.core = _core
+        self.interval = _interval / 1000
+        self.acks = {}
+        self.task = None
+
+    def start(self):
+        """
+        Start flushing in a task.
+        """
+        self.task = asyncio.ensure_future(self.run())
+
+    async def run(self):
+        """
+        Flush the collected acknowledgements once per interval.
+        """
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+    def stop(self):
+        """
+        Stop flushing.
+        """
+        self.task.cancel()
+
+    def put(self, _topic, _group, _ids):
+        """
+        Collect acknowledgements.
+
+        :param _topic: The event topic.
+        :param _group: The consumer group name.
+        :param _ids: A list of entry IDs.
+        """
+        self.acks.setdefault((_topic, _group), []).extend(_ids)
+
+    async def flush(self):
+        """
+        Acknowledge the collected entries, unacknowledged entries are reclaimed later on failure.
+        """
+        acks, self.acks = self.acks, {}
+
+        if not acks:
+            return
+
+        try:
+            await self.core.ack_groups(acks)
+        except Exception as e:
+            logging.error('error acknowledging ({}): {}'.format(e.__class__.__name__, str(e)))
+
+
+async def serve():
+    """
+    Run the gRPC server on asyncio.
+    """
+    server = grpc.aio.server()
+    add_EventStoreServicer_to_server(AsyncEventStoreServer(), server)
+    server.add_insecure_port(EVENT_STORE_ADDRESS)
+    await server.start()
+    if EVENT_STORE_METRICS_PORT:
+        serve_metrics(EVENT_STORE_METRICS_PORT)
+
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, lambda: asyncio.ensure_future(server.stop(EVENT_STORE_GRACE_INTERVAL)))
+
+    logging.info('serving ...')
+    await server.wait_for_termination()
+
+    logging.info('done.')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+
+    asyncio.run(serve())
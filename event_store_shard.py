@@ -0,0 +1,283 @@
+import argparse
+import bisect
+import hashlib
+import logging
+import time
+
+import redis
+
+from event_store_core import Storage, EventStore, EVENT_STREAM_NAME, EVENT_SNAPSHOT_NAME, EVENT_PAGE_SIZE
+
+EVENT_SHARD_REPLICAS = 100
+
+
+def parse_nodes(_spec):
+    """
+    Parse a list of Redis nodes, e.g. 'redis-1:6379,redis-2:6379'.
+
+    :param _spec: The node specification.
+    :return: A list of node names, i.e. host and port.
+    """
+    return [node.strip() for node in _spec.split(',') if node.strip()]
+
+
+def hash_key(_key):
+    """
+    Hash a key onto the ring.
+
+    :param _key: The key.
+    :return: The position on the ring.
+    """
+    return int.from_bytes(hashlib.md5(_key.encode()).digest()[:8], 'big')
+
+
+class HashRing(object):
+    """
+    Hash Ring class, maps keys to nodes by consistent hashing, so adding a node only moves the keys it takes over.
+    """
+
+    def __init__(self, _nodes, _replicas=EVENT_SHARD_REPLICAS):
+        """
+        :param _nodes: A list of node names.
+        :param _replicas: The number of points per node on the ring.
+        """
+        points = sorted((hash_key('{}#{}'.format(node, i)), node) for node in _nodes for i in range(_replicas))
+        self.keys = [point for point, node in points]
+        self.nodes = [node for point, node in points]
+
+    def get(self, _key):
+        """
+        Get the node of a key, i.e. the node of the next point on the ring.
+
+        :param _key: The key.
+        :return: The node name.
+        """
+        return self.nodes[bisect.bisect(self.keys, hash_key(_key)) % len(self.nodes)]
+
+
+class ShardedEventStore(Storage):
+    """
+    Sharded Event Store class, distributes the topics over several Redis nodes.
+    Each method is routed to the node owning its topic, see Storage for their documentation.
+    """
+
+    def __init__(self, nodes, archive=None, dedup_window=0):
+        """
+        :param nodes: A list of node names, i.e. host and port.
+        :param archive: Optional archive holding the trimmed entries.
+        :param dedup_window: The time in s an event ID is remembered to drop duplicates, 0 to disable.
+        """
+        self.archive = archive
+        self.ring = HashRing(nodes)
+        self.shards = {}
+        for node in nodes:
+            host, _, port = node.rpartition(':')
+            self.shards[node] = EventStore(host, int(port), archive, dedup_window)
+
+    def shard(self, _topic):
+        """
+        Get the shard of a topic.
+
+        :param _topic: The event topic.
+        :return: The event store of the node owning the topic.
+        """
+        return self.shards[self.ring.get(_topic)]
+
+    def add(self, _topic, _info, _expected_id=None):
+        return self.shard(_topic).add(_topic, _info, _expected_id)
+
+    def add_many(self, _topic, _infos, _expected_id=None):
+        return self.shard(_topic).add_many(_topic, _infos, _expected_id)
+
+    def add_topics(self, _batches):
+        """
+        Add batches of events to several streams atomically, either all of them are added or none.
+        This is only possible if all topics are on the same shard.
+
+        :param _batches: A list of tuples with event topic, list of dicts with the event information and
+            optional entry ID the stream is expected to end at.
+        :return: A list with a list of entry IDs per batch, in the same order as the events.
+        :raises ConcurrencyError: If a stream does not end at its expected entry ID.
+        :raises ValueError: If the topics span several shards.
+        """
+        nodes = {self.ring.get(topic) for topic, infos, expected_id in _batches}
+        if len(nodes) > 1:
+            raise ValueError('topics {} span several shards'.format(', '.join(topic for topic, _, _ in _batches)))
+
+        return self.shards[nodes.pop()].add_topics(_batches) if nodes else []
+
+    def get(self, _topic):
+        return self.shard(_topic).get(_topic)
+
+    def get_range(self, _topic, _start='-', _end='+', _count=None, _reverse=False):
+        return self.shard(_topic).get_range(_topic, _start, _end, _count, _reverse)
+
+    def last_id(self, _topic):
+        return self.shard(_topic).last_id(_topic)
+
+    def get_snapshot(self, _topic):
+        return self.shard(_topic).get_snapshot(_topic)
+
+    def set_snapshot(self, _topic, _snapshot):
+        return self.shard(_topic).set_snapshot(_topic, _snapshot)
+
+    def topics(self):
+        """
+        Get the topics of all shards. Copies left on a node by a migration without deleting them are skipped.
+
+        :return: A list of event topics.
+        """
+        return [
+            topic for node, shard in self.shards.items() for topic in shard.topics() if self.ring.get(topic) == node
+        ]
+
+    def retain(self, _topic, _max_len=0, _max_age=0):
+        return self.shard(_topic).retain(_topic, _max_len, _max_age)
+
+    def read(self, _topic, _last_id=None, _block=1000):
+        return self.shard(_topic).read(_topic, _last_id, _block)
+
+    def create_group(self, _topic, _name):
+        return self.shard(_topic).create_group(_topic, _name)
+
+    def read_group(self, _topics, _name, _group, _block=1000, _no_ack=False):
+        """
+        Read new event stream entries from a group, several topics are read at once.
+        If the topics span several shards, they are polled first and then blocked on one after another.
+
+        :param _topics: The event topic or a list of event topics.
+        :param _name: The name of the consumer.
+        :param _group: The consumer group name.
+        :param _block: The time to block in ms, defaults to 1000.
+        :param _no_ack: Boolean if acknowledge is required.
+        :return: A list of stream names with event entries, empty if timed out.
+        """
+        topics = [_topics] if isinstance(_topics, str) else _topics
+        shards = {}
+        for topic in topics:
+            shards.setdefault(self.ring.get(topic), []).append(topic)
+
+        if len(shards) == 1:
+            node, topics = shards.popitem()
+            return self.shards[node].read_group(topics, _name, _group, _block, _no_ack)
+
+        result = []
+        for block in (None, max(1, _block // len(shards)) if _block else _block):
+            for node, topics in shards.items():
+                result.extend(self.shards[node].read_group(topics, _name, _group, block, _no_ack) or [])
+                if result:
+                    return result
+
+        return result
+
+    def unblock(self, _name):
+        for shard in self.shards.values():
+            shard.unblock(_name)
+
+    def ack_group(self, _topic, _group, _ids):
+        return self.shard(_topic).ack_group(_topic, _group, _ids)
+
+    def ack_groups(self, _acks):
+        """
+        Acknowledge processing of events of several groups, with one pipelined round-trip per shard.
+
+        :param _acks: A dict mapping (topic, group name) tuples to lists of entry IDs.
+        :return: A list with the number of acknowledged entries per group.
+        """
+        shards = {}
+        for (topic, group), ids in _acks.items():
+            shards.setdefault(self.ring.get(topic), {})[(topic, group)] = ids
+
+        acked = {}
+        for node, acks in shards.items():
+            acked.update(zip(acks, self.shards[node].ack_groups(acks)))
+
+        return [acked[key] for key in _acks]
+
+    def claim_group(self, _topic, _name, _group, _min_idle, _count=EVENT_PAGE_SIZE):
+        return self.shard(_topic).claim_group(_topic, _name, _group, _min_idle, _count)
+
+    def delete_consumer(self, _topic, _group, _name):
+        return self.shard(_topic).delete_consumer(_topic, _group, _name)
+
+    def group_lags(self):
+        """
+        Get the lag of all consumer groups of all shards. Copies left on a node by a migration without deleting them
+        are skipped.
+
+        :return: A dict mapping (topic, group name) tuples to the number of entries not yet delivered or acknowledged.
+        """
+        lags = {}
+        for node, shard in self.shards.items():
+            lags.update((key, lag) for key, lag in shard.group_lags().items() if self.ring.get(key[0]) == node)
+
+        return lags
+
+
+def migrate(_nodes, _new_nodes, _delete=False):
+    """
+    Copy the topics which change their node from the old to the new node list, keeping their entry IDs,
+    consumer groups and snapshots. Run it before the servers are switched to the new node list.
+    Pending entries of the groups are not copied, they count as acknowledged on the new node.
+    It can be run again, e.g. after a failure or to catch up, it only copies the entries added since.
+
+    :param _nodes: A list of the current node names.
+    :param _new_nodes: A list of the new node names.
+    :param _delete: Boolean if the topics are deleted from their old node after they were copied.
+    :return: A dict mapping the moved topics to the number of entries copied by this run.
+    """
+    old, new = ShardedEventStore(_nodes), ShardedEventStore(_new_nodes)
+    moved = {}
+    for node, shard in old.shards.items():
+        for topic in shard.topics():
+            target = new.ring.get(topic)
+            if target == node:
+                continue
+
+            source, destination = shard.redis, new.shards[target].redis
+            stream_name = EVENT_STREAM_NAME.format(topic)
+            # continue after the entries copied by an earlier run
+            last_id = new.shards[target].last_id(topic)
+            count = 0
+            for entries in shard.get_range_pages(topic, '(' + last_id if last_id != '0-0' else '-', '+'):
+                pipe = destination.pipeline(transaction=False)
+                for entry_id, entry in entries:
+                    pipe.xadd(stream_name, entry, id=entry_id)
+                pipe.execute()
+                count += len(entries)
+
+            for group in source.xinfo_groups(stream_name):
+                try:
+                    destination.xgroup_create(stream_name, group['name'], group['last-delivered-id'], mkstream=True)
+                except redis.ResponseError as e:
+                    if 'BUSYGROUP' not in e.args[0]:
+                        raise e
+
+            snapshot = source.get(EVENT_SNAPSHOT_NAME.format(topic))
+            if snapshot:
+                destination.set(EVENT_SNAPSHOT_NAME.format(topic), snapshot)
+
+            if destination.xlen(stream_name) < count:
+                raise RuntimeError('copy of {} to {} is incomplete'.format(topic, target))
+
+            if _delete:
+                source.delete(stream_name, EVENT_SNAPSHOT_NAME.format(topic))
+
+            moved[topic] = count
+            logging.info('moved {} entries of {} from {} to {}'.format(count, topic, node, target))
+
+    return moved
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description='Migrate the topics which move when the Redis nodes change.')
+    parser.add_argument('nodes', help='current nodes, e.g. redis-1:6379,redis-2:6379')
+    parser.add_argument('new_nodes', help='new nodes, e.g. redis-1:6379,redis-2:6379,redis-3:6379')
+    parser.add_argument('--delete', action='store_true', help='delete moved topics from their old node')
+    args = parser.parse_args()
+
+    start = time.time()
+    moved = migrate(parse_nodes(args.nodes), parse_nodes(args.new_nodes), args.delete)
+    logging.info('moved {} topics in {:.2f}s'.format(len(moved), time.time() - start))
@@ -134,6 +134,12 @@ def order_service(_es):
     # check result
     assert len(order_events) == 101
 
+    # get current order states
+    order_states = _es.get_state('order')
+
+    # check result
+    assert len(order_states) == 99
+
     time.sleep(1)
 
 
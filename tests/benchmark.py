@@ -0,0 +1,282 @@
+import argparse
+import json
+import platform
+import threading
+import time
+import uuid
+
+from event_store_client import EventStoreClient, create_event
+
+BENCHMARK_BUCKETS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+def histogram(_samples):
+    """
+    Summarize latency samples.
+
+    :param _samples: A list of latencies in s.
+    :return: A dict with count, mean, percentiles and bucket counts, all latencies in ms.
+    """
+    samples = sorted(sample * 1000 for sample in _samples)
+    if not samples:
+        return {'count': 0}
+
+    def percentile(_p):
+        return samples[min(len(samples) - 1, int(len(samples) * _p))]
+
+    buckets, i = {}, 0
+    for bound in BENCHMARK_BUCKETS + [float('inf')]:
+        count = 0
+        while i < len(samples) and samples[i] <= bound:
+            count += 1
+            i += 1
+        buckets[str(bound)] = count
+
+    return {
+        'count': len(samples),
+        'mean': sum(samples) / len(samples),
+        'min': samples[0],
+        'p50': percentile(0.5),
+        'p99': percentile(0.99),
+        'p999': percentile(0.999),
+        'max': samples[-1],
+        'buckets': buckets
+    }
+
+
+def create_events(_count):
+    """
+    Create events of new entities.
+
+    :param _count: The number of events.
+    :return: A list of dicts with the event information.
+    """
+    return [create_event('entity_created', {'entity_id': str(uuid.uuid4())}) for _ in range(_count)]
+
+
+def bench_publish(_events, _publishers, _batch_size):
+    """
+    Measure publish latency and throughput, one by one and in batches, from several threads.
+
+    :param _events: The number of events per publisher.
+    :param _publishers: The number of concurrent publishers.
+    :param _batch_size: The number of events per batch.
+    :return: A dict with the results.
+    """
+    topic = 'bench-publish-{}'.format(uuid.uuid4())
+    results = {}
+    for mode in ('single', 'batch'):
+        latencies = []
+
+        def publisher():
+            es = EventStoreClient()
+            samples = []
+            if mode == 'single':
+                for _ in range(_events):
+                    start = time.perf_counter()
+                    es.publish(topic, create_events(1)[0])
+                    samples.append(time.perf_counter() - start)
+            else:
+                for _ in range(_events // _batch_size):
+                    infos = create_events(_batch_size)
+                    start = time.perf_counter()
+                    es.publish_many(topic, infos)
+                    samples.append(time.perf_counter() - start)
+            latencies.extend(samples)
+
+        threads = [threading.Thread(target=publisher) for _ in range(_publishers)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        duration = time.perf_counter() - start
+
+        events = _publishers * (_events if mode == 'single' else _events // _batch_size * _batch_size)
+        results[mode] = {
+            'events': events,
+            'duration': duration,
+            'throughput': events / duration,
+            'latency': histogram(latencies)
+        }
+
+    return results
+
+
+def bench_get(_sizes, _repeat):
+    """
+    Measure get latency as the stream grows.
+
+    :param _sizes: A list of stream sizes.
+    :param _repeat: The number of gets per stream size.
+    :return: A dict mapping stream sizes to results.
+    """
+    es = EventStoreClient()
+    topic = 'bench-get-{}'.format(uuid.uuid4())
+    results, size = {}, 0
+    for target in sorted(_sizes):
+        while size < target:
+            count = min(1000, target - size)
+            es.publish_many(topic, create_events(count))
+            size += count
+
+        latencies = []
+        for _ in range(_repeat):
+            start = time.perf_counter()
+            assert len(es.get(topic)) == size
+            latencies.append(time.perf_counter() - start)
+        results[str(size)] = {'latency': histogram(latencies)}
+
+    return results
+
+
+def bench_subscribe(_counts, _events, _interval):
+    """
+    Measure the end-to-end latency from publish to handler as the number of subscribers grows.
+
+    :param _counts: A list of subscriber counts.
+    :param _events: The number of events to publish per subscriber count.
+    :param _interval: The time in s between publishes.
+    :return: A dict mapping subscriber counts to results.
+    """
+    results = {}
+    for count in _counts:
+        topic = 'bench-subscribe-{}'.format(uuid.uuid4())
+        latencies, lock, done = [], threading.Lock(), threading.Event()
+
+        def handler(_item):
+            latency = time.time() - json.loads(_item.event.event_data)['sent']
+            with lock:
+                latencies.append(latency)
+                if len(latencies) == count * _events:
+                    done.set()
+
+        subscribers = [EventStoreClient() for _ in range(count)]
+        for es in subscribers:
+            es.subscribe(topic, handler)
+        time.sleep(1)
+
+        es = EventStoreClient()
+        for _ in range(_events):
+            es.publish(topic, create_event('entity_created', {'entity_id': str(uuid.uuid4()), 'sent': time.time()}))
+            time.sleep(_interval)
+
+        done.wait(10)
+        for subscriber in subscribers:
+            subscriber.unsubscribe(topic, handler)
+        time.sleep(2)  # let the streams end before the channels are closed
+        results[str(count)] = {'received': len(latencies), 'expected': count * _events, 'latency': histogram(latencies)}
+
+    return results
+
+
+def bench_group(_events, _consumers, _batch_size):
+    """
+    Measure the throughput of a consumer group with acknowledgement.
+
+    :param _events: The number of events to consume.
+    :param _consumers: The number of consumers in the group.
+    :param _batch_size: The number of events per published batch.
+    :return: A dict with the results.
+    """
+    topic = 'bench-group-{}'.format(uuid.uuid4())
+    received, lock, done = [], threading.Lock(), threading.Event()
+
+    def handler(_item):
+        with lock:
+            received.append(time.perf_counter())
+            if len(received) == _events:
+                done.set()
+
+    consumers = [EventStoreClient() for _ in range(_consumers)]
+    for es in consumers:
+        es.subscribe(topic, handler, _group='bench', _ack=True)
+    time.sleep(1)
+
+    es = EventStoreClient()
+    start = time.perf_counter()
+    for i in range(0, _events, _batch_size):
+        es.publish_many(topic, create_events(min(_batch_size, _events - i)))
+
+    done.wait(60)
+    duration = (received[-1] if received else time.perf_counter()) - start
+    for consumer in consumers:
+        consumer.unsubscribe(topic, handler)
+    time.sleep(2)  # let the streams end before the channels are closed
+
+    return {
+        'events': _events,
+        'received': len(received),
+        'consumers': _consumers,
+        'duration': duration,
+        'throughput': len(received) / duration
+    }
+
+
+def serve_local(_backend, _fake, _redis_port, _max_workers):
+    """
+    Run an event store server in this process, optionally on top of an in-process Redis stand-in.
+
+    :param _backend: The storage backend, either 'redis' or 'memory'.
+    :param _fake: Boolean if fakeredis is used instead of a local Redis.
+    :param _redis_port: The port of the Redis (stand-in).
+    :param _max_workers: The number of server worker threads.
+    """
+    if _fake:
+        from fakeredis import TcpFakeServer
+        fake = TcpFakeServer(('127.0.0.1', _redis_port), server_type='redis')
+        threading.Thread(target=fake.serve_forever, daemon=True).start()
+
+    import event_store_server
+    event_store_server.EVENT_STORE_BACKEND = _backend
+    event_store_server.EVENT_STORE_REDIS_HOST = 'localhost'
+    event_store_server.EVENT_STORE_REDIS_PORT = _redis_port
+    event_store_server.EVENT_STORE_MAX_WORKERS = _max_workers
+    threading.Thread(target=event_store_server.serve, daemon=True).start()
+    time.sleep(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the event store.')
+    parser.add_argument('--output', default='benchmark.json', help='file to write the results to')
+    parser.add_argument('--local', action='store_true', help='run the server in this process')
+    parser.add_argument('--fake', action='store_true', help='use fakeredis in this process, implies --local')
+    parser.add_argument('--memory', action='store_true', help='use the in-memory backend, implies --local')
+    parser.add_argument('--redis-port', type=int, default=6379, help='port of the Redis used by --local')
+    parser.add_argument('--events', type=int, default=1000, help='events per publisher')
+    parser.add_argument('--publishers', type=int, default=4, help='concurrent publishers')
+    parser.add_argument('--batch-size', type=int, default=100, help='events per batch')
+    parser.add_argument('--sizes', default='100,1000,10000', help='stream sizes for get')
+    parser.add_argument('--repeat', type=int, default=20, help='gets per stream size')
+    parser.add_argument('--subscribers', default='1,4,16', help='subscriber counts for subscribe')
+    parser.add_argument('--notifications', type=int, default=200, help='events per subscriber count')
+    parser.add_argument('--interval', type=float, default=0.005, help='time in s between notifications')
+    parser.add_argument('--consumers', type=int, default=4, help='consumers in the group')
+    parser.add_argument('--group-events', type=int, default=10000, help='events consumed by the group')
+    args = parser.parse_args()
+
+    subscriber_counts = [int(count) for count in args.subscribers.split(',')]
+    if args.local or args.fake or args.memory:
+        max_workers = max(subscriber_counts) + args.consumers + args.publishers + 10
+        serve_local('memory' if args.memory else 'redis', args.fake, args.redis_port, max_workers)
+
+    results = {
+        'started': time.time(),
+        'python': platform.python_version(),
+        'args': vars(args),
+        'publish': bench_publish(args.events, args.publishers, args.batch_size),
+        'get': bench_get([int(size) for size in args.sizes.split(',')], args.repeat),
+        'subscribe': bench_subscribe(subscriber_counts, args.notifications, args.interval),
+        'group': bench_group(args.group_events, args.consumers, args.batch_size)
+    }
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    for name in ('publish', 'get', 'subscribe'):
+        for key, result in results[name].items():
+            latency = result['latency']
+            print('{} {}: p50 {:.2f}ms, p99 {:.2f}ms, p999 {:.2f}ms'.format(
+                name, key, latency.get('p50', 0), latency.get('p99', 0), latency.get('p999', 0))
+            )
+    print('group: {:.0f} events/s'.format(results['group']['throughput']))
@@ -0,0 +1,59 @@
+import threading
+import time
+import uuid
+
+import grpc
+
+from event_store_client import EventStoreClient, create_event
+
+PUBLISHERS = 50
+EVENTS = 200
+TOPIC = 'stress-{}'.format(uuid.uuid4())
+
+
+def publisher(_results):
+    """
+    Publish events as fast as possible, one by one and in batches.
+
+    :param _results: A list to append the entry IDs and errors to.
+    """
+    es = EventStoreClient()
+    for i in range(EVENTS):
+        try:
+            if i % 2:
+                _results.append(es.publish(TOPIC, create_event('entity_created', {'entity_id': str(uuid.uuid4())})))
+            else:
+                _results.extend(es.publish_many(TOPIC, [
+                    create_event('entity_created', {'entity_id': str(uuid.uuid4())}) for _ in range(10)
+                ]))
+        except grpc.RpcError as e:
+            _results.append(e)
+
+
+results = []
+threads = [threading.Thread(target=publisher, args=(results,)) for _ in range(PUBLISHERS)]
+
+start = time.time()
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+duration = time.time() - start
+
+errors = [result for result in results if isinstance(result, grpc.RpcError)]
+entry_ids = [result for result in results if isinstance(result, str)]
+
+print('published {} events in {:.2f}s ({:.0f}/s), {} rejected'.format(
+    len(entry_ids), duration, len(entry_ids) / duration, len(errors))
+)
+
+# check result
+assert not errors
+assert len(set(entry_ids)) == len(entry_ids) == PUBLISHERS * EVENTS // 2 * 11
+
+# check stream IDs are strictly monotonic
+stream_ids = [notification.entry_id for notification in EventStoreClient().get_iter(TOPIC)]
+assert len(stream_ids) == len(entry_ids)
+assert all(
+    tuple(map(int, a.split('-'))) < tuple(map(int, b.split('-'))) for a, b in zip(stream_ids, stream_ids[1:])
+)
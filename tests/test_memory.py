@@ -0,0 +1,145 @@
+import tempfile
+import time
+import unittest
+
+from event_store_archive import Archive, parse_id
+from event_store_core import ConcurrencyError
+from event_store_memory import MemoryEventStore
+
+
+def create_info(_event_id, _action='created'):
+    """
+    Create the information of an event.
+
+    :param _event_id: The event ID.
+    :param _action: The event action.
+    :return: A dict with the event information.
+    """
+    return {'event_id': _event_id, 'event_action': _action, 'event_data': '{{"id": "{}"}}'.format(_event_id)}
+
+
+class MemoryEventStoreTest(unittest.TestCase):
+    """
+    Memory Event Store tests, run with 'python -m pytest tests' from the repository root.
+    """
+
+    def setUp(self):
+        self.store = MemoryEventStore(dedup_window=60)
+
+    def test_dedup(self):
+        entry_id = self.store.add('orders', create_info('1'))
+
+        self.assertEqual(self.store.add_many('orders', [create_info('1'), create_info('2')])[0], entry_id)
+        self.assertEqual([entry['event_id'] for _, entry in self.store.get('orders')], ['1', '2'])
+
+    def test_dedup_disabled(self):
+        store = MemoryEventStore()
+        store.add('orders', create_info('1'))
+        store.add('orders', create_info('1'))
+
+        self.assertEqual(len(store.get('orders')), 2)
+
+    def test_expected_id(self):
+        entry_id = self.store.add('orders', create_info('1'), '0-0')
+        self.store.add('orders', create_info('2'), entry_id)
+
+        with self.assertRaises(ConcurrencyError) as e:
+            self.store.add('orders', create_info('3'), entry_id)
+        self.assertEqual(e.exception.expected_id, entry_id)
+        self.assertEqual(e.exception.last_id, self.store.last_id('orders'))
+        self.assertEqual(len(self.store.get('orders')), 2)
+
+    def test_expected_id_retry(self):
+        entry_ids = self.store.add_many('orders', [create_info('1'), create_info('2')], '0-0')
+
+        # a retry of an append which succeeded passes its expectation and gets the same entry IDs
+        self.assertEqual(self.store.add_many('orders', [create_info('1'), create_info('2')], '0-0'), entry_ids)
+
+    def test_add_topics(self):
+        entry_id = self.store.add('orders', create_info('1'))
+
+        with self.assertRaises(ConcurrencyError):
+            self.store.add_topics([
+                ('invoices', [create_info('2')], '0-0'),
+                ('orders', [create_info('3')], '0-0'),
+            ])
+        self.assertEqual(self.store.get('invoices'), [])
+        self.assertEqual(self.store.last_id('orders'), entry_id)
+
+        ids = self.store.add_topics([
+            ('invoices', [create_info('2')], '0-0'),
+            ('orders', [create_info('3')], entry_id),
+        ])
+        self.assertEqual([len(entry_ids) for entry_ids in ids], [1, 1])
+        self.assertEqual(self.store.last_id('invoices'), ids[0][0])
+
+    def test_get_range(self):
+        ids = self.store.add_many('orders', [create_info(str(i)) for i in range(10)])
+
+        self.assertEqual(self.entry_ids('orders'), ids)
+        self.assertEqual(self.entry_ids('orders', ids[2], ids[5]), ids[2:6])
+        self.assertEqual(self.entry_ids('orders', '(' + ids[2], '(' + ids[5]), ids[3:5])
+        self.assertEqual(self.entry_ids('orders', ids[2], _count=2), ids[2:4])
+        self.assertEqual(self.entry_ids('orders', _end=ids[5], _count=2, _reverse=True), [ids[5], ids[4]])
+        self.assertEqual(self.entry_ids('orders', '(' + ids[-1]), [])
+        self.assertEqual(self.entry_ids('unknown'), [])
+
+        # an ID without sequence number includes all entries of that millisecond
+        ms = ids[-1].split('-')[0]
+        self.assertEqual(self.entry_ids('orders', ms, ms), [i for i in ids if i.split('-')[0] == ms])
+
+    def test_get_range_pages(self):
+        ids = self.store.add_many('orders', [create_info(str(i)) for i in range(10)])
+
+        pages = list(self.store.get_range_pages('orders', '-', '+', 4))
+        self.assertEqual([len(page) for page in pages], [4, 4, 2])
+        self.assertEqual([entry_id for page in pages for entry_id, _ in page], ids)
+        with self.assertRaises(ValueError):
+            list(self.store.get_range_pages('orders', '-', '+', 0))
+
+    def test_retain(self):
+        with tempfile.TemporaryDirectory() as path:
+            store = MemoryEventStore(archive=Archive(path))
+            ids = store.add_many('orders', [create_info(str(i)) for i in range(10)])
+
+            self.assertEqual(store.retain('orders', _max_len=4), 6)
+            self.assertEqual([entry_id for entry_id, _ in store.streams['orders'].entries], ids[6:])
+            self.assertEqual([entry_id for entry_id, _ in store.get('orders')], ids)
+            self.assertEqual([entry_id for entry_id, _ in store.get_history('orders', ids[4], ids[7])], ids[4:8])
+            self.assertEqual(
+                [entry_id for entry_id, _ in store.get_history('orders', _count=3, _reverse=True)], ids[:6:-1]
+            )
+
+            # entries already archived are not archived again
+            self.assertEqual(store.retain('orders', _max_len=4), 0)
+            self.assertEqual(store.retain('orders', _max_len=2), 2)
+            self.assertEqual([entry_id for entry_id, _ in store.get('orders')], ids)
+
+    def test_retain_legacy_ids(self):
+        now = time.time()
+        ids = ['{}-0'.format(int(now - 100)), '{}-0'.format(int(now - 5)), '{}-0'.format(int(now * 1000))]
+        self.store.add('orders', create_info('0'))
+        stream = self.store.streams['orders']
+        stream.keys = [parse_id(entry_id) for entry_id in ids]
+        stream.entries = [(entry_id, create_info(entry_id)) for entry_id in ids]
+
+        # legacy IDs of seconds and microseconds are trimmed by their age, not as IDs older than any in ms
+        self.store.retain('orders', _max_age=20)
+        self.assertEqual(self.entry_ids('orders'), ids[1:])
+
+    def entry_ids(self, _topic, _start='-', _end='+', _count=None, _reverse=False):
+        """
+        Get the entry IDs of a range of events.
+
+        :param _topic: The event topic.
+        :param _start: The first entry ID.
+        :param _end: The last entry ID.
+        :param _count: Optional maximum number of entries.
+        :param _reverse: Boolean if the entries are returned newest first.
+        :return: A list of entry IDs.
+        """
+        return [entry_id for entry_id, _ in self.store.get_range(_topic, _start, _end, _count, _reverse)]
+
+
+if __name__ == '__main__':
+    unittest.main()